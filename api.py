@@ -1,15 +1,25 @@
-from fastapi import FastAPI
+import asyncio
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import FastAPI, Header, HTTPException, Response
 from pydantic import BaseModel
-import datetime
-from langdetect import detect
-from deep_translator import GoogleTranslator
-from utils.intent import classify_intent
-from core.tarot_reader import perform_reading
-from initialize.cache import get_cached, set_cached
+from core.pipeline import ReadingPipeline
+from initialize.admission import AdmissionController, Rejected
+from initialize.cache import cache_stats as response_cache_stats
+from initialize.config import ASK_MAX_CONCURRENT, ASK_MAX_QUEUE, ASK_QUEUE_TIMEOUT_S, ASK_WORKER_THREADS
+from initialize.singleflight import flight
+from initialize import log, metrics, profiling
+from utils.llm import cache_stats
 from utils.context import create_context
 from typing import Optional
 
 app = FastAPI()
+pipeline = ReadingPipeline()
+admission = AdmissionController(ASK_MAX_CONCURRENT, ASK_MAX_QUEUE, ASK_QUEUE_TIMEOUT_S)
+
+_executor = None
+_executor_pid = None
 
 class AskRequest(BaseModel):
     question: str
@@ -23,113 +33,80 @@ class AskResponse(BaseModel):
     translated_question: str
     translated_result: Optional[str] = None
     timing: Optional[dict] = None
+    llm_calls: Optional[list] = None
+
+
+def _pool() -> ThreadPoolExecutor:
+    # Executor threads do not survive a fork, so build one per worker process
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        _executor = ThreadPoolExecutor(max_workers=ASK_WORKER_THREADS, thread_name_prefix="ask")
+        _executor_pid = os.getpid()
+    return _executor
+
+async def _offload(fn, *args):
+    # Blocking stages (translation, HTTP, encoding, FAISS) run on the bounded
+    # pool, never on the event loop. The request context is copied so metrics
+    # and profiling still see the request; they join the request's profile.
+    ctx = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        _pool(), ctx.run, profiling.attached(fn), *args
+    )
 
-
-def format_date(dt: datetime.date) -> str:
-    return f"{dt.strftime('%B')} {dt.day}, {dt.year}"
-
-def detect_and_translate(input_text: str, target_language='en'):
-    detected_language = detect(input_text)
-    if detected_language != target_language:
-        translator = GoogleTranslator(source='auto', target=target_language)
-        return translator.translate(input_text), detected_language
-    return input_text, detected_language
-
-def translate_back(result_text: str, target_language: str):
-    if target_language == 'en':
-        return result_text
-    translator = GoogleTranslator(source='en', target=target_language)
-    return translator.translate(result_text)
+@app.get("/metrics")
+async def prometheus_metrics():
+    payload, content_type = metrics.render()
+    return Response(content=payload, media_type=content_type)
+
+@app.get("/stats")
+async def stats():
+    return {
+        "singleflight": flight.stats(),
+        "response_cache": response_cache_stats(),
+        "llm_cache": cache_stats(),
+        "admission": admission.stats(),
+        "logging": log.stats(),
+    }
 
 @app.post("/ask", response_model=AskResponse)
-async def ask_question(payload: AskRequest):
-    import time
+async def ask_question(payload: AskRequest, x_tarot_profile: Optional[str] = Header(None)):
+    try:
+        async with admission.admit():
+            with metrics.track_request():
+                async with profiling.profile_request("ask", requested=x_tarot_profile == "1"):
+                    return await _ask(payload)
+    except Rejected as e:
+        raise HTTPException(
+            status_code=e.status,
+            detail=f"Server busy ({e.reason}), please retry later",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+async def _ask(payload: AskRequest) -> AskResponse:
     question = payload.question.strip()
     lang = payload.language.strip().lower() if payload.language else 'en'
     context = create_context(language=lang)
-    timing = {}
-
-    # 1️⃣ Detect & translate
-    t0 = time.time()
-    translated_q, detected_lang = detect_and_translate(question, target_language='en')
-    timing['lang_detect_translate'] = time.time() - t0
 
-    # 2️⃣ Try cache
-    cached = get_cached(question)
-    if cached:
-        result = cached
-        intent = result.get("intent", "general")
-        from_cache = True
-    else:
-        from_cache = False
-        t_start = time.time()
-        # 3️⃣ Intent
-        t0 = time.time()
-        intent = classify_intent(translated_q)
-        timing['intent_classification'] = time.time() - t0
-
-        # 4️⃣ Perform
-        t1 = time.time()
-        result = perform_reading(translated_q, intent, context.get_history())
-        timing['prediction'] = time.time() - t1
-        timing['total'] = time.time() - t_start
-
-        if "error" in result:
-            return AskResponse(
-                detected_language=detected_lang,
-                intent=intent,
-                result_text=f"Error: {result['error']}",
-                result=result,
-                translated_question=translated_q,
-                timing=timing
-            )
-
-        # 5️⃣ Store intent & dates
-        result["intent"] = intent
-        if dr := result.get("date_range"):
-            result["date_range"] = [dr[0].isoformat(), dr[1].isoformat()]
-        set_cached(question, result)
-
-    # 6️⃣ Add turn into context
-    context.add_entry(
-        question=question,
-        translated=translated_q,
-        intent=intent,
-        result=result
-    )
-
-    # 7️⃣ Build result_text
-    if intent == "factual":
-        result_text = "Sorry, I cannot provide factual information at the moment. Please ask a tarot-related question."
-    elif intent == "conversation":
-        result_text = result["interpretation"]
-    elif intent == "timeline" and result.get("card"):
-        card = result["card"]
-        ds, de = result["date_range"]
-        ds_dt = datetime.date.fromisoformat(ds)
-        de_dt = datetime.date.fromisoformat(de)
-        result_text = (
-            f"Card: {card}\n"
-            f"Timeframe: {format_date(ds_dt)} – {format_date(de_dt)}\n\n"
-            f"{result['interpretation']}"
+    state = await pipeline.run_async(question, context, _offload)
+    timing = dict(state.timing, coalesced=True) if state.coalesced else state.timing
+
+    if state.error:
+        return AskResponse(
+            detected_language=state.detected_language,
+            intent=state.intent,
+            result_text=f"Error: {state.error}",
+            result=state.result,
+            translated_question=state.translated,
+            timing=timing
         )
-    else:
-        if cards := result.get("cards"):
-            result_text = f"Cards Drawn: {', '.join(cards)}\n\n{result['interpretation']}"
-        else:
-            result_text = result["interpretation"]
-
-    # 8️⃣ Translate back if needed
-    translated_result = None
-    if detected_lang != 'en':
-        translated_result = translate_back(result_text, detected_lang)
 
     return AskResponse(
-        detected_language=detected_lang,
-        intent=intent,
-        result_text=result_text,
-        result=result,
-        translated_question=translated_q,
-        translated_result=translated_result,
-        timing=timing if not from_cache else None
-    ) 
\ No newline at end of file
+        detected_language=state.detected_language,
+        intent=state.intent,
+        result_text=state.result_text,
+        result=state.result,
+        translated_question=state.translated,
+        translated_result=state.translated_result,
+        timing=timing if not state.from_cache else None,
+        llm_calls=state.llm_calls or None
+    )
@@ -1,6 +1,7 @@
 import pandas as pd
 from utils.intent import classify_intent
 from core.tarot_reader import perform_reading
+from utils.llm import cache_stats
 
 # 1. Load your test questions
 df = pd.read_csv("50_Test_Questions.csv")
@@ -26,3 +27,8 @@ out = pd.DataFrame(rows)
 #out.to_csv("batch_results.csv", index=False)
 print("Batch test complete – see batch_results.csv")
 print(out)
+
+# 4. Completion-cache effectiveness (only when run with LLM_CACHE=1)
+if stats := cache_stats():
+    print(f"LLM cache: {stats['hits']} hits / {stats['misses']} misses "
+          f"({stats['hit_rate']:.0%}), {stats['entries']} entries on disk")
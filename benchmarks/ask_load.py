@@ -0,0 +1,72 @@
+"""
+Overload check for /ask admission control.
+
+    gunicorn -c gunicorn.conf.py api:app            # in another shell
+    python benchmarks/ask_load.py [--url http://127.0.0.1:8000] [-c 64] [-n 400]
+
+Fires n questions from c concurrent clients and reports how many were
+served, rejected with 429 (queue full) or 503 (queue wait timeout), the
+latency percentiles of each group, and the server's /stats admission block.
+Rejections should come back fast, and served requests should keep a bounded
+latency instead of growing with the offered load. Point LLM_API_URL at
+benchmarks/mock_llm_server.py to take the provider out of the measurement.
+"""
+import argparse
+import collections
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+QUESTIONS = [
+    "When will I find a new job?", "Will I pass my exam?", "Should I take the offer?",
+    "What should I focus on this month?", "Why do I feel stuck?", "How can I grow in my career?",
+]
+
+
+def one(url: str, i: int):
+    question = f"{QUESTIONS[i % len(QUESTIONS)]} ({i})"   # unique, so nothing is cached or coalesced
+    t0 = time.perf_counter()
+    try:
+        r = requests.post(f"{url}/ask", json={"question": question, "language": "en"}, timeout=120)
+        return r.status_code, time.perf_counter() - t0, r.headers.get("Retry-After")
+    except requests.RequestException:
+        return "error", time.perf_counter() - t0, None
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default="http://127.0.0.1:8000")
+    ap.add_argument("-c", "--concurrency", type=int, default=64)
+    ap.add_argument("-n", "--requests", type=int, default=400)
+    args = ap.parse_args()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda i: one(args.url, i), range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    groups = collections.defaultdict(list)
+    retry_after = collections.Counter()
+    for status, seconds, ra in results:
+        groups[status].append(seconds)
+        if ra:
+            retry_after[ra] += 1
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {elapsed:.1f}s "
+          f"({args.requests / elapsed:.1f} req/s)")
+    for status, times in sorted(groups.items(), key=lambda kv: str(kv[0])):
+        p50, p95, p99 = np.percentile(times, [50, 95, 99])
+        print(f"  {status}: {len(times):5d}  p50 {p50 * 1000:7.0f} ms  p95 {p95 * 1000:7.0f} ms  "
+              f"p99 {p99 * 1000:7.0f} ms")
+    if retry_after:
+        print(f"  Retry-After values: {dict(retry_after)}")
+    try:
+        print("server admission stats:", requests.get(f"{args.url}/stats", timeout=5).json().get("admission"))
+    except requests.RequestException:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Side-by-side latency and memory of the retrieval backends on the same queries.
+
+    python benchmarks/backend_compare.py                 # faiss vs chroma
+    python benchmarks/backend_compare.py --backends faiss
+
+Each backend runs in its own subprocess so its peak RSS is measured on its own.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def measure(name: str, top_k: int, rounds: int) -> dict:
+    from core.backends import BACKENDS
+    from utils.deck import FULL_DECK
+
+    t0 = time.perf_counter()
+    backend = BACKENDS[name]()
+    backend.ensure_ready()
+    load_s = time.perf_counter() - t0
+
+    backend.retrieve("The Fool", top_k=top_k)  # warm-up
+    latencies = []
+    for _ in range(rounds):
+        for card in FULL_DECK:
+            t = time.perf_counter()
+            backend.retrieve(card, top_k=top_k)
+            latencies.append((time.perf_counter() - t) * 1000)
+
+    return {
+        "backend": name,
+        "load_s": load_s,
+        "p50_ms": _percentile(latencies, 50),
+        "p99_ms": _percentile(latencies, 99),
+        "mean_ms": sum(latencies) / len(latencies),
+        "peak_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="+", default=["faiss", "chroma"])
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.top_k, args.rounds)))
+        sys.exit(0)
+
+    print(f"{'backend':<8} | {'load s':>7} | {'p50 ms':>7} | {'p99 ms':>7} | {'mean ms':>7} | {'peak RSS MiB':>12}")
+    for name in args.backends:
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", name, "--top-k", str(args.top_k), "--rounds", str(args.rounds)],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        )
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{r['backend']:<8} | {r['load_s']:7.2f} | {r['p50_ms']:7.2f} | {r['p99_ms']:7.2f} | "
+              f"{r['mean_ms']:7.2f} | {r['peak_rss_mib']:12.1f}")
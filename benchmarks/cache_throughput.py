@@ -0,0 +1,113 @@
+"""
+Multi-process read and write throughput of the response cache backends.
+
+    python benchmarks/cache_throughput.py [--procs 1,2,4,8] [-n 2000] [--backends sqlite,memory]
+
+Each of --procs worker processes (like uvicorn workers) opens its own
+handle on the cache and then:
+
+  write       sets n distinct reading-sized JSON values
+  read        reads n random keys from a pre-filled cache (all hits)
+  mixed       90% reads / 10% writes
+  get_or_set  all processes race get_or_set_cached on the same 200 keys; checks
+              every process got the same stored value for every key
+
+Prints aggregate operations per second. "memory" is the per-process dict:
+fast, but each worker only sees its own entries, so its read test pre-fills
+every process separately and get_or_set does not agree across processes.
+"redis" needs a server at REDIS_URL.
+"""
+import argparse
+import multiprocessing as mp
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+VALUE = {
+    "cards": ["The Star", "Six of Cups", "The Chariot"],
+    "interpretation": "The cards suggest a season of patient growth and quiet courage. " * 12,
+    "intent": "guidance",
+}
+
+
+def open_cache(backend: str, path: str):
+    os.environ["RESPONSE_CACHE"] = backend
+    os.environ["RESPONSE_CACHE_PATH"] = path
+    import initialize.cache as cache
+    return cache
+
+
+def worker(backend, path, mode, proc, n, keys, start_evt, out):
+    cache = open_cache(backend, path)
+    rng = random.Random(proc)
+    if mode == "fill" or (mode in ("read", "mixed") and backend == "memory"):
+        for key in keys:   # memory: every process has to fill its own dict
+            cache.set_cached(key, VALUE)
+    results, hits = {}, 0
+    start_evt.wait()
+    t0 = time.perf_counter()
+    for i in range(n):
+        if mode == "fill":
+            break
+        if mode == "write" or (mode == "mixed" and rng.random() < 0.1):
+            cache.set_cached(f"w{proc}-{i}", VALUE)
+        elif mode == "get_or_set":
+            key = keys[i % len(keys)]
+            results[key] = cache.get_or_set_cached(key, lambda: dict(VALUE, writer=proc))["writer"]
+        else:
+            hits += cache.get_cached(rng.choice(keys)) is not None
+    out.put((time.perf_counter() - t0, hits, results))
+
+
+def run(backend: str, path: str, mode: str, procs: int, n: int, keys):
+    ctx = mp.get_context("spawn")
+    start_evt, out = ctx.Event(), ctx.Queue()
+    workers = [ctx.Process(target=worker, args=(backend, path, mode, p, n, keys, start_evt, out))
+               for p in range(procs)]
+    for w in workers:
+        w.start()
+    time.sleep(1.0)   # let every process import and open the cache
+    start_evt.set()
+    rows = [out.get() for _ in workers]
+    for w in workers:
+        w.join()
+    elapsed = max(r[0] for r in rows)
+    return procs * n / elapsed, sum(r[1] for r in rows), [r[2] for r in rows]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backends", default="sqlite,memory")
+    ap.add_argument("--procs", default="1,2,4,8")
+    ap.add_argument("-n", type=int, default=2000, help="operations per process")
+    args = ap.parse_args()
+
+    for backend in args.backends.split(","):
+        print(f"\n{backend}")
+        print(f"  {'procs':>5} {'write/s':>10} {'read/s':>10} {'mixed/s':>10} {'get_or_set/s':>13}  agree")
+        for procs in map(int, args.procs.split(",")):
+            tmp = tempfile.mkdtemp(prefix="cache-bench-")
+            path = os.path.join(tmp, "responses.sqlite3")
+            try:
+                keys = [f"question {i}" for i in range(1000)]
+                if backend != "memory":
+                    run(backend, path, "fill", 1, 1, keys)
+                write, _, _ = run(backend, path, "write", procs, args.n, keys)
+                read, _, _ = run(backend, path, "read", procs, args.n, keys)
+                mixed, _, _ = run(backend, path, "mixed", procs, args.n, keys)
+                race_keys = [f"race {procs} {i}" for i in range(200)]
+                race, _, results = run(backend, path, "get_or_set", procs, args.n, race_keys)
+                agree = all(len({r[k] for r in results}) == 1 for k in race_keys)
+                print(f"  {procs:>5} {write:>10,.0f} {read:>10,.0f} {mixed:>10,.0f} {race:>13,.0f}  "
+                      f"{'yes' if agree else 'NO'}", flush=True)
+            finally:
+                shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
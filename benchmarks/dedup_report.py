@@ -0,0 +1,155 @@
+"""
+Effect of near-duplicate chunk removal on the corpus, the index and search.
+
+    python benchmarks/dedup_report.py [--source pdf|chroma] [--embed-check] [--no-index] [-k 5]
+
+Loads the chunks the index build would see: `pdf` extracts them from
+PDF_PATHS, and `chroma` splits the documents stored in CHROMA_DB_DIR the same
+way. Then runs utils.dedup.find_duplicates and reports:
+
+  - the corpus before and after (chunks, characters, clusters, largest
+    clusters);
+  - FAISS IndexFlatL2 size before and after;
+  - p50/p95 search latency for the 78 card names before and after;
+  - duplicate crowding: results per query that repeat a near-duplicate
+    already ranked above them.
+
+--embed-check also requires embedding similarity before merging
+(DEDUP_EMBED_CHECK). --no-index stops after the corpus report, which needs no
+embedding model.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from initialize.config import CHROMA_DB_DIR, DEDUP_THRESHOLD
+from utils.dedup import find_duplicates
+from utils.deck import FULL_DECK
+
+
+def chroma_chunks():
+    """
+    Chunks and (source, page) from the Chroma store's SQLite file, split like
+    TarotPDFEmbedder.extract_paragraphs splits a page.
+    """
+    conn = sqlite3.connect(f"file:{os.path.join(CHROMA_DB_DIR, 'chroma.sqlite3')}?mode=ro", uri=True)
+    rows = conn.execute(
+        """
+        SELECT d.string_value, s.string_value, p.string_value
+        FROM embedding_metadata d
+        LEFT JOIN embedding_metadata s ON s.id = d.id AND s.key = 'source'
+        LEFT JOIN embedding_metadata p ON p.id = d.id AND p.key = 'page_label'
+        WHERE d.key = 'chroma:document'
+        ORDER BY d.id
+        """
+    ).fetchall()
+    texts, provenance = [], []
+    for text, source, page in rows:
+        for chunk in (c.strip() for c in text.split('\n\n')):
+            if len(chunk) > 40:
+                texts.append(chunk)
+                provenance.append([{"pdf": source, "page": page}])
+    return texts, provenance
+
+
+def pdf_chunks(embedder):
+    texts = embedder.extract_paragraphs()
+    return texts, embedder.provenance
+
+
+def search_stats(index, queries: np.ndarray, k: int, rounds: int = 20):
+    import faiss
+
+    index.search(queries[:1], k)   # warm-up
+    latencies = []
+    for _ in range(rounds):
+        for row in range(len(queries)):
+            t0 = time.perf_counter()
+            index.search(queries[row:row + 1], k)
+            latencies.append((time.perf_counter() - t0) * 1000)
+    _, ids = index.search(queries, k)
+    return {
+        "bytes": int(faiss.serialize_index(index).nbytes),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }, ids
+
+
+def crowding(ids: np.ndarray, cluster_of) -> float:
+    """
+    Mean number of results per query whose near-duplicate cluster already
+    appeared higher in the same result list.
+    """
+    repeats = 0
+    for row in ids:
+        seen = set()
+        for i in row:
+            if i < 0:
+                continue
+            repeats += cluster_of[i] in seen
+            seen.add(cluster_of[i])
+    return repeats / len(ids)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--source", choices=("pdf", "chroma"), default="pdf")
+    ap.add_argument("--model", default="all-MiniLM-L6-v2")
+    ap.add_argument("--threshold", type=float, default=DEDUP_THRESHOLD)
+    ap.add_argument("--embed-check", action="store_true")
+    ap.add_argument("--no-index", action="store_true", help="corpus report only (no embedding model)")
+    ap.add_argument("-k", type=int, default=5)
+    args = ap.parse_args()
+
+    needs_model = not args.no_index or args.embed_check
+    model = None
+    if args.source == "pdf":
+        from utils.pdf_reader import TarotPDFEmbedder
+        embedder = TarotPDFEmbedder(args.model)
+        model = embedder.model if needs_model else None
+        texts, provenance = pdf_chunks(embedder)
+    else:
+        texts, provenance = chroma_chunks()
+        if needs_model:
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(args.model)
+
+    embeddings = model.encode(texts).astype("float32") if model is not None else None
+    t0 = time.perf_counter()
+    result = find_duplicates(texts, threshold=args.threshold,
+                             embeddings=embeddings if args.embed_check else None)
+    dedup_s = time.perf_counter() - t0
+    report = result.report(texts)
+    report["dedup_s"] = round(dedup_s, 3)
+    merged_sources = max((sum(len(provenance[m]) for m in ids) for ids in result.members.values()), default=0)
+    report["max_sources_per_chunk"] = merged_sources
+
+    if not args.no_index:
+        import faiss
+
+        queries = model.encode(FULL_DECK).astype("float32")
+        cluster_of = {}
+        for kept, ids in result.members.items():
+            for i in ids:
+                cluster_of[i] = kept
+        before = faiss.IndexFlatL2(embeddings.shape[1])
+        before.add(embeddings)
+        after = faiss.IndexFlatL2(embeddings.shape[1])
+        after.add(embeddings[result.keep])
+        report["index_before"], ids_before = search_stats(before, queries, args.k)
+        report["index_after"], ids_after = search_stats(after, queries, args.k)
+        report["index_before"]["crowding"] = crowding(ids_before, cluster_of)
+        report["index_after"]["crowding"] = crowding(ids_after, [cluster_of[i] for i in result.keep])
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
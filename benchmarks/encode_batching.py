@@ -0,0 +1,67 @@
+"""
+Throughput and tail latency of card retrieval with and without the
+EncodeBatcher, at several concurrency levels.
+
+    python benchmarks/encode_batching.py
+    python benchmarks/encode_batching.py --window-ms 2 --max-batch 64 --requests 400
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.batcher import EncodeBatcher
+from core.rag import _backend, ensure_index
+from utils.deck import FULL_DECK
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def run(retrieve, concurrency: int, n_requests: int):
+    latencies = []
+    lock = threading.Lock()
+
+    def one(i):
+        t0 = time.perf_counter()
+        retrieve(FULL_DECK[i % len(FULL_DECK)], 3)
+        dt = time.perf_counter() - t0
+        with lock:
+            latencies.append(dt)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(n_requests)))
+    wall = time.perf_counter() - t0
+    return n_requests / wall, _percentile(latencies, 50) * 1000, _percentile(latencies, 99) * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--window-ms", type=float, default=3.0)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    args = parser.parse_args()
+
+    ensure_index()
+    direct = lambda q, k: _backend.retrieve(q, top_k=k)
+    batcher = EncodeBatcher(_backend.retrieve_batch, args.window_ms, args.max_batch)
+    batched = lambda q, k: batcher.retrieve(q, top_k=k)
+
+    # Warm up the model so the first measured call is not a cold start
+    direct("The Fool", 3)
+
+    print(f"{'conc':>5} | {'mode':<8} | {'req/s':>8} | {'p50 ms':>8} | {'p99 ms':>8}")
+    for c in args.concurrency:
+        for name, fn in (("direct", direct), ("batched", batched)):
+            rps, p50, p99 = run(fn, c, args.requests)
+            print(f"{c:>5} | {name:<8} | {rps:8.1f} | {p50:8.2f} | {p99:8.2f}")
+    print(f"batcher stats: {batcher.stats()}")
@@ -0,0 +1,182 @@
+"""
+Local OpenAI-compatible chat-completions stub with fault injection.
+
+    python benchmarks/mock_llm_server.py --port 8199 --latency-ms 200 \
+        --slow-rate 0.05 --slow-ms 5000 --error-rate 0.1 --rate-limit-rate 0.05
+
+Point the app at it with LLM_API_URL=http://127.0.0.1:8199/v1/chat/completions.
+Settings can also be changed at runtime by POSTing JSON to /__config.
+"""
+import argparse
+import collections
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_CONFIG = {
+    "latency_ms": 50.0,      # base latency of every reply
+    "jitter_ms": 10.0,       # uniform extra latency
+    "slow_rate": 0.0,        # fraction of replies delayed by slow_ms
+    "slow_ms": 5000.0,
+    "error_rate": 0.0,       # fraction answered with HTTP 503
+    "rate_limit_rate": 0.0,  # fraction answered with HTTP 429 + Retry-After
+    "client_error_rate": 0.0,  # fraction answered with HTTP 400
+    "malformed_rate": 0.0,   # fraction answered 200 with a body lacking "choices"
+    "stream_cut_after": 0,   # drop streams after this many chunks, without [DONE] (0 = never)
+    "reply": "The cards suggest patience.",
+    "model_latency_ms": {},  # per-model base latency, overriding latency_ms
+    "token_ms": {},          # per-model generation time per output token
+    "prefill_token_ms": 0.0, # prompt processing time per uncached prompt token
+    "prefix_cache": True,    # report message-prefix reuse as cached_tokens
+}
+
+
+class MockLLMServer:
+    """
+    Runs the stub on a background thread; `config` may be mutated between
+    requests and `requests` counts what the stub has received.
+    """
+    def __init__(self, port: int = 0, **config):
+        self.config = dict(DEFAULT_CONFIG, **config)
+        self.requests = 0
+        self._lock = threading.Lock()
+        # Message-list prefixes seen so far (hash -> token count), like a
+        # provider's prompt cache keyed on whole messages
+        self._prefixes: "collections.OrderedDict[str, int]" = collections.OrderedDict()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.url = f"http://127.0.0.1:{self.port}/v1/chat/completions"
+
+    def cached_prefix(self, messages) -> int:
+        """
+        Tokens in the longest leading run of messages already seen in an
+        earlier request; records this request's prefixes for later ones.
+        """
+        digest = hashlib.sha256()
+        tokens = 0
+        best = 0
+        with self._lock:
+            for m in messages:
+                digest.update(json.dumps(m, sort_keys=True).encode())
+                tokens += len(m.get("content", "").split())
+                key = digest.hexdigest()
+                if key in self._prefixes:
+                    best = tokens
+                    self._prefixes.move_to_end(key)
+                else:
+                    self._prefixes[key] = tokens
+            while len(self._prefixes) > 10000:
+                self._prefixes.popitem(last=False)
+        return best
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, headers=None):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if self.path == "/__config":
+                    server.config.update(body)
+                    return self._send(200, server.config)
+
+                with server._lock:
+                    server.requests += 1
+                cfg = server.config
+                roll = random.random()
+                if roll < cfg["rate_limit_rate"]:
+                    return self._send(429, {"error": "rate limited"}, {"Retry-After": "0.1"})
+                if roll < cfg["rate_limit_rate"] + cfg["error_rate"]:
+                    return self._send(503, {"error": "unavailable"})
+                roll -= cfg["rate_limit_rate"] + cfg["error_rate"]
+                if roll < cfg["client_error_rate"]:
+                    return self._send(400, {"error": "bad request"})
+                if roll < cfg["client_error_rate"] + cfg["malformed_rate"]:
+                    return self._send(200, {"unexpected": True})
+
+                model = body.get("model", "")
+                # Output is capped at max_tokens (one word = one token here)
+                words = cfg["reply"].split(" ")[:body.get("max_tokens") or None]
+                reply = " ".join(words)
+
+                messages = body.get("messages", [])
+                prompt_tokens = sum(len(m.get("content", "").split()) for m in messages)
+                cached_tokens = server.cached_prefix(messages) if cfg["prefix_cache"] else 0
+
+                delay = cfg["model_latency_ms"].get(model, cfg["latency_ms"]) + random.uniform(0, cfg["jitter_ms"])
+                delay += cfg["token_ms"].get(model, 0.0) * len(words)
+                delay += cfg["prefill_token_ms"] * (prompt_tokens - cached_tokens)
+                if random.random() < cfg["slow_rate"]:
+                    delay += cfg["slow_ms"]
+                time.sleep(delay / 1000)
+
+                usage = {
+                    "prompt_tokens": prompt_tokens,
+                    "prompt_tokens_details": {"cached_tokens": cached_tokens},
+                    "completion_tokens": len(reply.split()),
+                    "total_tokens": prompt_tokens + len(reply.split()),
+                }
+                if body.get("stream"):
+                    return self._stream(reply, usage)
+                self._send(200, {
+                    "model": body.get("model"),
+                    "choices": [{"message": {"role": "assistant", "content": reply}}],
+                    "usage": usage,
+                })
+
+            def _stream(self, reply, usage):
+                # Server-sent events, one word per chunk, like the real API:
+                # raw UTF-8 and no charset in the Content-Type
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                words = reply.split(" ")
+                for i, word in enumerate(words):
+                    if i and i == server.config["stream_cut_after"]:
+                        return
+                    piece = word if i == 0 else " " + word
+                    event = {"choices": [{"delta": {"content": piece}}]}
+                    self.wfile.write(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode())
+                    self.wfile.flush()
+                    time.sleep(0.01)
+                self.wfile.write(f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n".encode())
+                self.wfile.write(b"data: [DONE]\n\n")
+
+        return Handler
+
+    def start(self) -> "MockLLMServer":
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8199)
+    for key, value in DEFAULT_CONFIG.items():
+        # Per-model maps take JSON, e.g. --model-latency-ms '{"llama-3.1-8b-instant": 80}'
+        kind = json.loads if isinstance(value, dict) else type(value)
+        parser.add_argument(f"--{key.replace('_', '-')}", type=kind, default=value)
+    args = vars(parser.parse_args())
+    port = args.pop("port")
+    srv = MockLLMServer(port, **args)
+    print(f"Mock LLM listening on {srv.url}")
+    srv.httpd.serve_forever()
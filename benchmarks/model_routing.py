@@ -0,0 +1,67 @@
+"""
+Latency per LLM route against the local mock server.
+
+    python benchmarks/model_routing.py [-n 10] [--fast-ms 80] [--large-ms 350]
+
+Starts benchmarks/mock_llm_server.py with a latency profile per model (a base
+round trip plus a per-output-token cost, fast model cheaper on both), then
+sends n calls through utils.llm.chat_completion for every route in
+LLM_ROUTES, and again with every route forced onto LLM_MODEL at 512 tokens
+(the old single-model setup). Prints p50/p95 per route for both.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_llm_server import MockLLMServer
+from initialize.config import LLM_FAST_MODEL, LLM_MODEL, LLM_ROUTES
+import utils.llm as llm
+
+MESSAGES = [{"role": "user", "content": "Will I find a new job this year?"}]
+
+
+def measure(route: str, n: int, **overrides):
+    with llm.record_calls() as calls:
+        for _ in range(n):
+            llm.chat_completion(MESSAGES, route=route, use_cache=False, **overrides)
+    return calls
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=10)
+    ap.add_argument("--fast-ms", type=float, default=80, help="fast model base latency")
+    ap.add_argument("--large-ms", type=float, default=350, help="large model base latency")
+    ap.add_argument("--fast-token-ms", type=float, default=0.5)
+    ap.add_argument("--large-token-ms", type=float, default=1.5)
+    args = ap.parse_args()
+
+    srv = MockLLMServer(
+        jitter_ms=20,
+        reply=" ".join(["insight"] * 600),
+        model_latency_ms={LLM_FAST_MODEL: args.fast_ms, LLM_MODEL: args.large_ms},
+        token_ms={LLM_FAST_MODEL: args.fast_token_ms, LLM_MODEL: args.large_token_ms},
+    )
+    srv.start()
+    llm.LLM_API_URL = srv.url
+
+    print(f"{'route':<15} {'model':<26} {'max_tok':>7} {'p50 ms':>8} {'p95 ms':>8}   "
+          f"{'single-model p50':>16} {'p95':>8}")
+    try:
+        for route in LLM_ROUTES:
+            settings = llm.route(route)
+            routed = [c["seconds"] * 1000 for c in measure(route, args.n)]
+            single = [c["seconds"] * 1000 for c in measure(route, args.n, model=LLM_MODEL, max_tokens=512)]
+            print(f"{route:<15} {settings['model']:<26} {settings['max_tokens']:>7} "
+                  f"{np.percentile(routed, 50):8.0f} {np.percentile(routed, 95):8.0f}   "
+                  f"{np.percentile(single, 50):16.0f} {np.percentile(single, 95):8.0f}", flush=True)
+    finally:
+        srv.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Prompt-prefix reuse across the turns of one session.
+
+    python benchmarks/prefix_cache.py [--turns 6] [--prefill-token-ms 0.5]
+
+Plays a multi-turn session against benchmarks/mock_llm_server.py, which
+reports `usage.prompt_tokens_details.cached_tokens` for the longest run of
+leading messages it has already seen (as providers with prompt caching do)
+and charges prefill time only for uncached prompt tokens. Compares the
+structured message lists from core/prompts.py with the old layout, where
+system prompt, history, question and cards were flattened into one user
+message.
+"""
+import argparse
+import datetime
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_llm_server import MockLLMServer
+from core.prompts import build_conversation_messages, build_spread_messages, build_timeline_messages
+import utils.llm as llm
+
+TURNS = [
+    ("conversation", "Hello Tara, I have a few questions about work."),
+    ("guidance", "How can I grow in my career this year?"),
+    ("timeline", "When will I find a new job?"),
+    ("yes_no", "Should I accept the offer from the startup?"),
+    ("insight", "Why do I feel stuck with my manager?"),
+    ("guidance", "What should I focus on this month?"),
+    ("timeline", "When will things calm down at home?"),
+    ("yes_no", "Will the move go smoothly?"),
+]
+MEANING = "A card of steady effort, patience and reward for work done well. " * 3
+REPLY = "The cards suggest a season of patient growth and quiet courage. " * 6
+
+
+def messages_for(intent, question, history):
+    if intent == "conversation":
+        return build_conversation_messages(question, history)
+    if intent == "timeline":
+        today = datetime.date.today()
+        return build_timeline_messages(question, history, "Four of Pentacles",
+                                       (today, today + datetime.timedelta(days=9)), MEANING)
+    return build_spread_messages(question, history, ["The Star", "Six of Cups", "The Chariot"], [MEANING] * 3)
+
+
+def flattened(messages):
+    return [{"role": "user", "content": "\n\n".join(m["content"] for m in messages)}]
+
+
+def session(turns: int, flatten: bool):
+    history, rows = [], []
+    for intent, question in TURNS[:turns]:
+        messages = messages_for(intent, question, history)
+        with llm.record_calls() as calls:
+            reply = llm.chat_completion(flattened(messages) if flatten else messages,
+                                        route=intent, use_cache=False)
+        rows.append(calls[-1])
+        history.append({"question": question, "intent": intent,
+                        "result": {"interpretation": reply, "user_message": messages[-1]["content"]}})
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--turns", type=int, default=6)
+    ap.add_argument("--prefill-token-ms", type=float, default=0.5)
+    args = ap.parse_args()
+
+    for label, flatten in (("flattened single message", True), ("structured messages", False)):
+        srv = MockLLMServer(reply=REPLY.strip(), latency_ms=40, jitter_ms=0,
+                            prefill_token_ms=args.prefill_token_ms)
+        srv.start()
+        llm.LLM_API_URL = srv.url
+        try:
+            rows = session(args.turns, flatten)
+        finally:
+            srv.stop()
+        print(f"\n{label}")
+        print(f"  {'turn':>4} {'prompt':>7} {'cached':>7} {'hit':>6} {'ms':>7}")
+        for i, call in enumerate(rows, start=1):
+            hit = call["cached_tokens"] / max(call["prompt_tokens"], 1)
+            print(f"  {i:>4} {call['prompt_tokens']:>7} {call['cached_tokens']:>7} {hit:>6.0%} "
+                  f"{call['seconds'] * 1000:>7.0f}")
+        prompt = sum(c["prompt_tokens"] for c in rows)
+        cached = sum(c["cached_tokens"] for c in rows)
+        print(f"  total {prompt} prompt tokens, {cached} from prefix cache ({cached / max(prompt, 1):.0%})")
+
+
+if __name__ == "__main__":
+    main()
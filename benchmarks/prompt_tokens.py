@@ -0,0 +1,68 @@
+"""
+Prompt-size savings from the condensed card meanings, per intent.
+
+    python benchmarks/prompt_tokens.py
+
+Builds the timeline and spread prompts for the same questions and cards twice:
+with raw retrieved paragraphs (the old behaviour: 3 for timeline, 1 per card
+for spreads) and with the build-time meaning records. Tokens are counted with
+tiktoken's cl100k_base when it is installed, otherwise estimated as words +
+punctuation marks.
+"""
+import os
+import random
+import re
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.rag import ensure_index, get_card_meaning, get_card_summary
+from core.prompts import build_spread_messages, build_timeline_messages
+from utils.deck import DATE_RANGES, FULL_DECK, NUMERIC_CARDS
+
+QUESTIONS = {
+    "timeline": ["When will I find a new job?", "When will I meet my partner?", "When will I move house?"],
+    "yes_no": ["Will I pass my exam?", "Should I take the offer?", "Will we reconcile?"],
+    "guidance": ["How can I grow in my career?", "What should I focus on this month?"],
+    "insight": ["Why do I feel stuck?", "Why does this relationship feel hard?"],
+}
+
+try:
+    import tiktoken
+    _enc = tiktoken.get_encoding("cl100k_base")
+    count_tokens = lambda text: len(_enc.encode(text))
+except ImportError:
+    count_tokens = lambda text: len(re.findall(r"\w+|[^\w\s]", text))
+
+
+def prompts(intent: str, question: str, rng: random.Random):
+    if intent == "timeline":
+        card = rng.choice(NUMERIC_CARDS)
+        dr = DATE_RANGES[card]
+        raw = build_timeline_messages(question, [], card, dr, get_card_meaning(card))
+        condensed = build_timeline_messages(question, [], card, dr, get_card_summary(card))
+    else:
+        cards = rng.sample(FULL_DECK, k=3)
+        raw = build_spread_messages(question, [], cards, [get_card_meaning(c, k=1) for c in cards])
+        condensed = build_spread_messages(question, [], cards, [get_card_summary(c) for c in cards])
+    return text(raw), text(condensed)
+
+
+def text(messages) -> str:
+    return "\n\n".join(m["content"] for m in messages)
+
+
+if __name__ == "__main__":
+    ensure_index()
+    rng = random.Random(7)
+    print(f"{'intent':<9} | {'raw tokens':>10} | {'condensed':>9} | {'saved':>6}")
+    for intent, questions in QUESTIONS.items():
+        raw_total = condensed_total = 0
+        for _ in range(10):
+            for q in questions:
+                raw, condensed = prompts(intent, q, rng)
+                raw_total += count_tokens(raw)
+                condensed_total += count_tokens(condensed)
+        n = 10 * len(questions)
+        saved = 1 - condensed_total / raw_total
+        print(f"{intent:<9} | {raw_total / n:10.0f} | {condensed_total / n:9.0f} | {saved:6.0%}")
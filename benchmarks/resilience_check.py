@@ -0,0 +1,94 @@
+"""
+Exercise the LLM client's deadlines, retries, hedging and circuit breaker
+against the local fault-injecting stub (benchmarks/mock_llm_server.py).
+
+    python benchmarks/resilience_check.py
+
+Each scenario prints what it observed and fails loudly if the client did not
+behave as expected.
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.mock_llm_server import MockLLMServer
+
+server = MockLLMServer().start()
+
+# Configure the client before importing it: settings are read at import time
+os.environ.update({
+    "LLM_API_URL": server.url,
+    "LLM_CACHE": "0",
+    "LLM_HEDGE": "1",
+    "LLM_HEDGE_MIN_DELAY_S": "0.15",
+    "LLM_READ_TIMEOUT": "2",
+    "LLM_DEADLINE_S": "3",
+    "LLM_MAX_RETRIES": "3",
+    "LLM_BACKOFF_BASE_S": "0.02",
+    "LLM_BREAKER_THRESHOLD": "3",
+    "LLM_BREAKER_RESET_S": "1",
+})
+from utils import llm  # noqa: E402
+
+MESSAGES = [{"role": "user", "content": "Will I travel this year?"}]
+CANNED = "canned reply"
+
+
+def _call():
+    t0 = time.perf_counter()
+    reply = llm.chat_completion(MESSAGES, fallback=CANNED)
+    return reply, time.perf_counter() - t0
+
+
+def _set(**cfg):
+    server.config.update(dict(latency_ms=30, jitter_ms=5, slow_rate=0, error_rate=0, rate_limit_rate=0), **cfg)
+    llm.breaker.reset()
+
+
+def retries_recover_from_transient_errors():
+    _set(error_rate=0.3, rate_limit_rate=0.1)
+    replies = [_call()[0] for _ in range(40)]
+    ok = sum(r != CANNED for r in replies)
+    print(f"  {ok}/40 succeeded with 30% 503s and 10% 429s")
+    assert ok >= 36
+
+
+def hedging_cuts_the_tail():
+    _set(slow_rate=0.03, slow_ms=1500)
+    latencies = sorted(_call()[1] for _ in range(100))
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"  p99 {p99 * 1000:.0f} ms with 3% of replies delayed by 1500 ms")
+    assert p99 < 1.0
+
+
+def deadline_bounds_a_hung_upstream():
+    _set(latency_ms=10000)
+    reply, dt = _call()
+    print(f"  returned {'canned' if reply == CANNED else 'reply'} after {dt:.2f}s (deadline 3s)")
+    assert reply == CANNED and dt < 3.5
+
+
+def breaker_fails_fast_then_recovers():
+    _set(error_rate=1.0)
+    for _ in range(3):
+        _call()
+    before = server.requests
+    reply, dt = _call()
+    print(f"  breaker {llm.breaker.state}: canned reply in {dt * 1000:.1f} ms, "
+          f"{server.requests - before} upstream requests")
+    assert llm.breaker.state == "open" and reply == CANNED and server.requests == before
+    server.config["error_rate"] = 0
+    time.sleep(1.1)
+    reply, _ = _call()
+    print(f"  after reset timeout: breaker {llm.breaker.state}")
+    assert reply != CANNED and llm.breaker.state == "closed"
+
+
+if __name__ == "__main__":
+    for scenario in (retries_recover_from_transient_errors, hedging_cuts_the_tail,
+                     deadline_bounds_a_hung_upstream, breaker_fails_fast_then_recovers):
+        print(scenario.__name__)
+        scenario()
+    server.stop()
+    print("all resilience scenarios passed")
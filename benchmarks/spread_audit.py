@@ -0,0 +1,65 @@
+"""
+Randomness audit for the spread sampler.
+
+    python benchmarks/spread_audit.py [--spread celtic_cross] [-n 1000000] [--seed 0]
+
+Draws n spreads with core.spreads.sample_spreads, reports throughput, and
+checks that every card is equally likely in every position with a chi-square
+test per position (and that no spread repeats a card). Compares against
+n calls to random.sample on card names, the old per-reading draw.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.spreads import SPREADS, get_spread, position_counts, sample_spreads
+from utils.deck import FULL_DECK
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--spread", default="celtic_cross", choices=sorted(SPREADS))
+    ap.add_argument("-n", type=int, default=1_000_000)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    spread = get_spread(args.spread)
+    rng = np.random.default_rng(args.seed)
+
+    start = time.perf_counter()
+    draws = sample_spreads(spread, args.n, rng)
+    elapsed = time.perf_counter() - start
+    print(f"{args.n:,} x {spread.name} ({spread.size} cards): {elapsed:.2f}s, "
+          f"{args.n / elapsed:,.0f} spreads/s, {draws.nbytes / 2**20:.1f} MiB")
+
+    baseline_n = min(args.n, 200_000)
+    names = [FULL_DECK[i] for i in spread.pool]
+    start = time.perf_counter()
+    for _ in range(baseline_n):
+        random.sample(names, k=spread.size)
+    per_spread = (time.perf_counter() - start) / baseline_n
+    print(f"random.sample baseline: {1 / per_spread:,.0f} spreads/s")
+
+    sorted_rows = np.sort(draws, axis=1)
+    repeats = int(np.any(sorted_rows[:, 1:] == sorted_rows[:, :-1], axis=1).sum()) if spread.size > 1 else 0
+    print(f"spreads with a repeated card: {repeats}")
+
+    counts = position_counts(draws)[:, spread.pool]
+    expected = args.n / len(spread.pool)
+    chi2 = ((counts - expected) ** 2 / expected).sum(axis=1)
+    dof = len(spread.pool) - 1
+    # Wilson-Hilferty approximation of the chi-square 99.9th percentile
+    critical = dof * (1 - 2 / (9 * dof) + 3.09 * np.sqrt(2 / (9 * dof))) ** 3
+    for label, value in zip(spread.positions, chi2):
+        status = "ok" if value < critical else "SKEWED"
+        print(f"  position {label or '-':<18} chi2={value:8.1f} (dof {dof}, p<0.001 above {critical:.1f}) {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Latency and throughput of the translation backends.
+
+    python benchmarks/translation_backends.py [--backends google,marian] [-n 20] [--threads 4]
+
+For every language in TRANSLATION_OFFLINE_LANGS each backend translates a
+short question into English and a full reading back into the language, the
+two translations every non-English /ask needs. Reports model load time (first
+call), p50/p95 latency per translation, and readings per second with
+--threads concurrent callers. "echo" simulates a remote translator
+(--latency round trip plus --per-char cost) when Google is unreachable;
+"marian" needs transformers, torch and sentencepiece plus the opus-mt models
+(downloaded on first use).
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from initialize.config import TRANSLATION_OFFLINE_LANGS
+import utils.translation as tr
+
+QUESTIONS = {
+    "hi": "क्या मुझे इस साल नई नौकरी मिलेगी?",
+    "es": "¿Encontraré un nuevo trabajo este año?",
+    "fr": "Vais-je trouver un nouveau travail cette année ?",
+}
+READING = (
+    "The Three of Cups appears for you today. It speaks of friendship, celebration and "
+    "reunion with people who lift you up. In the coming weeks an invitation may arrive "
+    "that feels unexpected. Say yes to it.\n\n"
+    "The Star follows, a card of hope and renewal. Trust that the connections you nurture "
+    "now will carry you through the changes ahead. Let yourself enjoy the moment, and "
+    "remember that patience is part of the answer."
+)
+
+
+class EchoTranslator:
+    """
+    Offline stand-in: returns each text unchanged, optionally sleeping to
+    mimic a remote translator (a fixed round trip per call plus a
+    per-character cost). Lets the benchmark run without network access.
+    """
+    name = "echo"
+    sentence_batching = False
+
+    def __init__(self, latency_s: float = 0.0, latency_per_char: float = 0.0):
+        self.latency_s = latency_s
+        self.latency_per_char = latency_per_char
+
+    def supports(self, source: str, target: str) -> bool:
+        return True
+
+    def translate_batch(self, texts, source: str, target: str):
+        delay = self.latency_s + self.latency_per_char * sum(len(t) for t in texts)
+        if delay:
+            time.sleep(delay)
+        return list(texts)
+
+
+tr.TRANSLATORS[EchoTranslator.name] = EchoTranslator
+
+
+def one_reading(translator, lang: str) -> None:
+    tr.translate_text(QUESTIONS.get(lang, QUESTIONS["es"]), lang, "en", translator)
+    tr.translate_text(READING, "en", lang, translator)
+
+
+def measure(translator, langs, n: int, threads: int):
+    start = time.perf_counter()
+    for lang in langs:
+        one_reading(translator, lang)   # loads models for offline backends
+    load_s = time.perf_counter() - start
+
+    latencies = []
+    for _ in range(n):
+        for lang in langs:
+            t0 = time.perf_counter()
+            one_reading(translator, lang)
+            latencies.append(time.perf_counter() - t0)
+
+    jobs = [lang for _ in range(n) for lang in langs]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda lang: one_reading(translator, lang), jobs))
+    throughput = len(jobs) / (time.perf_counter() - start)
+    return load_s, np.array(latencies) * 1000, throughput
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backends", default="google,marian", help="comma-separated names from TRANSLATORS")
+    ap.add_argument("--langs", default=",".join(TRANSLATION_OFFLINE_LANGS))
+    ap.add_argument("-n", type=int, default=20, help="readings per language")
+    ap.add_argument("--threads", type=int, default=4)
+    ap.add_argument("--latency", type=float, default=0.25, help="simulated round trip per call (echo)")
+    ap.add_argument("--per-char", type=float, default=0.0002, help="simulated seconds per character (echo)")
+    args = ap.parse_args()
+    langs = args.langs.split(",")
+
+    print(f"{'backend':<8} {'first call s':>12} {'p50 ms':>8} {'p95 ms':>8} {'readings/s':>11}")
+    for name in args.backends.split(","):
+        translator = tr.TRANSLATORS[name]()
+        if name == "echo":
+            translator.latency_s = args.latency
+            translator.latency_per_char = args.per_char
+        try:
+            load_s, lat, throughput = measure(translator, langs, args.n, args.threads)
+        except Exception as e:
+            print(f"{name:<8} skipped: {type(e).__name__}: {e}")
+            continue
+        if name == "marian" and translator._failed:
+            pairs = ", ".join(f"{s}-{t}" for s, t in sorted(translator._failed))
+            print(f"{name:<8} note: fell back to Google for {pairs}")
+        print(f"{name:<8} {load_s:12.2f} {np.percentile(lat, 50):8.0f} {np.percentile(lat, 95):8.0f} "
+              f"{throughput:11.1f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
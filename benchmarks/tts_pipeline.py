@@ -0,0 +1,71 @@
+"""
+Time-to-first-audio for spoken replies: one-shot vs sentence-pipelined TTS.
+
+    python benchmarks/tts_pipeline.py [--latency 0.3] [--per-char 0.004] [--engine tone]
+
+"one-shot" synthesises the whole reply in a single engine call before
+playback (the old speak_response). "pipelined" is the current speak_response:
+sentences are synthesised in the worker pool and the first plays as soon as it
+is ready. The run is repeated to show the audio cache. By default the offline
+tone engine is used with a simulated round trip plus per-character cost, and
+playback is replaced by a sleep of each chunk's audio length so no sound
+device is needed.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import wave
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils.voice_assistant as va
+
+REPLY = (
+    "The Three of Cups appears for you today. It speaks of friendship, celebration and "
+    "reunion with people who lift you up. In the coming weeks an invitation may arrive "
+    "that feels unexpected. Say yes to it. Trust that the connections you nurture now "
+    "will carry you through the changes ahead, and let yourself enjoy the moment."
+)
+
+
+def fake_play(path: str) -> None:
+    # Sleep for the clip's duration instead of playing it
+    if path.endswith(".wav"):
+        with wave.open(path) as w:
+            time.sleep(w.getnframes() / w.getframerate())
+
+
+def one_shot(engine) -> float:
+    start = time.perf_counter()
+    engine.synthesize(" ".join(va.split_sentences(REPLY, max_chars=10**6)), "en")
+    return time.perf_counter() - start
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--engine", default="tone", choices=sorted(va.TTS_ENGINES))
+    ap.add_argument("--latency", type=float, default=0.3, help="simulated round trip per engine call (tone)")
+    ap.add_argument("--per-char", type=float, default=0.004, help="simulated seconds per character (tone)")
+    args = ap.parse_args()
+
+    engine = va.get_engine(args.engine)
+    if args.engine == "tone":
+        engine.latency_s = args.latency
+        engine.latency_per_char = args.per_char
+        engine.seconds_per_char = 0.005
+    va.TTS_CACHE_DIR = tempfile.mkdtemp(prefix="tts-bench-")
+
+    print(f"{len(va.split_sentences(REPLY))} chunks, engine={engine.name}")
+    print(f"one-shot            first audio after {one_shot(engine):.2f}s")
+    for label in ("pipelined (cold)", "pipelined (cached)"):
+        stats = va.speak_response(REPLY, engine=engine, play=fake_play)
+        print(f"{label:<19} first audio after {stats['first_audio_s']:.2f}s, "
+              f"total {stats['total_s']:.2f}s, cache hits {stats['cache_hits']}/{stats['chunks']}")
+    shutil.rmtree(va.TTS_CACHE_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Voice input without a microphone: replays WAV fixtures through VoiceListener.
+
+    python benchmarks/voice_input.py [--fixtures DIR] [--latency 0.8]
+
+Each fixture `NAME.wav` should have its transcript in `NAME.txt`; without
+--fixtures a few synthetic clips are generated. Compares the old serial turn
+(capture, then recognise, then capture the next) with the background
+listener, where recognition of one utterance overlaps capture of the next.
+Capture runs in real time (each clip takes its own length to "speak") and
+the transcript recognizer sleeps --latency seconds to stand in for a remote
+service.
+"""
+import argparse
+import glob
+import math
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+import wave
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.voice_assistant import TranscriptRecognizer, VoiceListener, WavFileSource
+
+QUESTIONS = [
+    "When will I find a new job",
+    "Will I pass my exam",
+    "What should I focus on this month",
+    "Why do I feel stuck",
+]
+
+
+def write_fixtures(directory: str, rate: int = 16000):
+    for i, text in enumerate(QUESTIONS):
+        base = os.path.join(directory, f"question{i}")
+        seconds = 0.08 * len(text.split())
+        frames = b"".join(
+            struct.pack("<h", int(6000 * math.sin(2 * math.pi * 300 * n / rate)))
+            for n in range(int(rate * seconds))
+        )
+        with wave.open(base + ".wav", "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(rate)
+            w.writeframes(frames)
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+def serial(paths, latency):
+    source = WavFileSource(paths, realtime=True)
+    backend = TranscriptRecognizer(latency_s=latency)
+    source.open()
+    start = time.perf_counter()
+    texts = []
+    for _ in paths:
+        texts.append(backend.recognize(source.capture()))
+    return texts, time.perf_counter() - start
+
+
+def background(paths, latency):
+    listener = VoiceListener(WavFileSource(paths, realtime=True), TranscriptRecognizer(latency_s=latency))
+    start = time.perf_counter()
+    listener.start()
+    texts = []
+    while True:
+        try:
+            texts.append(listener.get(timeout=30))
+        except EOFError:
+            break
+    elapsed = time.perf_counter() - start
+    listener.stop()
+    return texts, elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--fixtures", help="directory of NAME.wav + NAME.txt pairs")
+    ap.add_argument("--latency", type=float, default=0.8, help="simulated recognition latency (s)")
+    args = ap.parse_args()
+
+    tmp = None
+    directory = args.fixtures
+    if directory is None:
+        directory = tmp = tempfile.mkdtemp(prefix="voice-fixtures-")
+        write_fixtures(directory)
+    paths = sorted(glob.glob(os.path.join(directory, "*.wav")))
+
+    try:
+        expected, t_serial = serial(paths, args.latency)
+        got, t_background = background(paths, args.latency)
+        print(f"{len(paths)} utterances, recognition latency {args.latency:.2f}s")
+        print(f"serial      {t_serial:.2f}s")
+        print(f"background  {t_background:.2f}s")
+        print("transcripts match" if got == expected else f"MISMATCH: {got} != {expected}")
+    finally:
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Report resident (RSS) and proportional (PSS) memory per worker for the shared
+gunicorn setup and for plain `uvicorn --workers N`.
+
+    python benchmarks/worker_memory.py            # 1, 4 and 8 workers
+    python benchmarks/worker_memory.py 2 6        # custom worker counts
+
+Linux only: reads /proc/<pid>/smaps_rollup. The index must already be built
+(python -m initialize.build_db) or the first run will build it.
+"""
+import os
+import signal
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PORT = 8765
+
+
+def _children(pid: int) -> list[int]:
+    kids = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        path = f"/proc/{pid}/task/{task}/children"
+        with open(path) as f:
+            kids.extend(int(p) for p in f.read().split())
+    return kids
+
+
+def _mem_kb(pid: int) -> tuple[int, int]:
+    rss = pss = 0
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Rss:"):
+                rss = int(line.split()[1])
+            elif line.startswith("Pss:"):
+                pss = int(line.split()[1])
+    return rss, pss
+
+
+def _wait_for_workers(proc: subprocess.Popen, n: int, timeout: float = 600) -> list[int]:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        kids = _children(proc.pid)
+        if len(kids) >= n:
+            # Give each worker time to finish importing the app
+            time.sleep(15)
+            return _children(proc.pid)
+        time.sleep(1)
+    raise RuntimeError(f"workers did not start within {timeout}s")
+
+
+def measure(mode: str, n: int) -> None:
+    if mode == "gunicorn":
+        cmd = ["gunicorn", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{PORT}", "--workers", str(n), "api:app"]
+    else:
+        cmd = ["uvicorn", "api:app", "--port", str(PORT), "--workers", str(n)]
+    proc = subprocess.Popen(cmd, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        workers = _wait_for_workers(proc, n)
+        rows = [_mem_kb(pid) for pid in workers]
+        master_rss, master_pss = _mem_kb(proc.pid)
+        total_pss = master_pss + sum(p for _, p in rows)
+        avg_rss = sum(r for r, _ in rows) / len(rows)
+        avg_pss = sum(p for _, p in rows) / len(rows)
+        print(f"{mode:<9} {n:>3} workers | per worker RSS {avg_rss / 1024:8.1f} MiB"
+              f"  PSS {avg_pss / 1024:8.1f} MiB | total PSS {total_pss / 1024:8.1f} MiB")
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=60)
+
+
+if __name__ == "__main__":
+    counts = [int(a) for a in sys.argv[1:]] or [1, 4, 8]
+    for n in counts:
+        for mode in ("gunicorn", "uvicorn"):
+            measure(mode, n)
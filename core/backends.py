@@ -0,0 +1,172 @@
+# core/backends.py
+#
+# Retrieval backends behind core.rag. Pick one with VECTOR_BACKEND in
+# initialize/config.py:
+#   - "faiss":  FAISS index built from the PDFs (saved to INDEX_DIR)
+#   - "chroma": the prebuilt persistent Chroma store in CHROMA_DB_DIR, served
+#               as-is without re-ingesting the PDFs
+
+from abc import ABC, abstractmethod
+from typing import List, Optional
+from langdetect import detect
+from initialize.config import (
+    INDEX_DIR, VECTOR_BACKEND,
+    CHROMA_DB_DIR, CHROMA_COLLECTION, CHROMA_EMBED_MODEL,
+)
+from utils.context import ConversationContext
+from initialize.metrics import stage_timer
+from initialize.log import get_logger
+
+log = get_logger(__name__)
+
+
+class VectorBackend(ABC):
+    """
+    Interface every retrieval backend implements.
+    """
+    name = "base"
+
+    @abstractmethod
+    def ensure_ready(self) -> None:
+        """
+        Load (or build) whatever the backend needs before the first query.
+        """
+
+    @abstractmethod
+    def is_ready(self) -> bool:
+        ...
+
+    @abstractmethod
+    def retrieve(self,
+                 query: str,
+                 context: Optional[ConversationContext] = None,
+                 top_k: int = 3) -> List[str]:
+        ...
+
+    def retrieve_batch(self, queries: List[str], top_k: int = 3) -> List[List[str]]:
+        """
+        Default batch implementation; backends override it when they can
+        encode and search several queries at once.
+        """
+        return [self.retrieve(q, top_k=top_k) for q in queries]
+
+
+class FaissBackend(VectorBackend):
+    name = "faiss"
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", index_dir: str = INDEX_DIR):
+        from utils.pdf_reader import TarotPDFEmbedder
+
+        self.embedder = TarotPDFEmbedder(model_name=model_name)
+        self.index_dir = index_dir
+
+    def ensure_ready(self) -> None:
+        if self.embedder.index is not None:
+            return
+        if not self.embedder.load_index(self.index_dir):
+            self.embedder.build_vector_store()
+            self.embedder.save_index(self.index_dir)
+
+    def is_ready(self) -> bool:
+        return self.embedder.index is not None
+
+    def retrieve(self, query, context=None, top_k=3):
+        return self.embedder.retrieve(query, context=context, top_k=top_k)
+
+    def retrieve_batch(self, queries, top_k=3):
+        return self.embedder.retrieve_batch(queries, top_k=top_k)
+
+
+class ChromaBackend(VectorBackend):
+    """
+    Serves an existing persistent Chroma collection. The stored collection has
+    no embedding function attached, so queries are embedded here with the
+    model the store was built with (CHROMA_EMBED_MODEL). Each chunk's
+    language is kept in its metadata under "lang" (tagged once, the first
+    time the store is served), so language filtering happens inside the
+    query instead of running langdetect on every result.
+    """
+    name = "chroma"
+
+    def __init__(self,
+                 path: str = CHROMA_DB_DIR,
+                 collection_name: str = CHROMA_COLLECTION,
+                 model_name: str = CHROMA_EMBED_MODEL):
+        from sentence_transformers import SentenceTransformer
+
+        self.path = path
+        self.collection_name = collection_name
+        self.model = SentenceTransformer(model_name)
+        self.model.eval()
+        self.collection = None
+
+    def ensure_ready(self) -> None:
+        if self.collection is not None:
+            return
+        import chromadb
+
+        client = chromadb.PersistentClient(path=self.path)
+        collection = client.get_collection(self.collection_name)
+        tagged = self.tag_languages(collection)
+        self.collection = collection
+        log.info("serving Chroma collection", extra={"fields": {
+            "collection": self.collection_name, "chunks": collection.count(), "path": self.path,
+            "lang_tagged": tagged,
+        }})
+
+    @staticmethod
+    def tag_languages(collection, batch_size: int = 500) -> int:
+        """
+        Add a "lang" metadata entry to every chunk that lacks one. Returns the
+        number of chunks tagged (0 once the store is fully tagged).
+        """
+        stored = collection.get(include=["documents", "metadatas"])
+        ids, metadatas = [], []
+        for chunk_id, doc, meta in zip(stored["ids"], stored["documents"], stored["metadatas"]):
+            meta = dict(meta or {})
+            if "lang" in meta:
+                continue
+            try:
+                meta["lang"] = detect(doc)
+            except Exception:
+                meta["lang"] = "unknown"
+            ids.append(chunk_id)
+            metadatas.append(meta)
+        for start in range(0, len(ids), batch_size):
+            collection.update(ids=ids[start:start + batch_size], metadatas=metadatas[start:start + batch_size])
+        return len(ids)
+
+    def is_ready(self) -> bool:
+        return self.collection is not None
+
+    def retrieve(self, query, context=None, top_k=3):
+        where = {"lang": context.language} if context else None
+        return self._query([query], top_k, where)[0]
+
+    def retrieve_batch(self, queries, top_k=3):
+        return self._query(queries, top_k)
+
+    def _query(self, queries: List[str], top_k: int, where: Optional[dict] = None) -> List[List[str]]:
+        with stage_timer("embedding"):
+            embeddings = self.model.encode(queries).tolist()
+        # Reported under the same stage name as FAISS so dashboards compare directly
+        with stage_timer("faiss_search"):
+            result = self.collection.query(query_embeddings=embeddings, n_results=top_k, where=where)
+        return result.get("documents") or [[] for _ in queries]
+
+
+BACKENDS = {
+    FaissBackend.name: FaissBackend,
+    ChromaBackend.name: ChromaBackend,
+}
+
+
+def get_backend(name: str = VECTOR_BACKEND) -> VectorBackend:
+    """
+    Instantiate the configured backend. Only the selected backend's model and
+    client libraries are loaded.
+    """
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown VECTOR_BACKEND '{name}' (expected one of {sorted(BACKENDS)})")
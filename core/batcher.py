@@ -0,0 +1,95 @@
+# core/batcher.py
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List
+
+
+class EncodeBatcher:
+    """
+    Collects retrieval queries from concurrent callers and serves them with a
+    single encode + FAISS search.
+
+    The first query to arrive opens a batch; the batch is flushed once
+    `window_ms` has passed or `max_batch` queries have joined, whichever comes
+    first. Each caller blocks until its own slice of the results is ready.
+
+    Args:
+        retrieve_batch (Callable): Function taking (queries, top_k) and returning
+            one list of documents per query, e.g. TarotPDFEmbedder.retrieve_batch.
+        window_ms (float): Maximum time to hold a batch open.
+        max_batch (int): Maximum number of queries per forward pass.
+    """
+    def __init__(self,
+                 retrieve_batch: Callable[[List[str], int], List[List[str]]],
+                 window_ms: float = 3.0,
+                 max_batch: int = 32):
+        self._retrieve_batch = retrieve_batch
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._stats = {"batches": 0, "queries": 0, "max_batch_seen": 0}
+        self._pid = None
+
+    def _ensure_started(self) -> None:
+        # Threads do not survive fork, so the worker thread is started lazily
+        # in whichever process first uses the batcher (e.g. a gunicorn worker).
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue: "queue.Queue[tuple]" = queue.Queue()
+            thread = threading.Thread(target=self._run, args=(self._queue,), name="encode-batcher", daemon=True)
+            thread.start()
+            self._pid = os.getpid()
+
+    def retrieve(self, query: str, top_k: int = 3) -> List[str]:
+        """
+        Queue a query and block until its batch has been searched.
+        """
+        self._ensure_started()
+        fut: Future = Future()
+        self._queue.put((query, top_k, fut))
+        return fut.result()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            s = dict(self._stats)
+        s["avg_batch"] = s["queries"] / s["batches"] if s["batches"] else 0.0
+        return s
+
+    def _collect(self, q: "queue.Queue[tuple]") -> list:
+        batch = [q.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(q.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self, q: "queue.Queue[tuple]") -> None:
+        while True:
+            batch = self._collect(q)
+            queries = [q for q, _, _ in batch]
+            # One search at the largest k; smaller requests take a prefix
+            k = max(top_k for _, top_k, _ in batch)
+            try:
+                results = self._retrieve_batch(queries, k)
+            except Exception as e:
+                for _, _, fut in batch:
+                    fut.set_exception(e)
+                continue
+            for (_, top_k, fut), docs in zip(batch, results):
+                fut.set_result(docs[:top_k])
+            with self._lock:
+                self._stats["batches"] += 1
+                self._stats["queries"] += len(batch)
+                self._stats["max_batch_seen"] = max(self._stats["max_batch_seen"], len(batch))
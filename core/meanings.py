@@ -0,0 +1,102 @@
+# core/meanings.py
+#
+# Build-time distillation of each card's retrieved passages into a short,
+# size-capped meaning record. Prompts use these records instead of the raw
+# PDF chunks, which are long, noisy and inflate input tokens.
+
+import json
+import os
+import re
+from typing import Callable, Dict, List
+import numpy as np
+from initialize.config import INDEX_DIR, CARD_MEANINGS_FILE, MEANING_MAX_CHARS, MEANING_SOURCE_K
+from utils.deck import FULL_DECK
+from initialize.log import get_logger
+
+log = get_logger(__name__)
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+
+def _sentences(passages: List[str]) -> List[str]:
+    seen = set()
+    out = []
+    for passage in passages:
+        text = " ".join(passage.split())
+        for sentence in _SENTENCE_SPLIT.split(text):
+            sentence = sentence.strip()
+            key = sentence.lower()
+            if len(sentence) < 25 or key in seen:
+                continue
+            seen.add(key)
+            out.append(sentence)
+    return out
+
+
+def condense(card: str,
+             passages: List[str],
+             encode: Callable[[List[str]], np.ndarray],
+             max_chars: int = MEANING_MAX_CHARS) -> str:
+    """
+    Pick the sentences from `passages` that best describe `card` (embedding
+    similarity to the card name, with a boost for naming the card outright)
+    and join as many as fit in `max_chars`, best first. The result is never
+    longer than `max_chars`.
+    """
+    sentences = _sentences(passages)
+    if not sentences:
+        return ""
+
+    vectors = encode([card] + sentences)
+    vectors = vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-9)
+    scores = vectors[1:] @ vectors[0]
+    name = card.lower()
+    scores += np.array([0.2 if name in s.lower() else 0.0 for s in sentences])
+
+    order = np.argsort(-scores)
+    picked = []
+    length = 0
+    for i in order:
+        # A sentence that does not fit is skipped; a later, shorter one may
+        sentence = sentences[i]
+        added = len(sentence) + (1 if picked else 0)
+        if length + added > max_chars:
+            continue
+        picked.append(sentence)
+        length += added
+    if not picked:
+        # Even the shortest sentence is too long: cut the best one at a word
+        # boundary, leaving room for the ellipsis
+        head = sentences[order[0]][:max_chars - 1]
+        head = head.rsplit(" ", 1)[0] if " " in head else head
+        picked.append(head.rstrip() + "…")
+    return " ".join(picked)
+
+
+def build_card_meanings(retrieve_batch: Callable[[List[str], int], List[List[str]]],
+                        encode: Callable[[List[str]], np.ndarray],
+                        index_dir: str = INDEX_DIR) -> Dict[str, str]:
+    """
+    Distil a meaning record for every card in FULL_DECK and save them next to
+    the index.
+    """
+    passages = retrieve_batch(FULL_DECK, MEANING_SOURCE_K)
+    meanings = {card: condense(card, docs, encode) for card, docs in zip(FULL_DECK, passages)}
+    os.makedirs(index_dir, exist_ok=True)
+    with open(os.path.join(index_dir, CARD_MEANINGS_FILE), "w", encoding="utf-8") as f:
+        json.dump(meanings, f, ensure_ascii=False, indent=1)
+    log.info("card meanings condensed", extra={"fields": {
+        "cards": len(meanings), "max_chars": MEANING_MAX_CHARS, "file": CARD_MEANINGS_FILE,
+    }})
+    return meanings
+
+
+def load_card_meanings(index_dir: str = INDEX_DIR) -> Dict[str, str]:
+    """
+    Load the saved meaning records; empty if build_db has not produced them.
+    """
+    path = os.path.join(index_dir, CARD_MEANINGS_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
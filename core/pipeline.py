@@ -0,0 +1,248 @@
+# core/pipeline.py
+#
+# The one detect → translate → cache → intent → read → format → translate-back
+# flow shared by api.py, main.py and streamlit_app.py. Front ends only collect
+# the question and present the returned ReadingState.
+
+import datetime
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from core.tarot_reader import perform_reading
+from initialize import metrics
+from initialize.cache import add_cached, get_cached
+from initialize.singleflight import flight
+from utils.context import ConversationContext
+from utils.intent import classify_intent
+from utils.llm import record_calls
+from utils.translation import detect_and_translate, translate_back
+
+# LLM call sources that mean the reply is not a real answer (see utils/llm.py)
+DEGRADED_SOURCES = {"fallback", "partial"}
+
+FACTUAL_REPLY = "Sorry, I cannot provide factual information at the moment. Please ask a tarot-related question."
+
+
+def format_date(dt: datetime.date) -> str:
+    return f"{dt.strftime('%B')} {dt.day}, {dt.year}"
+
+
+def format_result(intent: str, result: Dict[str, Any]) -> str:
+    """
+    Render a reading result as the text shown to the user.
+    """
+    if intent == "factual":
+        return FACTUAL_REPLY
+    if intent == "conversation":
+        return result["interpretation"]
+    if intent == "timeline" and result.get("card"):
+        ds, de = result["date_range"]
+        return (
+            f"Card: {result['card']}\n"
+            f"Timeframe: {format_date(datetime.date.fromisoformat(ds))} – "
+            f"{format_date(datetime.date.fromisoformat(de))}\n\n"
+            f"{result['interpretation']}"
+        )
+    if cards := result.get("cards"):
+        return f"Cards Drawn: {', '.join(cards)}\n\n{result['interpretation']}"
+    return result["interpretation"]
+
+
+class ReadingState:
+    """
+    Everything one question produces on its way through the pipeline.
+
+    Attributes:
+        question (str): The question as the user asked it (also the cache key).
+        translated (str): The question in English.
+        detected_language (str): Language detected from the question.
+        intent (str): Classified (or cached) intent label.
+        result (Dict[str, Any]): The reading result dict.
+        from_cache (bool): True when the result came from the response cache.
+        coalesced (bool): True when the result was shared with an identical
+            question already in flight.
+        result_text (str): Formatted reply in English.
+        translated_result (Optional[str]): Reply translated back, if needed.
+        timing (Dict[str, float]): Seconds spent in each stage.
+        llm_calls (List[Dict[str, Any]]): Route, model, max_tokens, seconds
+            and source of each LLM call made for this question.
+    """
+    def __init__(self, question: str):
+        self.question = question
+        self.translated = question
+        self.detected_language = "en"
+        self.intent = "general"
+        self.result: Dict[str, Any] = {}
+        self.from_cache = False
+        self.coalesced = False
+        self.result_text = ""
+        self.translated_result: Optional[str] = None
+        self.timing: Dict[str, float] = {}
+        self.llm_calls: List[Dict[str, Any]] = []
+
+    @property
+    def error(self) -> Optional[str]:
+        return self.result.get("error")
+
+
+class ReadingPipeline:
+    """
+    Runs a question through every stage. Each stage is a pluggable callable;
+    `hooks` are called as hook(stage, seconds, state) after every stage, on
+    top of the timings always recorded in `state.timing`.
+
+    The caching policy lives here and only here: the response cache is keyed
+    on the original question, consulted before intent classification (so a
+    hit costs no LLM call), and filled once per set of identical in-flight
+    questions; across workers the first stored reading wins. Error results,
+    and degraded ones built from a fallback LLM reply, are never cached.
+    """
+    def __init__(self,
+                 detect_translate: Callable = detect_and_translate,
+                 classify: Callable[[str], str] = classify_intent,
+                 read: Callable = perform_reading,
+                 formatter: Callable[[str, Dict[str, Any]], str] = format_result,
+                 translate_back: Callable[[str, str], str] = translate_back,
+                 cache_get: Callable = get_cached,
+                 cache_add: Callable = add_cached,
+                 hooks: Optional[List[Callable]] = None):
+        self.detect_translate = detect_translate
+        self.classify = classify
+        self.read = read
+        self.formatter = formatter
+        self.translate_back = translate_back
+        self.cache_get = cache_get
+        self.cache_add = cache_add
+        self.hooks = list(hooks or [])
+
+    @contextmanager
+    def _stage(self, name: str, state: ReadingState):
+        t0 = time.time()
+        try:
+            yield
+        finally:
+            state.timing[name] = time.time() - t0
+            for hook in self.hooks:
+                hook(name, state.timing[name], state)
+
+    # Stage groups shared by the sync and async entry points
+
+    def _prepare(self, question: str) -> ReadingState:
+        state = ReadingState(question)
+        with self._stage("lang_detect_translate", state):
+            state.translated, state.detected_language = self.detect_translate(question, target_language='en')
+
+        cached = self.cache_get(question)
+        metrics.record_cache("response", bool(cached))
+        if cached:
+            state.result = cached
+            state.intent = cached.get("intent", "general")
+            state.from_cache = True
+            metrics.set_intent(state.intent)
+        return state
+
+    def _read_and_cache(self,
+                        state: ReadingState,
+                        history: List[Dict[str, Any]],
+                        on_token: Optional[Callable[[str], None]] = None):
+        t_start = time.time()
+        with record_calls() as calls:
+            with self._stage("intent_classification", state), metrics.stage_timer("intent"):
+                intent = self.classify(state.translated)
+            metrics.set_intent(intent)
+
+            with self._stage("prediction", state):
+                if on_token is not None:
+                    result = self.read(state.translated, intent, history, on_token=on_token)
+                else:
+                    result = self.read(state.translated, intent, history)
+        state.llm_calls = calls
+        state.timing['total'] = time.time() - t_start
+
+        if "error" in result:
+            metrics.record_error("reading")
+            return intent, result
+
+        result["intent"] = intent
+        if dr := result.get("date_range"):
+            result["date_range"] = [dr[0].isoformat(), dr[1].isoformat()]
+        if any(call["source"] in DEGRADED_SOURCES for call in calls):
+            # A canned or stale reply must not outlive the outage
+            result["degraded"] = True
+            return intent, result
+        # Another worker may have stored a reading for the same question
+        # first; every worker then answers with that one
+        result = self.cache_add(state.question, result)
+        return result.get("intent", intent), result
+
+    def _finish(self, state: ReadingState, context: ConversationContext, reply_language: Optional[str]):
+        context.add_entry(
+            question=state.question,
+            translated=state.translated,
+            intent=state.intent,
+            result=state.result
+        )
+        state.result_text = self.formatter(state.intent, state.result)
+
+        # Reply in the question's language, or else the user's preferred one
+        target = state.detected_language if state.detected_language != 'en' else (reply_language or 'en')
+        if target != 'en':
+            with self._stage("back_translation", state):
+                state.translated_result = self.translate_back(state.result_text, target)
+        return state
+
+    def _record_miss(self, state: ReadingState, outcome, leader: bool) -> None:
+        state.intent, state.result = outcome
+        state.coalesced = not leader
+        metrics.SINGLEFLIGHT.labels("leader" if leader else "coalesced").inc()
+
+    # Entry points
+
+    def run(self,
+            question: str,
+            context: ConversationContext,
+            reply_language: Optional[str] = None,
+            on_token: Optional[Callable[[str], None]] = None) -> ReadingState:
+        """
+        Answer `question` synchronously (CLI, Streamlit, batch scripts).
+        `on_token` receives the LLM reply piece by piece as it streams in
+        (only for the caller that actually runs the reading).
+        """
+        state = self._prepare(question)
+        if not state.from_cache:
+            history = context.get_history()
+            leader = []
+
+            def work():
+                leader.append(True)
+                return self._read_and_cache(state, history, on_token)
+
+            self._record_miss(state, flight.do(question, work), bool(leader))
+            if state.error:
+                return state
+        return self._finish(state, context, reply_language)
+
+    async def run_async(self,
+                        question: str,
+                        context: ConversationContext,
+                        offload: Callable[..., Awaitable[Any]],
+                        reply_language: Optional[str] = None) -> ReadingState:
+        """
+        Answer `question` from async code. Blocking stage groups are handed
+        to `offload(fn, *args)` (e.g. starlette's run_in_threadpool) so the
+        event loop stays free, and identical in-flight questions are coalesced
+        without holding a thread.
+        """
+        state = await offload(self._prepare, question)
+        if not state.from_cache:
+            history = context.get_history()
+            leader = []
+
+            async def work():
+                leader.append(True)
+                return await offload(self._read_and_cache, state, history)
+
+            self._record_miss(state, await flight.do_async(question, work), bool(leader))
+            if state.error:
+                return state
+        return await offload(self._finish, state, context, reply_language)
@@ -0,0 +1,77 @@
+# core/prompts.py
+#
+# Chat message lists for the reading prompts. Every prompt starts with the
+# same system message followed by the session's earlier turns, rendered
+# identically on every request, and only the last user message changes. Each
+# new turn therefore extends the previous prompt's prefix byte for byte, so
+# provider-side (or local server) prefix/KV caching can reuse it.
+
+from typing import Any, Dict, List, Optional
+
+Message = Dict[str, str]
+
+SYSTEM_PROMPT = """You are TarotTara, a friendly and empathic tarot reader.
+You remember the last few messages and speak in a warm, conversational tone.
+Feel free to ask clarifying questions or reference earlier points."""
+
+
+def history_messages(history: List[Dict[str, Any]]) -> List[Message]:
+    """
+    Convert the conversation history (entries with 'question' and 'result')
+    into alternating user/assistant messages. Each user message is the one
+    actually sent for that turn (result['user_message']: the English question
+    plus its card block), so every turn repeats the previous request's
+    messages exactly and only appends to them.
+    """
+    messages = []
+    for entry in history:
+        result = entry.get('result', {})
+        q = result.get('user_message') or entry.get('translated') or entry.get('question', '')
+        interp = result.get('interpretation', '')
+        # only include if both exist
+        if q:
+            messages.append({"role": "user", "content": q})
+        if interp:
+            messages.append({"role": "assistant", "content": interp})
+    return messages
+
+
+def _messages(history: List[Dict[str, Any]], user: str) -> List[Message]:
+    return (
+        [{"role": "system", "content": SYSTEM_PROMPT}]
+        + history_messages(history)
+        + [{"role": "user", "content": user}]
+    )
+
+
+def build_conversation_messages(question: str, history: List[Dict[str, Any]]) -> List[Message]:
+    return _messages(history, question)
+
+
+def build_timeline_messages(question: str,
+                            history: List[Dict[str, Any]],
+                            card: str,
+                            dr,
+                            meaning: str) -> List[Message]:
+    start_str = dr[0].strftime('%B %d, %Y')
+    end_str = dr[1].strftime('%B %d, %Y')
+    return _messages(history, f"""{question}
+
+You drew: {card}  ({start_str} – {end_str})
+Meaning: {meaning}""")
+
+
+def build_spread_messages(question: str,
+                          history: List[Dict[str, Any]],
+                          cards: List[str],
+                          meanings: List[str],
+                          positions: Optional[List[str]] = None) -> List[Message]:
+    positions = positions or [""] * len(cards)
+    lines = "\n".join(
+        f"{i}. {pos + ': ' if pos else ''}{card} — {meaning}"
+        for i, (pos, card, meaning) in enumerate(zip(positions, cards, meanings), start=1)
+    )
+    return _messages(history, f"""{question}
+
+Cards drawn:
+{lines}""")
@@ -6,24 +6,90 @@
 # def get_card_meaning(card_name: str, k: int = 3) -> str:
 #     results = _embedder.retrieve(card_name, top_k=k)
 #     return "\n\n".join(results)
-from utils.pdf_reader import TarotPDFEmbedder
-from initialize.config import VECTOR_DB_DIR, MODEL_NAME
+from initialize.config import (
+    ENCODE_BATCHING, ENCODE_BATCH_WINDOW_MS, ENCODE_MAX_BATCH,
+)
+from core.backends import get_backend
+from core.batcher import EncodeBatcher
+from core.meanings import load_card_meanings
+from utils.deck import FULL_DECK
+from typing import List
 
-# Initialize the embedder
-_embedder = TarotPDFEmbedder(model_name="all-MiniLM-L6-v2")
+# Initialize the configured retrieval backend (FAISS or persistent Chroma)
+_backend = get_backend()
+
+# Optional scheduler that merges concurrent retrievals into one forward pass
+_batcher = (
+    EncodeBatcher(_backend.retrieve_batch, ENCODE_BATCH_WINDOW_MS, ENCODE_MAX_BATCH)
+    if ENCODE_BATCHING else None
+)
+
+# Build-time condensed meaning per card (see core/meanings.py), also as a
+# table indexed by card ID
+_card_meanings = load_card_meanings()
+_meaning_table = [_card_meanings.get(card) for card in FULL_DECK]
+
+def ensure_index() -> None:
+    """
+    Load the retrieval backend's index (building it first if needed).
+    Called before forking workers so they all share the loaded copy.
+    """
+    _backend.ensure_ready()
 
 def get_card_meaning(card_name: str, k: int = 3) -> str:
-    # Ensure the FAISS index is built before retrieving
-    if _embedder.index is None:
+    # Ensure the index is loaded (or built) before retrieving
+    if not _backend.is_ready():
         try:
-            _embedder.build_vector_store()
+            ensure_index()
         except Exception as e:
             return f"⚠️ Failed to build vector index: {str(e)}"
 
     try:
-        results = _embedder.retrieve(card_name, top_k=k)
+        if _batcher is not None:
+            results = _batcher.retrieve(card_name, top_k=k)
+        else:
+            results = _backend.retrieve(card_name, top_k=k)
         if not results:
             return f"🤔 No relevant meanings found for {card_name}."
         return "\n\n".join(results)
     except Exception as e:
         return f"⚠️ Retrieval error for '{card_name}': {str(e)}"
+
+def get_card_summary(card_name: str) -> str:
+    """
+    Short, size-capped meaning for prompts. Uses the record distilled by
+    initialize/build_db.py, falling back to one retrieved passage.
+    """
+    summary = _card_meanings.get(card_name)
+    if summary:
+        return summary
+    return get_card_meaning(card_name, k=1)
+
+def get_card_summaries(card_ids) -> List[str]:
+    """
+    get_card_summary for a whole spread of card IDs. Meanings come from the
+    precomputed table; cards without a record share one batched retrieval,
+    so a 10-card spread costs at most the same single round trip as one card.
+    """
+    out = [_meaning_table[i] for i in card_ids]
+    missing = [n for n, summary in enumerate(out) if not summary]
+    if not missing:
+        return out
+
+    names = [FULL_DECK[card_ids[n]] for n in missing]
+    if not _backend.is_ready():
+        try:
+            ensure_index()
+        except Exception as e:
+            for n in missing:
+                out[n] = f"⚠️ Failed to build vector index: {str(e)}"
+            return out
+    try:
+        results = _backend.retrieve_batch(names, top_k=1)
+    except Exception as e:
+        for n, name in zip(missing, names):
+            out[n] = f"⚠️ Retrieval error for '{name}': {str(e)}"
+        return out
+    for n, name, passages in zip(missing, names, results):
+        out[n] = "\n\n".join(passages) if passages else f"🤔 No relevant meanings found for {name}."
+    return out
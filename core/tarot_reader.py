@@ -1,82 +1,72 @@
 # core/tarot_reader.py
 
-import random
-import datetime
 # from langchain_ollama import ChatOllama
 # from langchain_groq import ChatGroq
-import requests
-from os import getenv
-from initialize.config import MODEL_NAME
-from utils.deck import FULL_DECK, NUMERIC_CARDS, DATE_RANGES
-from core.rag import get_card_meaning
-from utils.factual import answer_factual
-from typing import List, Dict, Any
-
-
-def groq_invoke(prompt: str) -> str:
-    api_url = "https://api.groq.com/openai/v1/chat/completions"
-    api_key = getenv("GROQ_API_KEY")  # Or use os.getenv("GROQ_API_KEY")
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}"
-    }
-    data = {
-        "model": "llama-3.3-70b-versatile",
-        "messages": [
-            {"role": "user", "content": prompt}
-        ],
-        "max_tokens": 512,
-        "temperature": 0.7
-    }
-    response = requests.post(api_url, headers=headers, json=data)
-    response.raise_for_status()
-    return response.json()["choices"][0]["message"]["content"].strip()
-
-SYSTEM_PROMPT = """You are TarotTara, a friendly and empathic tarot reader.
-You remember the last few messages and speak in a warm, conversational tone.
-Feel free to ask clarifying questions or reference earlier points."""
-
-def _build_history_block(history: List[Dict[str, Any]]) -> str:
+from utils.deck import FULL_DECK, DATE_RANGE_TABLE, card_names
+from core.rag import get_card_summaries
+from core.spreads import draw, get_spread
+from core.prompts import (
+    Message, build_conversation_messages, build_spread_messages, build_timeline_messages,
+)
+from utils.llm import chat_completion, stream_chat_completion
+from typing import Callable, List, Dict, Any, Optional
+
+
+# Served when the LLM is unreachable and no cached reply exists
+FALLBACK_REPLY = (
+    "The cards are a little clouded right now and I can't finish your reading. "
+    "Please ask me again in a few minutes."
+)
+
+def groq_invoke(
+    messages: List[Message],
+    use_cache: bool = True,
+    on_token: Optional[Callable[[str], None]] = None,
+    route: Optional[str] = None
+) -> str:
     """
-    Convert the conversation history (list of entries with 'question' and 'result')
-    into a chat-like block:
-      User: <question>
-      Assistant: <interpretation>
+    Get the reading reply for a chat `messages` list (see core/prompts.py),
+    using the model and token budget of `route` (the question's intent, see
+    LLM_ROUTES). With `on_token`, the reply is streamed and each piece is
+    passed to on_token as it arrives; the full text is returned either way.
     """
-    lines = []
-    for entry in history:
-        q = entry.get('question', '')
-        interp = entry.get('result', {}).get('interpretation', '')
-        # only include if both exist
-        if q:
-            lines.append(f"User: {q}")
-        if interp:
-            lines.append(f"Assistant: {interp}")
-    return "\n".join(lines)
+    if on_token is None:
+        return chat_completion(
+            messages,
+            route=route,
+            use_cache=use_cache,
+            fallback=FALLBACK_REPLY,
+        )
+    parts = []
+    for piece in stream_chat_completion(messages, route=route,
+                                        use_cache=use_cache, fallback=FALLBACK_REPLY):
+        on_token(piece)
+        parts.append(piece)
+    return "".join(parts).strip()
 
 def perform_reading(
     question: str,
     intent: str,
-    history: List[Dict[str, Any]]
+    history: List[Dict[str, Any]],
+    on_token: Optional[Callable[[str], None]] = None,
+    get_meanings: Callable[[List[int]], List[str]] = get_card_summaries,
+    spread: Optional[str] = None
 ) -> Dict[str, Any]:
+    """
+    Answer `question` for its intent. Timeline questions draw one numbered
+    card with its timeframe; other readings lay out `spread` (default a
+    3-card spread, see core/spreads.py). All of a spread's meanings are
+    resolved in one get_meanings call. LLM-backed results carry
+    `user_message`, the exact last message sent, which later turns replay
+    as history (see core/prompts.py).
+    """
     try:
-        today = datetime.date.today()
-        today_str = today.strftime('%B %d, %Y')
-
-        # Serialize past turns
-        hist_block = _build_history_block(history)
-
         # 1) Conversational questions
         if intent == "conversation":
-            prompt = f"""{SYSTEM_PROMPT}
-
-{hist_block}
-
-User: "{question}"
-
-Assistant:"""
-            reply = groq_invoke(prompt)
-            return {"interpretation": reply, "card": None, "date_range": None}
+            messages = build_conversation_messages(question, history)
+            reply = groq_invoke(messages, on_token=on_token, route=intent)
+            return {"interpretation": reply, "card": None, "date_range": None,
+                    "user_message": messages[-1]["content"]}
 
         # 2) Factual questions: polite refusal
         if intent == "factual":
@@ -88,43 +78,26 @@ Assistant:"""
 
         # 3) Timeline readings
         if intent == "timeline":
-            card = random.choice(NUMERIC_CARDS)
-            dr = DATE_RANGES[card]
-            meaning = get_card_meaning(card)
-            start_str = dr[0].strftime('%B %d, %Y')
-            end_str   = dr[1].strftime('%B %d, %Y')
-
-            prompt = f"""{SYSTEM_PROMPT}
-
-{hist_block}
-
-User: "{question}"
-
-You drew: {card}  ({start_str} – {end_str})
-Meaning: {meaning}
-
-Assistant:"""
-            reply = groq_invoke(prompt)
-            return {"card": card, "date_range": dr, "interpretation": reply}
-
-        # 4) General 3-card spread (yes_no, guidance, insight, or general)
-        cards = random.sample(FULL_DECK, k=3)
-        meanings = [get_card_meaning(c, k=1) for c in cards]
-
-        prompt = f"""{SYSTEM_PROMPT}
-
-{hist_block}
-
-User: "{question}"
-
-Cards drawn:
-1. {cards[0]} — {meanings[0]}
-2. {cards[1]} — {meanings[1]}
-3. {cards[2]} — {meanings[2]}
-
-Assistant:"""
-        reply = groq_invoke(prompt)
-        return {"cards": cards, "interpretation": reply}
+            card_id = int(draw("timeline")[0])
+            card = FULL_DECK[card_id]
+            dr = DATE_RANGE_TABLE[card_id]
+            meaning = get_meanings([card_id])[0]
+            messages = build_timeline_messages(question, history, card, dr, meaning)
+            reply = groq_invoke(messages, on_token=on_token, route=intent)
+            return {"card": card, "date_range": dr, "interpretation": reply,
+                    "user_message": messages[-1]["content"]}
+
+        # 4) Card spread (yes_no, guidance, insight, or general)
+        layout = get_spread(spread or "three_card")
+        ids = draw(layout).tolist()
+        cards = card_names(ids)
+        meanings = get_meanings(ids)
+        messages = build_spread_messages(question, history, cards, meanings, list(layout.positions))
+        reply = groq_invoke(messages, on_token=on_token, route=intent)
+        result = {"cards": cards, "interpretation": reply, "user_message": messages[-1]["content"]}
+        if any(layout.positions):
+            result["positions"] = list(layout.positions)
+        return result
 
     except Exception as e:
         return {"error": str(e)}
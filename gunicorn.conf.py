@@ -0,0 +1,45 @@
+# gunicorn.conf.py
+#
+# Multi-worker serving with one shared copy of the embedding model, FAISS index
+# and paragraph text:
+#
+#   gunicorn -c gunicorn.conf.py api:app
+#
+# The app (and with it core.rag) is imported once in the master. The index is
+# loaded there before any worker forks, so every worker maps the same pages
+# copy-on-write instead of loading its own copy like `uvicorn --workers N` does.
+
+import gc
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8080")
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = 120
+
+
+def when_ready(server):
+    from core.rag import ensure_index
+
+    ensure_index()
+    # Move everything allocated so far into the permanent GC generation so the
+    # collector in each worker never writes to (and un-shares) those pages.
+    gc.freeze()
+    server.log.info("FAISS index and model loaded in master; forking %s workers", workers)
+
+
+def post_fork(server, worker):
+    # Torch's intra-op thread pool does not survive fork; give each worker a
+    # small fresh one rather than N workers each spawning one thread per core.
+    import torch
+
+    torch.set_num_threads(int(os.getenv("TORCH_THREADS", "1")))
+
+
+def child_exit(server, worker):
+    # Drop the exited worker's live gauges from the shared Prometheus files
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,126 @@
+# admission.py
+#
+# Concurrency limit with a bounded wait queue for the /ask endpoint. When the
+# worker is saturated, requests are turned away at once (429, queue full) or
+# after a bounded wait (503) with a Retry-After hint, instead of piling up
+# behind each other and timing out later.
+
+import asyncio
+import collections
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict
+from initialize import metrics
+
+
+class Rejected(Exception):
+    """
+    Raised when a request cannot be admitted. `status` is the HTTP status to
+    answer with and `retry_after` the suggested wait in whole seconds.
+    """
+    def __init__(self, status: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Admits at most `max_concurrent` requests at a time; up to `max_queue`
+    more wait in FIFO order for a slot, each for at most `queue_timeout`
+    seconds. Must be used from a single event loop (one per worker process).
+    """
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = collections.deque()
+        self._service_s = 1.0   # moving average of request time, for Retry-After
+        self._admitted = 0
+        self._rejected: Dict[str, int] = {"queue_full": 0, "queue_timeout": 0}
+
+    def retry_after(self) -> int:
+        """
+        Rough time until a newly queued request would get a slot.
+        """
+        rounds = (len(self._waiters) + 1) / max(self.max_concurrent, 1)
+        return max(1, min(60, math.ceil(rounds * self._service_s)))
+
+    def _reject(self, status: int, reason: str) -> Rejected:
+        self._rejected[reason] += 1
+        metrics.ADMISSION_REJECTED.labels(reason).inc()
+        return Rejected(status, reason, self.retry_after())
+
+    async def _acquire(self) -> None:
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject(429, "queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        metrics.ADMISSION_QUEUE.inc()
+        t0 = time.perf_counter()
+        admitted = False
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+            admitted = True
+        except asyncio.TimeoutError:
+            if waiter.done():
+                # The slot was handed over just as the wait timed out
+                admitted = True
+                return
+            waiter.cancel()
+            raise self._reject(503, "queue_timeout")
+        except asyncio.CancelledError:
+            # Client went away; pass on a slot we may already have been given
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            else:
+                waiter.cancel()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            metrics.ADMISSION_QUEUE.dec()
+            if admitted:
+                metrics.ADMISSION_WAIT.observe(time.perf_counter() - t0)
+
+    def _release(self) -> None:
+        # Hand the slot straight to the oldest live waiter, if any
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    @asynccontextmanager
+    async def admit(self):
+        """
+        Hold a slot for the duration of the block; raises Rejected when the
+        request cannot be admitted.
+        """
+        await self._acquire()
+        self._admitted += 1
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._service_s = 0.9 * self._service_s + 0.1 * (time.perf_counter() - t0)
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self._active,
+            "queued": len(self._waiters),
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "admitted": self._admitted,
+            "rejected": dict(self._rejected),
+            "avg_service_s": round(self._service_s, 3),
+        }
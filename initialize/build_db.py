@@ -1,8 +1,11 @@
 # build_db.py
 
 from utils.pdf_reader import TarotPDFEmbedder
+from initialize.config import INDEX_DIR
+from core.meanings import build_card_meanings
 
 if __name__ == "__main__":
     embedder = TarotPDFEmbedder()
     embedder.build_vector_store()
-   
\ No newline at end of file
+    embedder.save_index(INDEX_DIR)
+    build_card_meanings(embedder.retrieve_batch, embedder.model.encode, INDEX_DIR)
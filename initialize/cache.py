@@ -1,36 +1,187 @@
-# # cache.py
-# import redis, json
-# from initialize.config import REDIS_URL
+# cache.py
+#
+# Response cache used by core/pipeline.py. Pick the backend with
+# RESPONSE_CACHE in initialize/config.py:
+#   - "sqlite": on-disk SQLite file (WAL) shared by every worker and process
+#               on the host and kept across restarts and deploys
+#   - "redis":  a Redis server at REDIS_URL (needs the redis package); size
+#               is bounded by the server's maxmemory policy
+#   - "memory": per-process dict, lost on restart
+# Values are JSON-encoded; every backend supports TTLs, size-bounded eviction
+# and an atomic insert-if-absent (add) for get_or_set_cached.
 
-# # Connect, auto-decode strings
-# cache = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
 
-# def get_cached(question: str):
-#     key = question.lower().strip()
-#     raw = cache.get(key)
-#     return json.loads(raw) if raw else None
+from initialize.config import (
+    REDIS_URL, RESPONSE_CACHE, RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_PATH, RESPONSE_CACHE_TTL_S,
+)
+from initialize.sqlite_cache import SQLiteCache
 
-# def set_cached(question: str, data: dict, ttl: int = 86400):
-#     key = question.lower().strip()
-#     cache.set(key, json.dumps(data), ex=ttl)
-  
 
-import json
-import time
+class MemoryCache:
+    """
+    In-process LRU dict with TTLs, bounded by the total size of the values.
+    """
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._store: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def _live(self, key: str) -> Optional[str]:
+        entry = self._store.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            self._drop(key)
+            return None
+        self._store.move_to_end(key)
+        return value
+
+    def _drop(self, key: str) -> None:
+        value, _ = self._store.pop(key)
+        self._bytes -= len(value)
+
+    def _put(self, key: str, value: str, ttl: Optional[float]) -> None:
+        if key in self._store:
+            self._drop(key)
+        self._store[key] = (value, time.time() + ttl if ttl else None)
+        self._bytes += len(value)
+        while self._bytes > self.max_bytes and len(self._store) > 1:
+            self._drop(next(iter(self._store)))
 
-_cache_store = {}
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._live(key)
+            if value is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+            return value
 
-def get_cached(key):
-    entry = _cache_store.get(key)
-    if not entry:
-        return None
-    value, expires_at = entry
-    if expires_at is None or expires_at > time.time():
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._put(key, value, ttl)
+
+    def add(self, key: str, value: str, ttl: Optional[float] = None) -> str:
+        with self._lock:
+            existing = self._live(key)
+            if existing is not None:
+                return existing
+            self._put(key, value, ttl)
+            return value
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            hits, misses = self._hits, self._misses
+            entries, total = len(self._store), self._bytes
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": total,
+        }
+
+
+class RedisCache:
+    """
+    Shared cache on a Redis server. Keys are namespaced with `prefix`.
+    """
+    def __init__(self, url: str = REDIS_URL, prefix: str = "tarot:response:"):
+        import redis
+
+        # Connect, auto-decode strings
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(self.prefix + key)
+        with self._lock:
+            if value is None:
+                self._misses += 1
+            else:
+                self._hits += 1
         return value
-    else:
-        del _cache_store[key]
-        return None
 
-def set_cached(key, value, ttl=3600):
-    expires_at = time.time() + ttl if ttl else None
-    _cache_store[key] = (value, expires_at)
+    @staticmethod
+    def _px(ttl: Optional[float]) -> Optional[int]:
+        # Milliseconds, at least 1: Redis rejects an expiry of 0
+        return max(1, int(ttl * 1000)) if ttl else None
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        self.client.set(self.prefix + key, value, px=self._px(ttl))
+
+    def add(self, key: str, value: str, ttl: Optional[float] = None) -> str:
+        if self.client.set(self.prefix + key, value, px=self._px(ttl), nx=True):
+            return value
+        existing = self.client.get(self.prefix + key)
+        return existing if existing is not None else value
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            hits, misses = self._hits, self._misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "bytes": self.client.info("memory").get("used_memory", 0),
+        }
+
+
+def create_cache(name: str = RESPONSE_CACHE):
+    if name == "sqlite":
+        return SQLiteCache(RESPONSE_CACHE_PATH, RESPONSE_CACHE_MAX_BYTES)
+    if name == "redis":
+        return RedisCache()
+    if name == "memory":
+        return MemoryCache()
+    raise ValueError(f"Unknown RESPONSE_CACHE backend: {name!r}")
+
+
+_cache = create_cache()
+
+
+def get_cached(key: str) -> Optional[Any]:
+    raw = _cache.get(key)
+    return json.loads(raw) if raw is not None else None
+
+
+def set_cached(key: str, value: Any, ttl: Optional[float] = RESPONSE_CACHE_TTL_S) -> None:
+    _cache.set(key, json.dumps(value, default=str), ttl)
+
+
+def add_cached(key: str, value: Any, ttl: Optional[float] = RESPONSE_CACHE_TTL_S) -> Any:
+    """
+    Store `value` unless `key` already has a live entry, atomically across
+    workers, and return whichever value the cache holds afterwards.
+    """
+    return json.loads(_cache.add(key, json.dumps(value, default=str), ttl))
+
+
+def get_or_set_cached(key: str, factory: Callable[[], Any], ttl: Optional[float] = RESPONSE_CACHE_TTL_S) -> Any:
+    """
+    Return the cached value for `key`, or compute it with factory() and
+    store it unless another worker got there first; either way every caller
+    gets the value that ended up in the cache.
+    """
+    raw = _cache.get(key)
+    if raw is not None:
+        return json.loads(raw)
+    return add_cached(key, factory(), ttl)
+
+
+def cache_stats() -> Dict[str, float]:
+    return _cache.stats()
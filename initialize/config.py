@@ -1,4 +1,166 @@
+import json
+import os
+
 MODEL_NAME = "llama3"
 VECTOR_DB_DIR = "./tarot_vectordb"
 PDF_PATHS = ["1.pdf", "2.pdf","3.pdf","4.pdf","5.pdf","6.pdf","7.pdf"]
-#REDIS_URL     = "redis://localhost:6379/0"
\ No newline at end of file
+
+# Response cache behind get_cached/set_cached (initialize/cache.py):
+# "sqlite" (on-disk, shared by all workers on the host and kept across
+# deploys), "redis" (REDIS_URL, needs the redis package) or "memory"
+# (per process). Entries expire after RESPONSE_CACHE_TTL_S.
+RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "sqlite")
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", "./.cache/responses.sqlite3")
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RESPONSE_CACHE_TTL_S = float(os.getenv("RESPONSE_CACHE_TTL_S", "3600"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Saved FAISS index + paragraph blob, written by initialize/build_db.py and
+# loaded once per server (see gunicorn.conf.py for the shared-worker setup)
+INDEX_DIR = "./tarot_faiss"
+
+# Near-duplicate chunk removal during the index build (utils/dedup.py).
+# Chunks whose word-shingle Jaccard similarity reaches DEDUP_THRESHOLD
+# (found with MinHash/LSH) collapse into one, keeping every source PDF/page.
+# With DEDUP_EMBED_CHECK=1 a pair must also have embedding cosine similarity
+# of at least DEDUP_EMBED_THRESHOLD, so templated passages about different
+# cards are not merged.
+DEDUP_CHUNKS = os.getenv("DEDUP_CHUNKS", "1") == "1"
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+DEDUP_SHINGLE_WORDS = int(os.getenv("DEDUP_SHINGLE_WORDS", "3"))
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "128"))
+DEDUP_BANDS = int(os.getenv("DEDUP_BANDS", "32"))
+DEDUP_EMBED_CHECK = os.getenv("DEDUP_EMBED_CHECK", "0") == "1"
+DEDUP_EMBED_THRESHOLD = float(os.getenv("DEDUP_EMBED_THRESHOLD", "0.9"))
+
+# Micro-batching of concurrent query encodes (core/batcher.py). Off by default;
+# the window is how long the first caller waits for others to join its batch.
+ENCODE_BATCHING = os.getenv("ENCODE_BATCHING", "0") == "1"
+ENCODE_BATCH_WINDOW_MS = float(os.getenv("ENCODE_BATCH_WINDOW_MS", "3"))
+ENCODE_MAX_BATCH = int(os.getenv("ENCODE_MAX_BATCH", "32"))
+
+# Retrieval backend behind core.rag: "faiss" (built from PDF_PATHS) or
+# "chroma" (serve the prebuilt persistent store below without re-ingestion)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "faiss")
+CHROMA_DB_DIR = "./tarot_card_db"
+CHROMA_COLLECTION = "langchain"
+# The shipped collection stores 768-d vectors and no embedding function, so
+# queries must be embedded with a matching 768-d model
+CHROMA_EMBED_MODEL = os.getenv("CHROMA_EMBED_MODEL", "all-mpnet-base-v2")
+
+# Chat-completions endpoint and default model used by utils/llm.py
+LLM_API_URL = os.getenv("LLM_API_URL", "https://api.groq.com/openai/v1/chat/completions")
+LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
+LLM_FAST_MODEL = os.getenv("LLM_FAST_MODEL", "llama-3.1-8b-instant")
+
+# Per-intent model routing (utils/llm.py route()). "classification" is the
+# intent classifier itself; intents without an entry use "default". Short,
+# low-stakes calls go to the fast model, full readings to LLM_MODEL. Routes
+# can be overridden with JSON, e.g.
+#   LLM_ROUTES='{"yes_no": {"model": "llama-3.3-70b-versatile"}}'
+LLM_ROUTES = {
+    "classification": {"model": LLM_FAST_MODEL, "max_tokens": 10, "temperature": 0.0},
+    "conversation": {"model": LLM_FAST_MODEL, "max_tokens": 256, "temperature": 0.7},
+    "yes_no": {"model": LLM_FAST_MODEL, "max_tokens": 320, "temperature": 0.7},
+    "timeline": {"model": LLM_MODEL, "max_tokens": 512, "temperature": 0.7},
+    "guidance": {"model": LLM_MODEL, "max_tokens": 512, "temperature": 0.7},
+    "insight": {"model": LLM_MODEL, "max_tokens": 512, "temperature": 0.7},
+    "default": {"model": LLM_MODEL, "max_tokens": 512, "temperature": 0.7},
+}
+for _name, _override in json.loads(os.getenv("LLM_ROUTES", "{}")).items():
+    LLM_ROUTES[_name] = dict(LLM_ROUTES.get(_name, LLM_ROUTES["default"]), **_override)
+
+# Opt-in persistent completion cache (keyed by model, messages and sampling
+# parameters), shared between processes on the same host
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "0") == "1"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "./.cache/llm_completions.sqlite3")
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# LLM client resilience (utils/llm.py). The deadline bounds the whole call,
+# retries and hedges included.
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "3"))
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "30"))
+LLM_DEADLINE_S = float(os.getenv("LLM_DEADLINE_S", "45"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_BASE_S = float(os.getenv("LLM_BACKOFF_BASE_S", "0.25"))
+LLM_BACKOFF_MAX_S = float(os.getenv("LLM_BACKOFF_MAX_S", "4"))
+# Hedging: send a second copy once the first has run longer than the given
+# percentile of recent latencies (never sooner than the floor)
+LLM_HEDGE = os.getenv("LLM_HEDGE", "0") == "1"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_MIN_DELAY_S = float(os.getenv("LLM_HEDGE_MIN_DELAY_S", "0.5"))
+# Circuit breaker: open after N consecutive failed calls, probe again after
+# the reset timeout
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_RESET_S = float(os.getenv("LLM_BREAKER_RESET_S", "30"))
+
+# Per-request profiling (initialize/profiling.py):
+#   "off"    - nothing is sampled (default)
+#   "sample" - profile a random TAROT_PROFILE_RATE fraction of /ask requests
+#   "slow"   - profile every request but keep only those over TAROT_PROFILE_SLOW_MS
+# With TAROT_PROFILE_HEADER=1 a request can also ask for a profile by sending
+# "X-Tarot-Profile: 1".
+PROFILE_MODE = os.getenv("TAROT_PROFILE", "off")
+PROFILE_RATE = float(os.getenv("TAROT_PROFILE_RATE", "0.01"))
+PROFILE_SLOW_MS = float(os.getenv("TAROT_PROFILE_SLOW_MS", "2000"))
+PROFILE_HEADER = os.getenv("TAROT_PROFILE_HEADER", "0") == "1"
+PROFILE_DIR = os.getenv("TAROT_PROFILE_DIR", "./.cache/profiles")
+PROFILE_MAX_FILES = int(os.getenv("TAROT_PROFILE_MAX_FILES", "200"))
+PROFILE_INTERVAL_MS = float(os.getenv("TAROT_PROFILE_INTERVAL_MS", "5"))
+
+# Condensed per-card meanings distilled at build time (core/meanings.py) and
+# used in prompts instead of raw retrieved paragraphs
+CARD_MEANINGS_FILE = "card_meanings.json"
+MEANING_MAX_CHARS = int(os.getenv("MEANING_MAX_CHARS", "300"))
+MEANING_SOURCE_K = 5
+
+# Spoken replies (utils/voice_assistant.py). Sentences are synthesised in a
+# small worker pool and played in order as soon as each one is ready; audio is
+# cached on disk by content hash so repeated phrases are not synthesised again.
+# TTS_ENGINE: "gtts" (Google, online) or "tone" (offline stand-in for testing)
+TTS_ENGINE = os.getenv("TTS_ENGINE", "gtts")
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "4"))
+TTS_MAX_CHUNK_CHARS = int(os.getenv("TTS_MAX_CHUNK_CHARS", "200"))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "./.cache/tts")   # "" disables the cache
+TTS_CACHE_MAX_FILES = int(os.getenv("TTS_CACHE_MAX_FILES", "500"))
+TTS_PLAYER = os.getenv("TTS_PLAYER", "")   # overrides the engine's default player command
+
+# Voice input (utils/voice_assistant.py). The microphone is calibrated once
+# and utterances are captured on a background thread; recognition runs in a
+# small pool so the next utterance can be captured meanwhile.
+# VOICE_RECOGNIZER: "google" (online), "sphinx" (offline, needs pocketsphinx)
+# or "transcript" (reads a .txt next to each WAV fixture, for testing)
+VOICE_RECOGNIZER = os.getenv("VOICE_RECOGNIZER", "google")
+VOICE_RECOGNIZER_WORKERS = int(os.getenv("VOICE_RECOGNIZER_WORKERS", "2"))
+VOICE_CALIBRATE_S = float(os.getenv("VOICE_CALIBRATE_S", "1.0"))
+VOICE_PHRASE_LIMIT_S = float(os.getenv("VOICE_PHRASE_LIMIT_S", "15"))
+
+# Translation (utils/translation.py). TRANSLATOR: "google" (remote, via
+# deep_translator) or "marian" (offline Helsinki-NLP opus-mt models on CPU,
+# needs transformers + torch + sentencepiece). Offline models are loaded once
+# per language pair and translate sentences in batches; pairs outside
+# TRANSLATION_OFFLINE_LANGS fall back to Google.
+TRANSLATOR = os.getenv("TRANSLATOR", "google")
+TRANSLATION_OFFLINE_LANGS = tuple(os.getenv("TRANSLATION_OFFLINE_LANGS", "hi,es,fr").split(","))
+TRANSLATION_MODEL_TEMPLATE = os.getenv("TRANSLATION_MODEL_TEMPLATE", "Helsinki-NLP/opus-mt-{src}-{tgt}")
+TRANSLATION_BATCH_SIZE = int(os.getenv("TRANSLATION_BATCH_SIZE", "16"))
+TRANSLATION_NUM_BEAMS = int(os.getenv("TRANSLATION_NUM_BEAMS", "2"))
+
+# Admission control for /ask (initialize/admission.py). At most
+# ASK_MAX_CONCURRENT requests run at once per worker; up to ASK_MAX_QUEUE more
+# wait for a slot. A full queue is answered with 429 at once, and a request
+# that waits longer than ASK_QUEUE_TIMEOUT_S gets 503, both with Retry-After.
+# Blocking stages run on a dedicated pool of ASK_WORKER_THREADS threads.
+ASK_MAX_CONCURRENT = int(os.getenv("ASK_MAX_CONCURRENT", "8"))
+ASK_MAX_QUEUE = int(os.getenv("ASK_MAX_QUEUE", "32"))
+ASK_QUEUE_TIMEOUT_S = float(os.getenv("ASK_QUEUE_TIMEOUT_S", "5"))
+ASK_WORKER_THREADS = int(os.getenv("ASK_WORKER_THREADS", str(ASK_MAX_CONCURRENT)))
+
+# Logging (initialize/log.py). Records are queued and written to stderr by a
+# background thread; LOG_FORMAT is "json" or "text". Verbose payload logs
+# (request/response bodies) are DEBUG level and only a LOG_PAYLOAD_SAMPLE
+# fraction of them is kept. Secrets are redacted before anything is written.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+LOG_PAYLOAD_SAMPLE = float(os.getenv("LOG_PAYLOAD_SAMPLE", "0.01"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
@@ -0,0 +1,167 @@
+# log.py
+#
+# Structured, leveled logging that stays off the request thread. Loggers from
+# get_logger() hand records to a bounded in-memory queue; a background
+# listener thread redacts, formats and writes them. If the queue is full the
+# record is dropped (and counted) rather than blocking the caller.
+#
+#   log = get_logger(__name__)
+#   log.info("index loaded", extra={"fields": {"chunks": 1234}})
+#   log_payload(log, "llm request", body)     # sampled, DEBUG only
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from typing import Any, Dict
+from initialize.config import LOG_FORMAT, LOG_LEVEL, LOG_PAYLOAD_SAMPLE, LOG_QUEUE_SIZE
+
+_ROOT = "tarot"
+
+# Whole key names only, so fields like max_tokens or prompt_tokens stay readable
+_SECRET_KEY = re.compile(
+    r"(x[_-])?(authorization|api[_-]?key|((access|refresh|auth|bearer|id)[_-]?)?token|(client[_-])?secret|password)",
+    re.IGNORECASE,
+)
+_SECRET_TEXT = [
+    (re.compile(r"(?i)\bbearer\s+[A-Za-z0-9._~+/=-]+"), "Bearer [REDACTED]"),
+    (re.compile(r"\b(gsk|sk|hf)_[A-Za-z0-9]{8,}"), "[REDACTED]"),
+    (re.compile(r"\bsk-[A-Za-z0-9-]{8,}"), "[REDACTED]"),
+    (re.compile(r"(?i)(\b(?:api[_-]?key|(?:(?:access|refresh|auth|bearer|id)_)?token|password|secret)[\"']?\s*[:=]\s*[\"']?)[^\s\"',&}]+"),
+     r"\1[REDACTED]"),
+]
+
+
+def redact(value: Any) -> Any:
+    """
+    Copy of `value` with secrets masked: values under secret-looking keys and
+    bearer tokens / API keys inside strings.
+    """
+    if isinstance(value, dict):
+        return {k: "[REDACTED]" if isinstance(k, str) and _SECRET_KEY.fullmatch(k) else redact(v)
+                for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(v) for v in value]
+    if isinstance(value, str):
+        for pattern, repl in _SECRET_TEXT:
+            value = pattern.sub(repl, value)
+        return value
+    return value
+
+
+class _Formatter(logging.Formatter):
+    """
+    One line per record, as JSON or as `time level logger message k=v ...`.
+    Runs on the listener thread, so redaction and serialisation cost nothing
+    on the request path.
+    """
+    def __init__(self, fmt: str):
+        super().__init__()
+        self.json = fmt == "json"
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields: Dict[str, Any] = redact(getattr(record, "fields", None) or {})
+        message = redact(record.getMessage())
+        if record.exc_info:
+            fields["exc"] = redact(self.formatException(record.exc_info))
+        if self.json:
+            return json.dumps({
+                "ts": round(record.created, 3),
+                "level": record.levelname,
+                "logger": record.name,
+                "pid": record.process,
+                "msg": message,
+                **fields,
+            }, default=str, ensure_ascii=False)
+        ts = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record.created))
+        extra = " ".join(f"{k}={json.dumps(v, default=str, ensure_ascii=False)}" for k, v in fields.items())
+        return f"{ts} {record.levelname:<7} {record.name} {message}" + (f" {extra}" if extra else "")
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Non-blocking queue handler whose listener thread is started lazily in
+    each process (threads do not survive a fork under gunicorn).
+    """
+    def __init__(self, target: logging.Handler, maxsize: int):
+        super().__init__(queue.Queue(maxsize))
+        self.target = target
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_listener(self) -> None:
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self.queue = queue.Queue(self.maxsize)
+            self._listener = logging.handlers.QueueListener(self.queue, self.target)
+            self._listener.start()
+            self._pid = os.getpid()
+            atexit.register(self._listener.stop)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Same process: hand the record over unformatted, the listener formats it
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_handler = None
+_handler_lock = threading.Lock()
+
+
+def _configure() -> None:
+    global _handler
+    with _handler_lock:
+        if _handler is not None:
+            return
+        target = logging.StreamHandler(sys.stderr)
+        target.setFormatter(_Formatter(LOG_FORMAT))
+        _handler = _QueueHandler(target, LOG_QUEUE_SIZE)
+        root = logging.getLogger(_ROOT)
+        root.setLevel(LOG_LEVEL)
+        root.addHandler(_handler)
+        root.propagate = False
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Logger under the "tarot" namespace, routed through the queue handler.
+    """
+    if _handler is None:
+        _configure()
+    return logging.getLogger(f"{_ROOT}.{name}")
+
+
+def log_payload(logger: logging.Logger, message: str, payload: Any, **fields) -> None:
+    """
+    DEBUG-level log of a request/response body, kept for only a
+    LOG_PAYLOAD_SAMPLE fraction of calls. Skipped before any work is done
+    when DEBUG is off or the call is not sampled.
+    """
+    if not logger.isEnabledFor(logging.DEBUG) or random.random() >= LOG_PAYLOAD_SAMPLE:
+        return
+    logger.debug(message, extra={"fields": dict(fields, payload=payload)})
+
+
+def stats() -> Dict[str, Any]:
+    if _handler is None:
+        return {"queued": 0, "dropped": 0}
+    return {"queued": _handler.queue.qsize(), "dropped": _handler.dropped}
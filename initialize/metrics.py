@@ -0,0 +1,176 @@
+# metrics.py
+#
+# Prometheus metrics for the reading pipeline, served at GET /metrics.
+#
+# Stage timings are labelled with the request's intent. The intent is only
+# known after classification, so inside a request scope (`track_request`)
+# observations are buffered and flushed with the final intent label; outside
+# one (CLI scripts, the encode batcher thread) they are recorded immediately.
+
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+    generate_latest, multiprocess,
+)
+
+STAGES = (
+    "lang_detect", "translation", "intent", "embedding",
+    "faiss_search", "llm", "back_translation",
+)
+
+STAGE_SECONDS = Histogram(
+    "tarot_stage_seconds", "Latency of each pipeline stage",
+    ["stage", "intent"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+STAGE_ERRORS = Counter(
+    "tarot_stage_errors_total", "Errors raised by each pipeline stage", ["stage", "intent"],
+)
+CACHE_LOOKUPS = Counter(
+    "tarot_cache_lookups_total", "Cache lookups by cache and outcome", ["cache", "result"],
+)
+LLM_TOKENS = Counter(
+    "tarot_llm_tokens_total",
+    "LLM tokens reported by the provider (prompt, cached_prompt = prefix-cache hits, completion)",
+    ["kind", "intent"],
+)
+LLM_ROUTE_SECONDS = Histogram(
+    "tarot_llm_route_seconds", "Latency of answered LLM calls by route and model", ["route", "model"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30),
+)
+SINGLEFLIGHT = Counter(
+    "tarot_singleflight_total", "Cache misses by single-flight role (leader or coalesced)", ["role"],
+)
+IN_FLIGHT = Gauge(
+    "tarot_requests_in_flight", "Requests currently being served", multiprocess_mode="livesum",
+)
+ADMISSION_QUEUE = Gauge(
+    "tarot_admission_queue_depth", "Requests waiting for an /ask slot", multiprocess_mode="livesum",
+)
+ADMISSION_REJECTED = Counter(
+    "tarot_admission_rejected_total", "Requests turned away by admission control", ["reason"],
+)
+ADMISSION_WAIT = Histogram(
+    "tarot_admission_wait_seconds", "Time admitted requests spent queued for a slot",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+_request: ContextVar[Optional["_RequestMetrics"]] = ContextVar("tarot_request_metrics", default=None)
+
+
+class _RequestMetrics:
+    def __init__(self):
+        self.intent = "unknown"
+        self.timings: List[Tuple[str, float]] = []
+        self.errors: List[str] = []
+        self.tokens: Dict[str, int] = {}
+
+
+def set_intent(intent: str) -> None:
+    """
+    Label the current request's metrics with its classified intent.
+    """
+    req = _request.get()
+    if req is not None:
+        req.intent = intent
+
+
+@contextmanager
+def track_request():
+    """
+    Request scope: counts the request as in flight and flushes buffered stage
+    observations with the final intent label when it ends.
+    """
+    req = _RequestMetrics()
+    token = _request.set(req)
+    IN_FLIGHT.inc()
+    try:
+        yield req
+    finally:
+        IN_FLIGHT.dec()
+        _request.reset(token)
+        for stage, seconds in req.timings:
+            STAGE_SECONDS.labels(stage, req.intent).observe(seconds)
+        for stage in req.errors:
+            STAGE_ERRORS.labels(stage, req.intent).inc()
+        for kind, count in req.tokens.items():
+            LLM_TOKENS.labels(kind, req.intent).inc(count)
+
+
+@contextmanager
+def stage_timer(stage: str, timing: Optional[dict] = None):
+    """
+    Time a pipeline stage (and count it as an error if it raises). When a
+    `timing` dict is given the duration is also stored under `stage`.
+    """
+    req = _request.get()
+    t0 = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        record_error(stage)
+        raise
+    finally:
+        seconds = time.perf_counter() - t0
+        if timing is not None:
+            timing[stage] = seconds
+        if req is not None:
+            req.timings.append((stage, seconds))
+        else:
+            STAGE_SECONDS.labels(stage, "unknown").observe(seconds)
+
+
+def record_error(stage: str) -> None:
+    req = _request.get()
+    if req is not None:
+        req.errors.append(stage)
+    else:
+        STAGE_ERRORS.labels(stage, "unknown").inc()
+
+
+def usage_counts(usage: Optional[dict]) -> Dict[str, int]:
+    """
+    Prompt, prefix-cached prompt and completion tokens from an OpenAI-style
+    `usage` block (cached tokens are under prompt_tokens_details).
+    """
+    usage = usage or {}
+    return {
+        "prompt": usage.get("prompt_tokens") or 0,
+        "cached_prompt": (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0,
+        "completion": usage.get("completion_tokens") or 0,
+    }
+
+
+def record_tokens(usage: Optional[dict]) -> None:
+    """
+    Count prompt/cached/completion tokens from an OpenAI-style `usage` block.
+    """
+    if not usage:
+        return
+    req = _request.get()
+    for kind, count in usage_counts(usage).items():
+        if req is not None:
+            req.tokens[kind] = req.tokens.get(kind, 0) + count
+        else:
+            LLM_TOKENS.labels(kind, "unknown").inc(count)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def render() -> Tuple[bytes, str]:
+    """
+    Exposition payload and content type. Under gunicorn, set
+    PROMETHEUS_MULTIPROC_DIR so every worker's samples are aggregated.
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,167 @@
+# profiling.py
+#
+# Opt-in statistical profiler for individual requests. Stacks of the threads
+# working on a request are sampled every PROFILE_INTERVAL_MS and written in the
+# collapsed ("folded") stack format read by flamegraph.pl, inferno and
+# speedscope:
+#
+#   flamegraph.pl .cache/profiles/<file>.folded > reading.svg
+#
+# Only threads that join through attach() (the /ask worker pool) are sampled;
+# the event loop is shared by every in-flight request, so its stacks would mix
+# them all into one profile. With PROFILE_MODE="off" and no header override,
+# profile_request() is a single comparison and never starts a thread.
+
+import asyncio
+
+import functools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from initialize.config import (
+    PROFILE_MODE, PROFILE_RATE, PROFILE_SLOW_MS, PROFILE_HEADER,
+    PROFILE_DIR, PROFILE_MAX_FILES, PROFILE_INTERVAL_MS,
+)
+
+
+class StackSampler:
+    """
+    Samples the Python stacks of a set of threads on a background thread.
+    """
+    def __init__(self, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.interval = interval_ms / 1000.0
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._threads = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def add_thread(self, ident: int) -> None:
+        with self._lock:
+            self._threads.add(ident)
+
+    def remove_thread(self, ident: int) -> None:
+        with self._lock:
+            self._threads.discard(ident)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    @staticmethod
+    def _fold(frame) -> str:
+        parts = []
+        while frame is not None:
+            code = frame.f_code
+            parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        return ";".join(reversed(parts))
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                threads = list(self._threads)
+            for ident in threads:
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.stacks[self._fold(frame)] += 1
+                    self.samples += 1
+
+    def write_folded(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+_active: ContextVar[Optional[StackSampler]] = ContextVar("tarot_profiler", default=None)
+
+
+def _rotate(directory: str) -> None:
+    files = sorted(
+        (os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".folded")),
+        key=os.path.getmtime,
+    )
+    for path in files[:-PROFILE_MAX_FILES]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _finish(sampler: StackSampler, label: str, elapsed_ms: float, keep: bool) -> None:
+    # Blocking: joins the sampler thread and writes the profile
+    sampler.stop()
+    if keep and sampler.samples:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{label}-{elapsed_ms:.0f}ms.folded"
+        sampler.write_folded(os.path.join(PROFILE_DIR, name))
+        _rotate(PROFILE_DIR)
+
+
+@asynccontextmanager
+async def profile_request(label: str, requested: bool = False):
+    """
+    Profile the enclosed block according to PROFILE_MODE. `requested` is the
+    per-request header override, honoured only when PROFILE_HEADER is on.
+    Stopping the sampler and writing the profile run on the default executor,
+    not on the event loop.
+    """
+    forced = requested and PROFILE_HEADER
+    if PROFILE_MODE == "off" and not forced:
+        yield
+        return
+    if not forced and PROFILE_MODE == "sample" and random.random() >= PROFILE_RATE:
+        yield
+        return
+
+    sampler = StackSampler()
+    token = _active.set(sampler)
+    sampler.start()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        _active.reset(token)
+        keep = forced or PROFILE_MODE == "sample" or elapsed_ms >= PROFILE_SLOW_MS
+        await asyncio.get_running_loop().run_in_executor(None, _finish, sampler, label, elapsed_ms, keep)
+
+
+@contextmanager
+def attach():
+    """
+    Include the current thread in the active request profile, if any. Used by
+    work offloaded to a thread pool (the context variable travels with it).
+    """
+    sampler = _active.get()
+    if sampler is None:
+        yield
+        return
+    ident = threading.get_ident()
+    sampler.add_thread(ident)
+    try:
+        yield
+    finally:
+        sampler.remove_thread(ident)
+
+
+def attached(fn):
+    """
+    Wrap `fn` so that it runs inside `attach()` on whichever thread calls it.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with attach():
+            return fn(*args, **kwargs)
+    return wrapper
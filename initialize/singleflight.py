@@ -0,0 +1,116 @@
+# singleflight.py
+#
+# Coalesce identical in-flight requests: the first caller for a key does the
+# work and concurrent callers with the same key wait for its result instead of
+# repeating the intent + reading LLM calls.
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict
+
+
+# Result handed to async followers when their leader was cancelled
+_RETRY = object()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """
+    Per-key request coalescing for both synchronous (threaded) and asyncio
+    callers. The two paths keep separate in-flight tables because a thread
+    cannot await an asyncio future and vice versa.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._leaders = 0
+        self._coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn() unless a call for `key` is already in flight, in which case
+        block until that call finishes and return (or raise) its outcome.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._leaders += 1
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Async counterpart of `do`: fn is a coroutine function awaited only by
+        the first caller for `key`. If that caller is cancelled (its client
+        went away), the waiting callers are not: one of them takes over and
+        runs fn() again.
+        """
+        while True:
+            with self._lock:
+                fut = self._futures.get(key)
+                leader = fut is None
+                if leader:
+                    fut = self._futures[key] = asyncio.get_running_loop().create_future()
+                    self._leaders += 1
+                else:
+                    self._coalesced += 1
+
+            if not leader:
+                result = await asyncio.shield(fut)
+                if result is _RETRY:
+                    continue
+                return result
+
+            try:
+                result = await fn()
+                fut.set_result(result)
+                return result
+            except asyncio.CancelledError:
+                fut.set_result(_RETRY)
+                raise
+            except BaseException as e:
+                fut.set_exception(e)
+                # Mark retrieved so a call with no followers does not log a warning
+                fut.exception()
+                raise
+            finally:
+                with self._lock:
+                    del self._futures[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "leaders": self._leaders,
+                "coalesced": self._coalesced,
+                "in_flight": len(self._calls) + len(self._futures),
+            }
+
+
+# Shared instance used by the API, CLI and Streamlit front ends
+flight = SingleFlight()
@@ -0,0 +1,204 @@
+# sqlite_cache.py
+#
+# Small on-disk key/value cache shared by every process on the host.
+# SQLite in WAL mode lets readers run alongside one writer, so uvicorn
+# workers, Streamlit and CLI runs can all use the same file.
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+class SQLiteCache:
+    """
+    Persistent string cache with optional per-entry TTLs and size-based LRU
+    eviction.
+
+    Args:
+        path (str): SQLite file to use (created if missing).
+        max_bytes (int): Upper bound on the total size of stored values;
+            expired entries, then least recently used ones, are evicted past it.
+        touch_interval_s (float): A hit refreshes the entry's LRU timestamp
+            only if it is older than this, so most reads need no write lock.
+    """
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024, touch_interval_s: float = 60.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.touch_interval_s = touch_interval_s
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache (
+                    key      TEXT PRIMARY KEY,
+                    value    TEXT NOT NULL,
+                    size     INTEGER NOT NULL,
+                    accessed REAL NOT NULL,
+                    expires  REAL
+                )
+                """
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(cache)")}
+            if "expires" not in columns:
+                conn.execute("ALTER TABLE cache ADD COLUMN expires REAL")
+            # Running total of value sizes, kept by triggers so a write does
+            # not have to sum the whole table to decide whether to evict
+            for statement in (
+                "CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)",
+                "CREATE TABLE IF NOT EXISTS cache_size (id INTEGER PRIMARY KEY CHECK (id = 0), total INTEGER NOT NULL)",
+                "INSERT OR IGNORE INTO cache_size SELECT 0, COALESCE(SUM(size), 0) FROM cache",
+                """CREATE TRIGGER IF NOT EXISTS cache_size_insert AFTER INSERT ON cache
+                   BEGIN UPDATE cache_size SET total = total + NEW.size WHERE id = 0; END""",
+                """CREATE TRIGGER IF NOT EXISTS cache_size_delete AFTER DELETE ON cache
+                   BEGIN UPDATE cache_size SET total = total - OLD.size WHERE id = 0; END""",
+                """CREATE TRIGGER IF NOT EXISTS cache_size_update AFTER UPDATE OF size ON cache
+                   BEGIN UPDATE cache_size SET total = total - OLD.size + NEW.size WHERE id = 0; END""",
+            ):
+                conn.execute(statement)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread and per process (connections must not
+        # cross a fork)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+
+    def get(self, key: str) -> Optional[str]:
+        conn = self._conn()
+        row = conn.execute("SELECT value, accessed, expires FROM cache WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is None or (row[2] is not None and row[2] <= now):
+            # Expired rows are left for eviction (or the next set) to replace
+            self._count(False)
+            return None
+        self._count(True)
+        if now - row[1] > self.touch_interval_s:
+            conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        """
+        Store `value` under `key`, replacing any previous entry. `ttl` is in
+        seconds; None (or 0) keeps the entry until it is evicted.
+        """
+        conn = self._conn()
+        now = time.time()
+        conn.execute(
+            """
+            INSERT INTO cache (key, value, size, accessed, expires) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (key) DO UPDATE SET
+                value = excluded.value, size = excluded.size,
+                accessed = excluded.accessed, expires = excluded.expires
+            """,
+            (key, value, len(value.encode("utf-8")), now, now + ttl if ttl else None),
+        )
+        self._evict(conn)
+
+    def add(self, key: str, value: str, ttl: Optional[float] = None) -> str:
+        """
+        Store `value` only if `key` has no live entry, atomically across
+        processes. Returns the value that ends up stored: `value` if this
+        call won, otherwise the entry another writer stored first.
+        """
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                """
+                INSERT INTO cache (key, value, size, accessed, expires) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                    value = excluded.value, size = excluded.size,
+                    accessed = excluded.accessed, expires = excluded.expires
+                WHERE cache.expires IS NOT NULL AND cache.expires <= ?
+                """,
+                (key, value, len(value.encode("utf-8")), now, now + ttl if ttl else None, now),
+            )
+            stored = conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()[0]
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._evict(conn)
+        return stored
+
+    def get_or_set(self, key: str, factory: Callable[[], str], ttl: Optional[float] = None) -> str:
+        """
+        Return the live value for `key`, or compute it with factory() and
+        store it with add(). Concurrent misses in several processes may each
+        run factory(), but every caller gets back the same stored value.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        return self.add(key, factory(), ttl)
+
+    def delete(self, key: str) -> None:
+        self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT total FROM cache_size WHERE id = 0").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Trim to 90% so we do not evict again on the very next insert
+        target = int(self.max_bytes * 0.9)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?", (time.time(),))
+            total = conn.execute("SELECT total FROM cache_size WHERE id = 0").fetchone()[0]
+            while total > target:
+                rows = conn.execute("SELECT key, size FROM cache ORDER BY accessed LIMIT 256").fetchall()
+                if not rows:
+                    break
+                for key, size in rows:
+                    if total <= target:
+                        break
+                    conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    total -= size
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Hit/miss counters for this process plus the current on-disk footprint.
+        """
+        conn = self._conn()
+        entries = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        total = conn.execute("SELECT total FROM cache_size WHERE id = 0").fetchone()[0]
+        with self._lock:
+            hits, misses = self._hits, self._misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": total,
+        }
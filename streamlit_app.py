@@ -1,17 +1,67 @@
 import streamlit as st
-import datetime
+import functools
 import time
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from langdetect import detect
-from deep_translator import GoogleTranslator
-from utils.intent import classify_intent
-from core.tarot_reader import perform_reading
-from initialize.cache import get_cached, set_cached
+from core.pipeline import ReadingPipeline
 from utils.context import create_context
 
+_rerun_started = time.perf_counter()
+
+# Must be the first Streamlit call of every run
 st.set_page_config(page_title="TarotTara - Your Magical Guide", layout="centered")
+
+
+class _NotCached(Exception):
+    """
+    Carries a result out of an st.cache_data function without caching it
+    (Streamlit never memoises a call that raised).
+    """
+    def __init__(self, value):
+        super().__init__()
+        self.value = value
+
+
+@st.cache_resource(show_spinner="Loading the tarot index...")
+def load_pipeline() -> ReadingPipeline:
+    """
+    Build the reading pipeline once per server process. Streamlit re-executes
+    this script on every interaction; without this the index and the
+    embedding model would be reloaded on each rerun.
+    """
+    from core.rag import ensure_index, get_card_summaries
+    from core.tarot_reader import perform_reading
+    from utils.translation import detect_and_translate, translate_back
+
+    ensure_index()
+
+    # Pure lookups are memoised across reruns and sessions
+    cached_detect = st.cache_data(ttl=3600, show_spinner=False)(detect_and_translate)
+    cached_back = st.cache_data(ttl=3600, show_spinner=False)(translate_back)
+
+    @st.cache_data(ttl=3600, show_spinner=False)
+    def _summaries(card_ids):
+        summaries = get_card_summaries(card_ids)
+        if any(s.startswith("⚠️") for s in summaries):
+            raise _NotCached(summaries)   # index or retrieval error: retry next time
+        return summaries
+
+    def cached_meanings(card_ids):
+        try:
+            return _summaries(card_ids)
+        except _NotCached as e:
+            return e.value
+
+    return ReadingPipeline(
+        detect_translate=cached_detect,
+        translate_back=cached_back,
+        read=functools.partial(perform_reading, get_meanings=cached_meanings),
+    )
+
+
+pipeline = load_pipeline()
+
 st.title("🔮 TarotTara – Your Magical Tarot Guide")
 
 # Session state for storing user info and context
@@ -23,6 +73,8 @@ if "context" not in st.session_state:
     st.session_state.context = create_context(language=st.session_state.language)
 if "farewell" not in st.session_state:
     st.session_state.farewell = False
+if "rerun_timings" not in st.session_state:
+    st.session_state.rerun_timings = []
 
 # Sidebar: User Info
 with st.sidebar:
@@ -53,22 +105,6 @@ with st.sidebar:
         st.session_state.context = create_context(language=language)
         st.success("User info saved successfully!")
 
-def format_date(dt: datetime.date) -> str:
-    return f"{dt.strftime('%B')} {dt.day}, {dt.year}"
-
-def detect_and_translate(input_text: str, target_language='en'):
-    detected_language = detect(input_text)
-    if detected_language != target_language:
-        translator = GoogleTranslator(source='auto', target=target_language)
-        return translator.translate(input_text), detected_language
-    return input_text, detected_language
-
-def translate_back(result_text: str, target_language: str):
-    if target_language == 'en':
-        return result_text
-    translator = GoogleTranslator(source='en', target=target_language)
-    return translator.translate(result_text)
-
 # Main app input section
 st.subheader("🧘 Ask your question (type 'exit' to quit)")
 input_method = st.radio("Choose input method", ["Type"], horizontal=True)
@@ -83,69 +119,52 @@ if not st.session_state.farewell:
             st.session_state.farewell = True
             st.success("🌙 Farewell. Trust the journey ahead. 👋 Goodbye!")
         else:
-            with st.spinner("Analyzing your question..."):
-                detected_lang = detect(question)
-                translated_question, detected_lang = detect_and_translate(question, target_language='en')
+            st.markdown("### 🔍 TarotTara says:")
+            reply_box = st.empty()
+            streamed = []
 
-                t0 = time.time()
-                intent = classify_intent(translated_question)
-                intent_duration = time.time() - t0
+            def show_token(piece: str):
+                # Render the reading as it is generated instead of after the full reply
+                streamed.append(piece)
+                reply_box.markdown("".join(streamed))
 
-                cached = get_cached(question)
-                if cached:
-                    st.info("🧠 Serving from Redis cache!")
-                    result = cached
-                else:
-                    t1 = time.time()
-                    result = perform_reading(translated_question, intent, st.session_state.context.get_history())
-                    prediction_duration = time.time() - t1
-                    result["intent"] = intent
-                    if dr := result.get("date_range"):
-                        result["date_range"] = [dr[0].isoformat(), dr[1].isoformat()]
-                    set_cached(question, result)
-                st.session_state.context.add_entry(
-                    question=question,
-                    translated=translated_question,
-                    intent=intent,
-                    result=result
+            with st.spinner("Analyzing your question..."):
+                state = pipeline.run(
+                    question,
+                    st.session_state.context,
+                    reply_language=st.session_state.language,
+                    on_token=show_token,
                 )
+                if state.from_cache:
+                    st.info("🧠 Serving from Redis cache!")
 
-                # Build result_text
-                if intent == "factual":
-                    result_text = "Sorry, I cannot provide factual information at the moment. Please ask a tarot-related question."
-                elif intent == "conversation":
-                    result_text = result["interpretation"]
-                elif intent == "timeline" and result.get("card"):
-                    card = result["card"]
-                    ds, de = result["date_range"]
-                    ds_dt = datetime.date.fromisoformat(ds)
-                    de_dt = datetime.date.fromisoformat(de)
-                    result_text = (
-                        f"Card: {card}\n"
-                        f"Timeframe: {format_date(ds_dt)} – {format_date(de_dt)}\n\n"
-                        f"{result['interpretation']}"
-                    )
+                if state.error:
+                    reply_box.empty()
+                    st.error(f"⚠️ Error: {state.error}")
                 else:
-                    if cards := result.get("cards"):
-                        result_text = f"Cards Drawn: {', '.join(cards)}\n\n{result['interpretation']}"
-                    else:
-                        result_text = result["interpretation"]
-
-                # Display
-                st.markdown("### 🔍 TarotTara says:")
-                st.write(result_text)
-
-                # Translate back if needed
-                user_lang = st.session_state.language
-                if detected_lang != 'en':
-                    back = translate_back(result_text, detected_lang)
-                    st.write(f"**Result in {detected_lang}:**\n{back}")
-                elif user_lang != 'en':
-                    back = translate_back(result_text, user_lang)
-                    st.write(f"**Result in {user_lang}:**\n{back}")
-
-                st.markdown(f"⏱️ **Intent classification:** {intent_duration:.2f}s")
-                if not cached:
-                    st.markdown(f"⏱️ **Prediction (LLM + RAG):** {prediction_duration:.2f}s")
+                    # Final formatted reply replaces the raw stream
+                    reply_box.markdown(state.result_text)
+
+                    # Translated reply (question language, else preferred language)
+                    if state.translated_result is not None:
+                        back_lang = state.detected_language if state.detected_language != 'en' else st.session_state.language
+                        st.write(f"**Result in {back_lang}:**\n{state.translated_result}")
+
+                if not state.from_cache and not state.coalesced:
+                    st.markdown(f"⏱️ **Intent classification:** {state.timing['intent_classification']:.2f}s")
+                    st.markdown(f"⏱️ **Prediction (LLM + RAG):** {state.timing['prediction']:.2f}s")
+                    for call in state.llm_calls:
+                        st.caption(f"🤖 {call['route']} → {call['model']} "
+                                   f"(max {call['max_tokens']} tokens, {call['source']}) {call['seconds']:.2f}s")
 else:
-    st.success("🌙 Farewell. Trust the journey ahead. 👋 Goodbye!") 
\ No newline at end of file
+    st.success("🌙 Farewell. Trust the journey ahead. 👋 Goodbye!")
+
+# Script rerun time, to spot interactions that reload more than they should
+timings = st.session_state.rerun_timings
+timings.append(time.perf_counter() - _rerun_started)
+del timings[:-50]
+with st.sidebar:
+    st.caption(
+        f"⏱️ Last rerun: {timings[-1] * 1000:.0f} ms · "
+        f"average of {len(timings)}: {sum(timings) / len(timings) * 1000:.0f} ms"
+    ) 
\ No newline at end of file
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_llm_server import MockLLMServer
+
+
+@pytest.fixture
+def mock_llm(monkeypatch):
+    """
+    The fault-injecting mock LLM server from benchmarks/, with utils.llm
+    pointed at it, no retries and a fresh circuit breaker.
+    """
+    import utils.llm as llm
+
+    srv = MockLLMServer(latency_ms=0, jitter_ms=0).start()
+    monkeypatch.setattr(llm, "LLM_API_URL", srv.url)
+    monkeypatch.setattr(llm, "LLM_MAX_RETRIES", 0)
+    monkeypatch.setattr(llm, "_completion_cache", None)
+    monkeypatch.setattr(llm, "breaker", llm.CircuitBreaker(threshold=1, reset_timeout=0))
+    yield srv
+    srv.stop()
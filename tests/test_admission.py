@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+
+from initialize import metrics
+from initialize.admission import AdmissionController, Rejected
+
+
+class Recorder:
+    def __init__(self):
+        self.values = []
+
+    def observe(self, value):
+        self.values.append(value)
+
+
+def test_wait_observed_only_for_admitted_requests(monkeypatch):
+    wait = Recorder()
+    monkeypatch.setattr(metrics, "ADMISSION_WAIT", wait)
+    admission = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=0.05)
+
+    async def scenario():
+        async with admission.admit():
+            with pytest.raises(Rejected) as timed_out:
+                async with admission.admit():
+                    pass
+            assert timed_out.value.status == 503
+
+        async def hold():
+            async with admission.admit():
+                await asyncio.sleep(0.01)
+
+        async def queued():
+            await asyncio.sleep(0)
+            async with admission.admit():
+                pass
+
+        await asyncio.gather(hold(), queued())
+
+    asyncio.run(scenario())
+    assert len(wait.values) == 1
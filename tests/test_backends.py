@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from core.backends import ChromaBackend, VectorBackend, get_backend
+from utils.context import create_context
+
+
+class EchoBackend(VectorBackend):
+    name = "echo"
+
+    def ensure_ready(self):
+        pass
+
+    def is_ready(self):
+        return True
+
+    def retrieve(self, query, context=None, top_k=3):
+        return [query] * top_k
+
+
+def test_backend_must_implement_interface():
+    class Partial(VectorBackend):
+        def ensure_ready(self):
+            pass
+
+    with pytest.raises(TypeError):
+        VectorBackend()
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_default_retrieve_batch_uses_retrieve():
+    assert EchoBackend().retrieve_batch(["a", "b"], top_k=2) == [["a", "a"], ["b", "b"]]
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        get_backend("nope")
+
+
+class FakeCollection:
+    """
+    In-memory stand-in for a Chroma collection: get/update/query with
+    equality `where` filters on metadata.
+    """
+    def __init__(self, docs, metadatas):
+        self.ids = [f"id{i}" for i in range(len(docs))]
+        self.docs = list(docs)
+        self.metadatas = list(metadatas)
+        self.updates = 0
+
+    def get(self, include=None):
+        return {"ids": self.ids, "documents": self.docs, "metadatas": self.metadatas}
+
+    def update(self, ids, metadatas):
+        self.updates += 1
+        for chunk_id, meta in zip(ids, metadatas):
+            self.metadatas[self.ids.index(chunk_id)] = meta
+
+    def query(self, query_embeddings, n_results, where=None):
+        hits = [d for d, m in zip(self.docs, self.metadatas)
+                if not where or all(m.get(k) == v for k, v in where.items())]
+        return {"documents": [hits[:n_results] for _ in query_embeddings]}
+
+
+class StubModel:
+    def encode(self, texts):
+        return np.zeros((len(texts), 2))
+
+
+def chroma_backend(collection):
+    backend = ChromaBackend.__new__(ChromaBackend)
+    backend.model = StubModel()
+    backend.collection = collection
+    return backend
+
+
+def test_chroma_tags_languages_once():
+    collection = FakeCollection(
+        ["The Star is a card of hope, renewal and quiet faith in the future.",
+         "La Estrella es una carta de esperanza, renovación y fe en el futuro.",
+         "Already tagged"],
+        [{"source": "a.pdf"}, None, {"lang": "en"}],
+    )
+    assert ChromaBackend.tag_languages(collection) == 2
+    assert [m["lang"] for m in collection.metadatas] == ["en", "es", "en"]
+    assert collection.metadatas[0]["source"] == "a.pdf"
+    assert ChromaBackend.tag_languages(collection) == 0
+
+
+def test_chroma_filters_language_in_the_query():
+    collection = FakeCollection(["hope", "esperanza", "espoir"],
+                                [{"lang": "en"}, {"lang": "es"}, {"lang": "fr"}])
+    backend = chroma_backend(collection)
+    assert backend.retrieve("q", context=create_context(language="es"), top_k=3) == ["esperanza"]
+    assert backend.retrieve("q", top_k=2) == ["hope", "esperanza"]
+    assert backend.retrieve_batch(["a", "b"], top_k=1) == [["hope"], ["hope"]]
@@ -0,0 +1,82 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core.batcher import EncodeBatcher
+
+
+class StubRetriever:
+    """
+    retrieve_batch stand-in: records each batch and returns
+    ["<query>-0", "<query>-1", ...] with k documents per query.
+    """
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+
+    def __call__(self, queries, k):
+        self.batches.append((list(queries), k))
+        if self.error:
+            raise self.error
+        return [[f"{q}-{i}" for i in range(k)] for q in queries]
+
+
+def run_concurrently(fn, args):
+    barrier = threading.Barrier(len(args))
+
+    def call(arg):
+        barrier.wait()
+        return fn(*arg)
+
+    with ThreadPoolExecutor(max_workers=len(args)) as pool:
+        futures = [pool.submit(call, arg) for arg in args]
+        return [f.result(timeout=5) for f in futures]
+
+
+def test_full_batch_flushes_before_the_window():
+    stub = StubRetriever()
+    batcher = EncodeBatcher(stub, window_ms=5000, max_batch=4)
+    t0 = time.monotonic()
+    results = run_concurrently(batcher.retrieve, [(f"q{i}", 2) for i in range(4)])
+    assert time.monotonic() - t0 < 2
+    assert results == [[f"q{i}-0", f"q{i}-1"] for i in range(4)]
+    assert len(stub.batches) == 1 and sorted(stub.batches[0][0]) == ["q0", "q1", "q2", "q3"]
+
+
+def test_window_flushes_a_partial_batch():
+    stub = StubRetriever()
+    batcher = EncodeBatcher(stub, window_ms=20, max_batch=32)
+    t0 = time.monotonic()
+    assert batcher.retrieve("alone", top_k=1) == ["alone-0"]
+    assert time.monotonic() - t0 >= 0.015
+    assert stub.batches == [(["alone"], 1)]
+    assert batcher.stats()["batches"] == 1
+
+
+def test_each_caller_gets_its_own_slice_at_its_own_top_k():
+    stub = StubRetriever()
+    batcher = EncodeBatcher(stub, window_ms=200, max_batch=3)
+    results = run_concurrently(batcher.retrieve, [("a", 1), ("b", 3), ("c", 2)])
+    assert results == [["a-0"], ["b-0", "b-1", "b-2"], ["c-0", "c-1"]]
+    assert [k for _, k in stub.batches] == [3]
+
+
+def test_error_reaches_every_caller_in_the_batch():
+    stub = StubRetriever(error=RuntimeError("index gone"))
+    batcher = EncodeBatcher(stub, window_ms=200, max_batch=3)
+    barrier = threading.Barrier(3)
+
+    def call(query):
+        barrier.wait()
+        with pytest.raises(RuntimeError, match="index gone"):
+            batcher.retrieve(query)
+        return True
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        assert all(pool.map(call, ["a", "b", "c"]))
+    assert len(stub.batches) == 1
+    # The worker survives the failure
+    stub.error = None
+    assert batcher.retrieve("d", top_k=1) == ["d-0"]
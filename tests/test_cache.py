@@ -0,0 +1,61 @@
+import sys
+import time
+import types
+
+import pytest
+
+from initialize.cache import MemoryCache, RedisCache
+
+
+class FakeRedis:
+    """
+    The slice of redis.Redis that RedisCache uses, with Redis's validation
+    of expiry arguments.
+    """
+    def __init__(self):
+        self.store = {}
+
+    def _live(self, name):
+        value, expires = self.store.get(name, (None, None))
+        if expires is not None and expires <= time.time():
+            self.store.pop(name)
+            return None
+        return value
+
+    def set(self, name, value, ex=None, px=None, nx=False):
+        if (ex is not None and ex <= 0) or (px is not None and px <= 0):
+            raise ValueError("invalid expire time in 'set' command")
+        if nx and self._live(name) is not None:
+            return None
+        ttl = ex if ex is not None else (px / 1000 if px is not None else None)
+        self.store[name] = (value, time.time() + ttl if ttl else None)
+        return True
+
+    def get(self, name):
+        return self._live(name)
+
+
+@pytest.fixture
+def redis_cache(monkeypatch):
+    client = FakeRedis()
+    fake = types.SimpleNamespace(Redis=types.SimpleNamespace(from_url=lambda url, **kw: client))
+    monkeypatch.setitem(sys.modules, "redis", fake)
+    return RedisCache("redis://test")
+
+
+def test_redis_accepts_sub_second_ttl(redis_cache):
+    redis_cache.set("short", "v", ttl=0.05)
+    assert redis_cache.get("short") == "v"
+    time.sleep(0.06)
+    assert redis_cache.get("short") is None
+    assert redis_cache.add("short", "again", ttl=0.2) == "again"
+    assert redis_cache.add("short", "later", ttl=0.2) == "again"
+
+
+def test_memory_ttl_and_add():
+    cache = MemoryCache()
+    cache.set("short", "v", ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("short") is None
+    assert cache.add("short", "first") == "first"
+    assert cache.add("short", "second") == "first"
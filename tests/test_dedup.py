@@ -0,0 +1,48 @@
+import numpy as np
+
+from utils.dedup import find_duplicates, jaccard, shingles
+
+STAR = ("The Star is a card of hope and renewal. After the upheaval of the Tower it promises calm, "
+        "healing and a quiet faith that the future will be kinder than the past.")
+MOON = ("The Moon speaks of illusion and intuition. Paths are unclear at night, so trust your "
+        "instincts and wait for daylight before making a decision you cannot undo.")
+TOWER = ("The Tower brings sudden change that clears away false structures. It is unsettling, "
+         "yet what falls was never built to last and the ground is cleared for something true.")
+
+
+def test_shingles_fold_case_and_digits():
+    assert shingles("Page 12 of The STAR") == shingles("page 47 of the star")
+    assert shingles("two words") == {"two words"}
+    assert shingles("") == set()
+
+
+def test_near_duplicates_are_grouped_and_distinct_chunks_kept():
+    texts = [
+        STAR,
+        MOON,
+        STAR + " Page 12",                                       # footer: digits folded
+        STAR.replace("the past", "the present") + " Page 13",  # last word changed
+        TOWER,
+        MOON.upper(),                                            # case only
+    ]
+    assert jaccard(shingles(texts[0]), shingles(texts[3])) >= 0.8
+    result = find_duplicates(texts, threshold=0.8)
+
+    groups = sorted(sorted(ids) for ids in result.members.values())
+    assert groups == [[0, 2, 3], [1, 5], [4]]
+    # Each cluster keeps its longest chunk, the earliest on ties
+    assert result.keep == [1, 3, 4]
+    report = result.report(texts)
+    assert report["chunks_before"] == 6 and report["chunks_after"] == 3 and report["clusters"] == 2
+
+
+def test_threshold_separates_related_but_different_chunks():
+    half = STAR.split(". ")[0] + ". " + MOON
+    assert find_duplicates([STAR, half], threshold=0.8).keep == [0, 1]
+
+
+def test_embedding_check_vetoes_a_textual_match():
+    texts = [STAR, STAR + " Page 12"]
+    assert find_duplicates(texts).keep == [1]
+    orthogonal = np.array([[1.0, 0.0], [0.0, 1.0]], dtype=np.float32)
+    assert find_duplicates(texts, embeddings=orthogonal).keep == [0, 1]
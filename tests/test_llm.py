@@ -0,0 +1,62 @@
+import pytest
+import requests
+
+import utils.llm as llm
+
+MESSAGES = [{"role": "user", "content": "Will I find a new job?"}]
+
+
+def test_fallback_reply_is_reported_as_fallback(mock_llm):
+    mock_llm.config["error_rate"] = 1.0
+    with llm.record_calls() as calls:
+        reply = llm.chat_completion(MESSAGES, fallback="canned")
+    assert reply == "canned"
+    assert [c["source"] for c in calls] == ["fallback"]
+
+
+def test_malformed_reply_counts_as_failure(mock_llm):
+    mock_llm.config["malformed_rate"] = 1.0
+    with pytest.raises(KeyError):
+        llm.chat_completion(MESSAGES)
+    assert llm.breaker.state == "open"
+
+
+def test_malformed_reply_does_not_close_half_open_breaker(mock_llm):
+    llm.breaker.record_failure()   # open; reset_timeout=0 lets the next call probe
+    mock_llm.config["malformed_rate"] = 1.0
+    with pytest.raises(KeyError):
+        llm.chat_completion(MESSAGES)
+    assert llm.breaker.state == "open"
+
+
+def test_client_error_leaves_breaker_state_alone(mock_llm):
+    llm.breaker.record_failure()
+    mock_llm.config["client_error_rate"] = 1.0
+    with pytest.raises(requests.HTTPError):
+        llm.chat_completion(MESSAGES)
+    assert llm.breaker.state == "half_open"
+    mock_llm.config["client_error_rate"] = 0.0
+    assert llm.chat_completion(MESSAGES) == mock_llm.config["reply"]
+    assert llm.breaker.state == "closed"
+
+
+def test_stream_decodes_utf8_without_charset(mock_llm):
+    mock_llm.config["reply"] = "Le chemin — l’été arrive, नमस्ते"
+    assert "".join(llm.stream_chat_completion(MESSAGES)) == mock_llm.config["reply"]
+
+
+def test_stream_cut_off_is_reported_as_partial(mock_llm):
+    mock_llm.config["reply"] = "one two three four five"
+    mock_llm.config["stream_cut_after"] = 2
+    with llm.record_calls() as calls:
+        pieces = list(llm.stream_chat_completion(MESSAGES, fallback="canned"))
+    assert "".join(pieces) == "one two"
+    assert [c["source"] for c in calls] == ["partial"]
+    assert llm.breaker.state == "open"
+
+
+def test_stream_client_error_is_raised(mock_llm):
+    mock_llm.config["client_error_rate"] = 1.0
+    with pytest.raises(requests.HTTPError):
+        list(llm.stream_chat_completion(MESSAGES, fallback="canned"))
+    assert llm.breaker.state == "closed"
@@ -0,0 +1,31 @@
+from initialize.log import redact
+
+
+def test_redacts_secret_keys_only():
+    payload = {
+        "Authorization": "Bearer abc",
+        "api_key": "k",
+        "access_token": "t",
+        "token": "t",
+        "password": "p",
+        "max_tokens": 10,
+        "prompt_tokens": 5,
+        "tokenizer": "bpe",
+    }
+    assert redact(payload) == {
+        "Authorization": "[REDACTED]",
+        "api_key": "[REDACTED]",
+        "access_token": "[REDACTED]",
+        "token": "[REDACTED]",
+        "password": "[REDACTED]",
+        "max_tokens": 10,
+        "prompt_tokens": 5,
+        "tokenizer": "bpe",
+    }
+
+
+def test_redacts_secrets_inside_strings():
+    assert redact("url?token=abc123&max_tokens=10") == "url?token=[REDACTED]&max_tokens=10"
+    assert redact("header Bearer gsk_abcdefgh1234") == "header Bearer [REDACTED]"
+    assert redact({"messages": [{"content": "api_key: sk-12345678abc"}]}) == \
+        {"messages": [{"content": "api_key: [REDACTED]"}]}
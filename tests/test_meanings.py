@@ -0,0 +1,35 @@
+import numpy as np
+
+from core.meanings import condense
+
+
+def encode_by_rank(ranking):
+    """
+    Fake encoder: the card name is [1, 0]; a sentence scores higher the
+    earlier it appears in `ranking`.
+    """
+    def encode(texts):
+        rows = [[1.0, 0.0]]
+        for text in texts[1:]:
+            score = 1.0 - ranking.index(text) / len(ranking)
+            rows.append([score, np.sqrt(max(0.0, 1 - score ** 2))])
+        return np.array(rows)
+    return encode
+
+
+def test_condense_skips_a_long_sentence_for_shorter_ones():
+    long = "This sentence about hope and renewal is far too long to fit in the budget at all."
+    short1 = "Hope returns after a long and dark night."
+    short2 = "Rest now and let yourself heal slowly."
+    summary = condense("Card", [" ".join([long, short1, short2])],
+                       encode_by_rank([long, short1, short2]), max_chars=80)
+    assert summary == f"{short1} {short2}"
+    assert len(summary) <= 80
+
+
+def test_condense_truncates_within_max_chars():
+    sentence = "Every word of this single sentence is needed but there are far too many of them."
+    summary = condense("Card", [sentence], encode_by_rank([sentence]), max_chars=40)
+    assert summary.endswith("…")
+    assert len(summary) <= 40
+    assert sentence.startswith(summary[:-1])
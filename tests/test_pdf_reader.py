@@ -0,0 +1,74 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pdfplumber")
+pytest.importorskip("sentence_transformers")
+import faiss  # noqa: E402
+
+from utils import pdf_reader  # noqa: E402
+
+
+class StubModel:
+    def eval(self):
+        return self
+
+
+@pytest.fixture
+def embedder(monkeypatch):
+    """
+    Five chunks: three mention The Star (two English, one Spanish), one
+    mentions The Moon (English), one is general (English).
+    """
+    monkeypatch.setattr(pdf_reader, "SentenceTransformer", lambda name: StubModel())
+    e = pdf_reader.TarotPDFEmbedder()
+    e.paragraphs = ["star en 1", "star en 2", "estrella es", "moon en", "general en"]
+    e.index = faiss.IndexFlatL2(4)
+    e.index.add(np.random.default_rng(0).random((5, 4), dtype=np.float32))
+    e.card_index = {"The Star": [0, 1, 2], "The Moon": [3]}
+    e._set_languages(["en", "en", "es", "en", "en"])
+    return e
+
+
+QUERY = np.full((1, 4), 0.5, dtype=np.float32)
+
+
+def search(e, query, language=None, top_k=5):
+    return e._search([query], QUERY, top_k, language)[0]
+
+
+def test_card_query_searches_only_its_chunks(embedder):
+    ids = search(embedder, "The Star")
+    assert sorted(ids) == [0, 1, 2]   # fewer than top_k: the subset is small
+
+
+def test_card_and_language_intersect(embedder):
+    assert search(embedder, "the star", language="es") == [2]
+
+
+def test_empty_card_subset_falls_back_to_language(embedder):
+    assert search(embedder, "The Moon", language="es") == [2]
+
+
+def test_language_without_chunks_returns_nothing(embedder):
+    assert search(embedder, "The Star", language="fr") == []
+    assert search(embedder, "what lies ahead", language="fr") == []
+
+
+def test_unrestricted_query_uses_whole_index(embedder):
+    assert len(search(embedder, "what lies ahead", top_k=5)) == 5
+
+
+def test_selectors_are_built_once_across_threads(embedder):
+    barrier = threading.Barrier(8)
+
+    def selector(_):
+        barrier.wait()
+        return embedder._selector("The Star", "en")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        selectors = list(pool.map(selector, range(8)))
+    assert all(s is selectors[0] for s in selectors)
+    assert selectors[0][1] == 2
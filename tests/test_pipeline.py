@@ -0,0 +1,136 @@
+import sys
+import types
+
+import pytest
+
+import utils.llm as llm
+from utils.context import create_context
+
+
+@pytest.fixture(scope="module")
+def pipeline_module():
+    """
+    core.pipeline without the retrieval stack: core.tarot_reader loads the
+    index and embedding model at import, and these tests pass their own
+    `read`, so a placeholder stands in for it while core.pipeline imports.
+    """
+    if "core.pipeline" in sys.modules:
+        yield sys.modules["core.pipeline"]
+        return
+    saved = sys.modules.get("core.tarot_reader")
+    placeholder = types.ModuleType("core.tarot_reader")
+    placeholder.perform_reading = None
+    sys.modules["core.tarot_reader"] = placeholder
+    try:
+        import core.pipeline as module
+    finally:
+        if saved is None:
+            sys.modules.pop("core.tarot_reader", None)
+        else:
+            sys.modules["core.tarot_reader"] = saved
+    yield module
+    sys.modules.pop("core.pipeline", None)
+
+
+class Store:
+    """
+    Response cache stand-in with first-writer-wins `add`.
+    """
+    def __init__(self, **entries):
+        self.entries = dict(entries)
+        self.adds = []
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def add(self, key, value):
+        self.adds.append(key)
+        return self.entries.setdefault(key, value)
+
+
+def read(question, intent, history, on_token=None):
+    messages = [{"role": "user", "content": question}]
+    if on_token is not None:
+        reply = "".join(llm.stream_chat_completion(messages, fallback="canned"))
+    else:
+        reply = llm.chat_completion(messages, fallback="canned")
+    return {"interpretation": reply, "cards": ["The Star"], "date_range": None}
+
+
+def make_pipeline(module, store, language="en", translated_back=None, read_fn=read):
+    def translate_back(text, target):
+        translated_back.append(target)
+        return f"[{target}] {text}"
+
+    return module.ReadingPipeline(
+        detect_translate=lambda q, target_language: (q, language),
+        classify=lambda q: "guidance",
+        read=read_fn,
+        translate_back=translate_back,
+        cache_get=store.get,
+        cache_add=store.add,
+    )
+
+
+def test_llm_reading_is_cached(pipeline_module, mock_llm):
+    store = Store()
+    state = make_pipeline(pipeline_module, store).run("Will I travel?", create_context())
+    assert state.result["interpretation"] == mock_llm.config["reply"]
+    assert store.adds == ["Will I travel?"]
+    assert [c["source"] for c in state.llm_calls] == ["llm"]
+
+    again = make_pipeline(pipeline_module, store).run("Will I travel?", create_context())
+    assert again.from_cache and store.adds == ["Will I travel?"]
+
+
+def test_first_stored_reading_wins(pipeline_module, mock_llm):
+    stored = {"interpretation": "from another worker", "cards": ["The Moon"], "intent": "insight"}
+    store = Store()
+    pipeline = make_pipeline(pipeline_module, store)
+    store.get = lambda key: None   # the other worker stores it after our lookup
+    store.entries["Will I travel?"] = stored
+    state = pipeline.run("Will I travel?", create_context())
+    assert state.result == stored
+    assert state.intent == "insight"
+
+
+def test_fallback_reading_is_not_cached(pipeline_module, mock_llm):
+    mock_llm.config["error_rate"] = 1.0
+    store = Store()
+    state = make_pipeline(pipeline_module, store).run("Will I travel?", create_context())
+    assert state.result["interpretation"] == "canned"
+    assert state.result["degraded"] is True
+    assert store.adds == []
+
+
+def test_cut_off_stream_is_not_cached(pipeline_module, mock_llm):
+    mock_llm.config["reply"] = "one two three four"
+    mock_llm.config["stream_cut_after"] = 2
+    store = Store()
+    tokens = []
+    state = make_pipeline(pipeline_module, store).run("Will I travel?", create_context(), on_token=tokens.append)
+    assert state.result["interpretation"] == "one two"
+    assert state.result["degraded"] is True
+    assert store.adds == []
+
+
+def test_error_result_is_not_cached(pipeline_module):
+    store = Store()
+    pipeline = make_pipeline(pipeline_module, store, read_fn=lambda q, i, h: {"error": "no index"})
+    state = pipeline.run("Will I travel?", create_context())
+    assert state.error == "no index"
+    assert store.adds == []
+
+
+@pytest.mark.parametrize("detected, preferred, expected", [
+    ("es", None, ["es"]),    # reply in the question's language
+    ("es", "fr", ["es"]),
+    ("en", "fr", ["fr"]),    # English question: the user's preferred language
+    ("en", None, []),
+])
+def test_reply_language(pipeline_module, mock_llm, detected, preferred, expected):
+    targets = []
+    pipeline = make_pipeline(pipeline_module, Store(), language=detected, translated_back=targets)
+    state = pipeline.run("Will I travel?", create_context(), reply_language=preferred)
+    assert targets == expected
+    assert (state.translated_result is None) == (not expected)
@@ -0,0 +1,43 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+
+from initialize import profiling
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_profile_samples_only_attached_threads(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_MODE", "sample")
+    monkeypatch.setattr(profiling, "PROFILE_RATE", 1.0)
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+
+    async def request():
+        async with profiling.profile_request("test"):
+            _busy(0.05)   # on the event loop: must not be sampled
+            ctx = contextvars.copy_context()
+            await asyncio.get_running_loop().run_in_executor(None, ctx.run, profiling.attached(_busy), 0.05)
+
+    asyncio.run(request())
+    files = os.listdir(tmp_path)
+    assert len(files) == 1
+    stacks = (tmp_path / files[0]).read_text(encoding="utf-8")
+    assert "wrapper (profiling.py" in stacks
+    assert "request (test_profiling.py" not in stacks
+
+
+def test_profile_off_starts_no_thread(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_MODE", "off")
+    before = threading.active_count()
+
+    async def request():
+        async with profiling.profile_request("test"):
+            return threading.active_count()
+
+    assert asyncio.run(request()) == before
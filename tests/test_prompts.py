@@ -0,0 +1,34 @@
+import datetime
+
+from core.prompts import build_conversation_messages, build_spread_messages, build_timeline_messages
+
+
+def _turn(history, messages, reply, question):
+    history.append({
+        "question": question,
+        "translated": question,
+        "intent": "guidance",
+        "result": {"interpretation": reply, "user_message": messages[-1]["content"]},
+    })
+
+
+def test_each_turn_extends_the_previous_prompt():
+    history = []
+    first = build_spread_messages("Will I move?", history, ["The Star", "The Moon"], ["hope", "doubt"],
+                                  ["Past", "Future"])
+    _turn(history, first, "The Star says yes.", "¿Me mudaré?")
+    today = datetime.date(2026, 1, 1)
+    second = build_timeline_messages("When?", history, "Ace of Cups",
+                                     (today, today + datetime.timedelta(days=9)), "new feelings")
+    assert second[:len(first)] == first
+    assert second[len(first)] == {"role": "assistant", "content": "The Star says yes."}
+    _turn(history, second, "Within ten days.", "When?")
+    third = build_conversation_messages("Thanks!", history)
+    assert third[:len(second)] == second
+
+
+def test_history_without_user_message_uses_translated_question():
+    history = [{"question": "¿Hola?", "translated": "Hello?", "intent": "conversation",
+                "result": {"interpretation": "Hi there."}}]
+    messages = build_conversation_messages("How are you?", history)
+    assert messages[1] == {"role": "user", "content": "Hello?"}
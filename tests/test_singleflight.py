@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from initialize.singleflight import SingleFlight
+
+
+def test_sync_followers_share_the_leader_result():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "reading"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(flight.do, "q", work)
+        started.wait(5)
+        followers = [pool.submit(flight.do, "q", work) for _ in range(3)]
+        while flight.stats()["coalesced"] < 3:
+            time.sleep(0.001)
+        release.set()
+        assert [f.result(5) for f in [leader] + followers] == ["reading"] * 4
+    assert calls == [1]
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_sync_leader_error_reaches_followers():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def work():
+        started.set()
+        release.wait(5)
+        raise ValueError("llm down")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, "q", work)
+        started.wait(5)
+        follower = pool.submit(flight.do, "q", work)
+        while flight.stats()["coalesced"] < 1:
+            time.sleep(0.001)
+        release.set()
+        for f in (leader, follower):
+            with pytest.raises(ValueError, match="llm down"):
+                f.result(5)
+    # The key is free again: the next call runs fn
+    assert flight.do("q", lambda: "fresh") == "fresh"
+
+
+def test_async_followers_share_result_and_error():
+    flight = SingleFlight()
+    calls = []
+
+    async def ok():
+        calls.append("ok")
+        await asyncio.sleep(0.01)
+        return "reading"
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("llm down")
+
+    async def scenario():
+        assert await asyncio.gather(*(flight.do_async("q", ok) for _ in range(3))) == ["reading"] * 3
+        results = await asyncio.gather(*(flight.do_async("e", fail) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(r, ValueError) for r in results)
+
+    asyncio.run(scenario())
+    assert calls == ["ok"]
+
+
+def test_async_follower_takes_over_when_leader_is_cancelled():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "reading"
+
+    async def scenario():
+        leader = asyncio.create_task(flight.do_async("q", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do_async("q", work))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert await follower == "reading"
+
+    asyncio.run(scenario())
+    assert calls == [1, 1]
+    assert flight.stats()["in_flight"] == 0
@@ -0,0 +1,43 @@
+import numpy as np
+
+from core import spreads
+from core.spreads import SPREADS, draw, position_counts, sample_spreads
+
+
+def test_draw_is_reproducible_with_rng_and_has_no_repeats():
+    a = draw("celtic_cross", np.random.default_rng(7))
+    b = draw("celtic_cross", np.random.default_rng(7))
+    assert (a == b).all()
+    assert len(set(a.tolist())) == SPREADS["celtic_cross"].size
+
+
+def test_default_rng_is_reused_and_reseeded_after_fork(monkeypatch):
+    first = spreads._default_rng()
+    assert spreads._default_rng() is first
+    monkeypatch.setattr(spreads, "_rng_pid", -1)   # as seen from a forked child
+    assert spreads._default_rng() is not first
+
+
+def test_sample_spreads_rows_are_valid_and_roughly_uniform():
+    draws = sample_spreads("three_card", 78_000, np.random.default_rng(1))
+    assert draws.shape == (78_000, 3)
+    assert all(len(set(row)) == 3 for row in draws[:1000].tolist())
+    counts = position_counts(draws)
+    # Each card should land in each position ~1000 times
+    assert counts.min() > 850 and counts.max() < 1150
+
+
+def test_sample_spreads_uses_float64_keys():
+    class SpyRng:
+        def __init__(self):
+            self.rng = np.random.default_rng(3)
+            self.dtypes = []
+
+        def random(self, *args, **kwargs):
+            out = self.rng.random(*args, **kwargs)
+            self.dtypes.append(out.dtype)
+            return out
+
+    rng = SpyRng()
+    sample_spreads("single", 10, rng)
+    assert rng.dtypes == [np.float64]
@@ -0,0 +1,62 @@
+import sqlite3
+import time
+
+from initialize.sqlite_cache import SQLiteCache
+
+
+def test_add_keeps_the_first_live_value(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "c.sqlite3"))
+    assert cache.add("q", "first") == "first"
+    assert cache.add("q", "second") == "first"
+    assert cache.get("q") == "first"
+    assert cache.get_or_set("q", lambda: "third") == "first"
+
+
+def test_add_replaces_an_expired_value(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "c.sqlite3"))
+    cache.set("q", "old", ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("q") is None
+    assert cache.add("q", "new") == "new"
+    assert cache.get("q") == "new"
+
+
+def test_ttl_expiry(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "c.sqlite3"))
+    cache.set("short", "v", ttl=0.01)
+    cache.set("forever", "v")
+    time.sleep(0.02)
+    assert cache.get("short") is None
+    assert cache.get("forever") == "v"
+
+
+def test_size_total_and_eviction(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "c.sqlite3"), max_bytes=100)
+    for i in range(10):
+        cache.set(f"k{i}", "x" * 20)
+    stats = cache.stats()
+    assert stats["bytes"] <= 100
+    assert stats["bytes"] == 20 * stats["entries"]
+    assert cache.get("k9") == "x" * 20
+    assert cache.get("k0") is None
+
+
+def test_migrates_a_cache_without_expiry_or_size_table(tmp_path):
+    path = str(tmp_path / "c.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                 "size INTEGER NOT NULL, accessed REAL NOT NULL)")
+    conn.executemany("INSERT INTO cache VALUES (?, ?, ?, ?)",
+                     [("a", "aaa", 3, time.time()), ("b", "bbbbb", 5, time.time())])
+    conn.commit()
+    conn.close()
+
+    cache = SQLiteCache(path)
+    assert cache.stats()["bytes"] == 8
+    assert cache.get("a") == "aaa"
+    cache.set("c", "cc", ttl=60)
+    cache.delete("b")
+    cache.set("a", "a")
+    assert cache.stats()["bytes"] == 3
+    # Reopening must not count the existing rows again
+    assert SQLiteCache(path).stats()["bytes"] == 3
@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.translation import split_text
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_split_text_keeps_list_numbers_with_their_item():
+    text = "1. Past: The Star. Hope returns.\n\n10. Outcome: The Sun!"
+    assert split_text(text) == [
+        ["1. Past: The Star.", "Hope returns."],
+        [],
+        ["10. Outcome: The Sun!"],
+    ]
+
+
+def test_split_text_still_splits_after_years():
+    assert split_text("It began in 2023. It ends soon.") == [["It began in 2023.", "It ends soon."]]
+
+
+def test_unknown_translator_fails_at_import():
+    env = dict(os.environ, TRANSLATOR="nope")
+    proc = subprocess.run([sys.executable, "-c", "import utils.translation"],
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+    assert proc.returncode != 0
+    assert "Unknown TRANSLATOR: 'nope'" in proc.stderr
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, text):
+        self.text = text
+
+    def close(self):
+        pass
+
+
+def test_google_translate_is_thread_safe(monkeypatch):
+    import deep_translator.google
+    from utils.translation import GoogleTranslate
+
+    def fake_get(url, params=None, proxies=None):
+        time.sleep(0.02)   # let other threads start their own request
+        return FakeResponse(f'<div class="t0">EN {params["q"]}</div>')
+
+    monkeypatch.setattr(deep_translator.google.requests, "get", fake_get)
+    translator = GoogleTranslate()
+    questions = [f"pregunta número {i}" for i in range(6)]
+    barrier = threading.Barrier(len(questions))
+
+    def translate(question):
+        barrier.wait()
+        return translator.translate_batch([question], "es", "en")[0]
+
+    with ThreadPoolExecutor(max_workers=len(questions)) as pool:
+        results = list(pool.map(translate, questions))
+    assert results == [f"EN {q}" for q in questions]
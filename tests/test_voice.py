@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+
+from utils.voice_assistant import Utterance, VoiceListener
+
+
+class SlowSource:
+    """
+    Source whose capture takes most of its phrase limit and records whether it
+    was closed while a capture was still running.
+    """
+    name = "slow"
+    phrase_limit_s = 0.5
+
+    def __init__(self):
+        self.capturing = threading.Event()
+        self.closed_mid_capture = False
+        self.closed = False
+
+    def open(self):
+        self.closed = False
+
+    def close(self):
+        self.closed_mid_capture = self.capturing.is_set()
+        self.closed = True
+
+    def capture(self, timeout=1.0):
+        self.capturing.set()
+        time.sleep(0.4)
+        self.capturing.clear()
+        return Utterance(None, "slow", time.time())
+
+
+class EchoRecognizer:
+    name = "echo"
+
+    def recognize(self, utterance):
+        return utterance.source
+
+
+class ScriptedSource:
+    """
+    Plays back (text, captured_at) pairs, then reports end of input.
+    """
+    name = "scripted"
+
+    def __init__(self, utterances):
+        self.utterances = list(utterances)
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def capture(self, timeout=1.0):
+        if not self.utterances:
+            raise EOFError
+        text, captured_at = self.utterances.pop(0)
+        return Utterance(None, text, captured_at)
+
+
+def test_get_skips_speech_captured_before_the_question():
+    asked_at = time.time()
+    source = ScriptedSource([("while the answer played", asked_at - 5),
+                             ("before the prompt", asked_at - 0.1),
+                             ("the real question", asked_at + 0.5)])
+    listener = VoiceListener(source, EchoRecognizer(), workers=1).start()
+    assert listener.get(timeout=2, since=asked_at) == "the real question"
+    listener.stop()
+
+
+def test_get_without_since_returns_everything_in_order():
+    source = ScriptedSource([("one", 1.0), ("two", 2.0)])
+    listener = VoiceListener(source, EchoRecognizer(), workers=1).start()
+    assert [listener.get(timeout=2), listener.get(timeout=2)] == ["one", "two"]
+    listener.stop()
+
+
+def test_stop_waits_for_capture_and_shuts_down_pool():
+    source = SlowSource()
+    listener = VoiceListener(source, EchoRecognizer(), workers=1).start()
+    source.capturing.wait(1)
+    pool = listener._pool
+    listener.stop()
+    assert source.closed and not source.closed_mid_capture
+    assert pool._shutdown
+    assert listener.get(timeout=1) == "slow"
+
+
+def test_restart_after_stop():
+    source = SlowSource()
+    listener = VoiceListener(source, EchoRecognizer(), workers=1).start()
+    listener.stop()
+    listener.start()
+    assert listener.get(timeout=2) == "slow"
+    listener.stop()
+
+
+class FakeEngine:
+    name = "fake"
+    suffix = ".wav"
+
+    def synthesize(self, text, lang):
+        return text.encode("utf-8")
+
+
+def test_cached_audio_survives_pruning_before_playback(tmp_path, monkeypatch):
+    from utils import voice_assistant as va
+
+    cache_dir = tmp_path / "tts"
+    monkeypatch.setattr(va, "TTS_CACHE_DIR", str(cache_dir))
+    played = []
+
+    def play(path):
+        for name in os.listdir(cache_dir):   # another process pruning the cache
+            os.remove(cache_dir / name)
+        with open(path, encoding="utf-8") as f:
+            played.append(f.read())
+
+    text = "The Star shines. The Moon rises."
+    va.speak_response(text, engine=FakeEngine(), play=lambda path: None)
+    stats = va.speak_response(text, engine=FakeEngine(), play=play)
+    assert stats["cache_hits"] == 2 and stats["failed"] == 0
+    assert played == ["The Star shines.", "The Moon rises."]
@@ -63,6 +63,8 @@
 # #whenprint(DATE_RANGES)
 import datetime
 
+import numpy as np
+
 SUITS = ["Cups", "Swords", "Wands", "Pentacles"]
 NUMBERS = ["Ace", "Two", "Three", "Four", "Five", "Six", "Seven", "Eight", "Nine", "Ten"]
 COURTS = ["Page", "Knight", "Queen", "King"]
@@ -111,3 +113,63 @@ def generate_date_ranges():
 
 DATE_RANGES = generate_date_ranges()
 
+
+# Alternative names used by different tarot books, for matching card mentions
+# in the PDF text (see TarotPDFEmbedder.build_card_index)
+SUIT_ALIASES = {
+    "Cups": ["Chalices", "Cauldrons"],
+    "Swords": ["Blades"],
+    "Wands": ["Rods", "Staves", "Batons"],
+    "Pentacles": ["Coins", "Disks", "Discs"],
+}
+MAJOR_ALIASES = {
+    "Judgement": ["Judgment", "The Judgement", "The Judgment"],
+    "Wheel of Fortune": ["The Wheel of Fortune"],
+    "Strength": ["Fortitude"],
+    "The Hanged Man": ["Hanged Man"],
+    "The High Priestess": ["High Priestess"],
+}
+NUMBER_DIGITS = {num: str(i + 1) for i, num in enumerate(NUMBERS)}
+
+def card_aliases(card: str) -> list:
+    """
+    Return the card's name plus the common alternative spellings for it.
+    """
+    names = [card]
+    if " of " in card:
+        num, suit = card.split(" of ")
+        for s in [suit] + SUIT_ALIASES.get(suit, []):
+            names.append(f"{num} of {s}")
+            if num in NUMBER_DIGITS:
+                names.append(f"{NUMBER_DIGITS[num]} of {s}")
+    names.extend(MAJOR_ALIASES.get(card, []))
+    return list(dict.fromkeys(names))
+
+CARD_ALIASES = {card: card_aliases(card) for card in FULL_DECK}
+
+
+# Integer card IDs: a card's ID is its index in FULL_DECK. The tables below
+# are indexed by ID so spreads can be drawn, stored and looked up as small
+# integer arrays instead of strings.
+CARD_ID = {card: i for i, card in enumerate(FULL_DECK)}
+CARD_NAMES = np.array(FULL_DECK, dtype=object)
+# Suit index into SUITS (-1 for the major arcana); rank 1-10 for Ace-Ten and
+# 11-14 for Page-King, or the arcanum number 0-21 for the major arcana
+CARD_SUIT = np.array(
+    [s for s in range(len(SUITS)) for _ in NUMBERS + COURTS] + [-1] * len(MAJOR_ARCANA), dtype=np.int8
+)
+CARD_RANK = np.array(
+    [r + 1 for _ in SUITS for r in range(len(NUMBERS + COURTS))] + list(range(len(MAJOR_ARCANA))),
+    dtype=np.int8,
+)
+IS_MAJOR = CARD_SUIT < 0
+NUMERIC_IDS = np.array([CARD_ID[c] for c in NUMERIC_CARDS], dtype=np.int16)
+FULL_DECK_IDS = np.arange(len(FULL_DECK), dtype=np.int16)
+# DATE_RANGES by ID (None for cards without a timeframe)
+DATE_RANGE_TABLE = [DATE_RANGES.get(card) for card in FULL_DECK]
+
+def card_names(ids) -> list:
+    """
+    Card names for an array (or list) of card IDs.
+    """
+    return CARD_NAMES[np.asarray(ids)].tolist()
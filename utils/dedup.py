@@ -0,0 +1,177 @@
+# dedup.py
+#
+# Build-time near-duplicate detection for PDF chunks. Tarot books repeat
+# each other and themselves (running headers and footers, reprinted card
+# descriptions), and every copy would otherwise get its own vector and crowd
+# the top_k results. Each chunk gets a MinHash signature over its word
+# shingles. Locality-sensitive hashing over signature bands proposes
+# candidate pairs, and the exact shingle Jaccard similarity confirms them.
+# Confirmed pairs are merged into clusters, and each cluster keeps one chunk.
+
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from initialize.config import (
+    DEDUP_BANDS, DEDUP_EMBED_THRESHOLD, DEDUP_NUM_PERM, DEDUP_SHINGLE_WORDS, DEDUP_THRESHOLD,
+)
+
+_WORD = re.compile(r"\w+")
+_DIGIT = re.compile(r"\d")
+# Mersenne prime for the universal hash family; with 32-bit inputs and
+# coefficients, a * x + b stays below 2**64
+_PRIME = np.uint64((1 << 61) - 1)
+
+
+def shingles(text: str, k: int = DEDUP_SHINGLE_WORDS) -> Set[str]:
+    """
+    Word k-grams of the lower-cased text. Digits are folded to 0 so page
+    numbers and dates do not make otherwise identical chunks differ.
+    """
+    words = _WORD.findall(_DIGIT.sub("0", text.lower()))
+    if len(words) <= k:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """
+    MinHash signatures with `num_perm` hash functions of the form
+    (a * x + b) mod p over the CRC32 of each shingle.
+    """
+    def __init__(self, num_perm: int = DEDUP_NUM_PERM, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, 1 << 32, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 32, num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_set: Set[str]) -> np.ndarray:
+        if not shingle_set:
+            return np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        x = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingle_set),
+                        dtype=np.uint64, count=len(shingle_set))
+        return ((np.outer(self.a, x) + self.b[:, None]) % _PRIME).min(axis=1)
+
+    def signatures(self, shingle_sets: Sequence[Set[str]]) -> np.ndarray:
+        return np.stack([self.signature(s) for s in shingle_sets]) if shingle_sets else \
+            np.empty((0, self.num_perm), dtype=np.uint64)
+
+
+def candidate_pairs(signatures: np.ndarray, bands: int = DEDUP_BANDS) -> Set[Tuple[int, int]]:
+    """
+    LSH banding: chunks whose signatures agree on every row of at least one
+    band become candidate pairs. More bands (fewer rows each) favour recall;
+    candidates are confirmed exactly afterwards.
+    """
+    rows = signatures.shape[1] // bands
+    pairs = set()
+    for band in range(bands):
+        buckets: Dict[bytes, List[int]] = {}
+        for i, row in enumerate(signatures[:, band * rows:(band + 1) * rows]):
+            buckets.setdefault(row.tobytes(), []).append(i)
+        for ids in buckets.values():
+            for x in range(len(ids)):
+                for y in range(x + 1, len(ids)):
+                    pairs.add((ids[x], ids[y]))
+    return pairs
+
+
+@dataclass
+class DedupResult:
+    """
+    Outcome of `find_duplicates`.
+
+    Attributes:
+        keep (List[int]): Indices of the surviving chunks, in input order.
+        members (Dict[int, List[int]]): Surviving index -> every input index
+            it stands for (itself included), in input order.
+        candidates (int): LSH candidate pairs examined.
+        merged (int): Candidate pairs confirmed as near-duplicates.
+    """
+    keep: List[int]
+    members: Dict[int, List[int]] = field(default_factory=dict)
+    candidates: int = 0
+    merged: int = 0
+
+    def report(self, texts: Sequence[str], examples: int = 5) -> dict:
+        """
+        Corpus reduction summary with the largest clusters as examples.
+        """
+        before = len(texts)
+        after = len(self.keep)
+        clusters = sorted((ids for ids in self.members.values() if len(ids) > 1), key=len, reverse=True)
+        chars_before = sum(len(t) for t in texts)
+        chars_after = sum(len(texts[i]) for i in self.keep)
+        return {
+            "chunks_before": before,
+            "chunks_after": after,
+            "removed": before - after,
+            "reduction": (before - after) / before if before else 0.0,
+            "chars_before": chars_before,
+            "chars_after": chars_after,
+            "clusters": len(clusters),
+            "candidates": self.candidates,
+            "merged_pairs": self.merged,
+            "largest": [
+                {"size": len(ids), "text": " ".join(texts[ids[0]].split())[:120]}
+                for ids in clusters[:examples]
+            ],
+        }
+
+
+def find_duplicates(texts: Sequence[str],
+                    threshold: float = DEDUP_THRESHOLD,
+                    embeddings: Optional[np.ndarray] = None,
+                    embed_threshold: float = DEDUP_EMBED_THRESHOLD,
+                    hasher: Optional[MinHasher] = None,
+                    bands: int = DEDUP_BANDS) -> DedupResult:
+    """
+    Group near-duplicate chunks. Two chunks are merged when their shingle
+    Jaccard similarity is at least `threshold` and, if `embeddings` are
+    given, their cosine similarity is at least `embed_threshold`. Each
+    cluster keeps its longest chunk (the earliest on ties).
+    """
+    hasher = hasher or MinHasher()
+    sets = [shingles(t) for t in texts]
+    pairs = candidate_pairs(hasher.signatures(sets), bands)
+
+    unit = None
+    if embeddings is not None:
+        unit = embeddings / (np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-9)
+
+    parent = list(range(len(texts)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    merged = 0
+    for i, j in pairs:
+        if jaccard(sets[i], sets[j]) < threshold:
+            continue
+        if unit is not None and float(unit[i] @ unit[j]) < embed_threshold:
+            continue
+        merged += 1
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+
+    clusters: Dict[int, List[int]] = {}
+    for i in range(len(texts)):
+        clusters.setdefault(find(i), []).append(i)
+    members = {}
+    for ids in clusters.values():
+        best = max(ids, key=lambda i: (len(texts[i]), -i))
+        members[best] = ids
+    return DedupResult(keep=sorted(members), members=members, candidates=len(pairs), merged=merged)
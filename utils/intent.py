@@ -55,16 +55,16 @@
 # import streamlit as st
 
 # st.write("Python path:", sys.executable)
-from initialize.config import MODEL_NAME
+from initialize.config import LLM_API_URL
+from initialize.log import get_logger, log_payload
 # from langchain_groq import ChatGroq
-from os import getenv
+from utils.llm import chat_completion
 import re
-import os
-import requests
 
+log = get_logger(__name__)
 
 
-def classify_intent(question: str) -> str:
+def classify_intent(question: str, use_cache: bool = True) -> str:
     conversational_keywords = r"\b(who are you|hi|hello|hey|good morning|good evening|how are you|how's it going|bye|goodbye|see you|what's up|good night|namaste|happy diwali|happy holi)\b"
 
     if re.search(conversational_keywords, question.lower()):
@@ -108,35 +108,19 @@ def classify_intent(question: str) -> str:
         "A:"
     )
 
-    api_url = "https://api.groq.com/openai/v1/chat/completions"
-    api_key = getenv("GROQ_API_KEY")  # Ensure this is set in your environment
-
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}"
-    }
-
     data = {
-        "model": "llama-3.3-70b-versatile",  # Use your preferred model
         "messages": [
             {"role": "user", "content": prompt}
         ],
-        "max_tokens": 10,
-        "temperature": 0
     }
 
-    print("URL:", api_url)
-    print("Headers:", headers)
-    print("Data:", data)
+    log_payload(log, "classify_intent request", data, url=LLM_API_URL)
 
     try:
-        response = requests.post(api_url, headers=headers, json=data)
-        print("Status code:", response.status_code)
-        print("Response text:", response.text)
-        response.raise_for_status()
-        intent = response.json()["choices"][0]["message"]["content"].strip().lower()
+        intent = chat_completion(**data, route="classification", use_cache=use_cache).lower()
+        log_payload(log, "classify_intent response", intent)
     except Exception as e:
-        print(f"Error in classify_intent: {e}")
+        log.warning("classify_intent failed", extra={"fields": {"error": str(e)}})
         intent = None
 
     valid = {"yes_no", "timeline", "insight", "guidance", "factual", "conversation"}
@@ -0,0 +1,500 @@
+# llm.py
+#
+# Shared client for the OpenAI-compatible chat-completions endpoint used by
+# both the intent classifier and the tarot reader.
+#
+# Every call runs under a deadline, retries 429/5xx and network errors with
+# jittered exponential backoff, can optionally hedge slow requests, and goes
+# through a circuit breaker that fails fast (with a cached or canned reply)
+# while the upstream is unhealthy.
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import requests
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FuturesTimeout
+from os import getenv
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from initialize.config import (
+    LLM_API_URL, LLM_ROUTES,
+    LLM_CACHE_ENABLED, LLM_CACHE_PATH, LLM_CACHE_MAX_BYTES,
+    LLM_CONNECT_TIMEOUT, LLM_READ_TIMEOUT, LLM_DEADLINE_S,
+    LLM_MAX_RETRIES, LLM_BACKOFF_BASE_S, LLM_BACKOFF_MAX_S,
+    LLM_HEDGE, LLM_HEDGE_PERCENTILE, LLM_HEDGE_MIN_DELAY_S,
+    LLM_BREAKER_THRESHOLD, LLM_BREAKER_RESET_S,
+)
+from initialize.sqlite_cache import SQLiteCache
+from initialize.metrics import LLM_ROUTE_SECONDS, record_cache, record_tokens, stage_timer, usage_counts
+from initialize.log import get_logger
+
+log = get_logger(__name__)
+
+_completion_cache = SQLiteCache(LLM_CACHE_PATH, LLM_CACHE_MAX_BYTES) if LLM_CACHE_ENABLED else None
+
+_RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class LLMUnavailable(RuntimeError):
+    """
+    Raised when the upstream could not produce a reply within the deadline
+    (or the circuit is open) and no fallback reply was available.
+    """
+
+
+class _RetryableStatus(Exception):
+    def __init__(self, status: int, retry_after: Optional[float]):
+        super().__init__(f"upstream returned {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed    -> calls go through; `threshold` failures in a row open it
+    open      -> calls are rejected until `reset_timeout` has passed
+    half_open -> one probe call is let through; success closes the circuit,
+                 failure opens it again
+    """
+    def __init__(self, threshold: int = 5, reset_timeout: float = 30.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+            self._opened_at = 0.0
+            self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def release(self) -> None:
+        """
+        End a call that says nothing about upstream health (e.g. a 4xx
+        rejection of our own request) without changing the state.
+        """
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self.state == "half_open" or self._failures >= self.threshold:
+                if self.state != "open":
+                    log.error("LLM circuit breaker opened", extra={"fields": {"failures": self._failures}})
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+
+breaker = CircuitBreaker(LLM_BREAKER_THRESHOLD, LLM_BREAKER_RESET_S)
+
+# Recent successful request latencies, used to pick the hedge delay
+_latencies: deque = deque(maxlen=200)
+_latency_lock = threading.Lock()
+_hedge_pool = None
+_hedge_pool_pid = None
+
+
+_sessions = threading.local()
+
+
+def get_session() -> requests.Session:
+    """
+    Pooled HTTP session for the current thread, so repeated calls reuse the
+    TLS connection to the provider instead of reconnecting every time.
+    """
+    session = getattr(_sessions, "session", None)
+    if session is None or _sessions.pid != os.getpid():
+        session = requests.Session()
+        _sessions.session = session
+        _sessions.pid = os.getpid()
+    return session
+
+
+def _record_latency(seconds: float) -> None:
+    with _latency_lock:
+        _latencies.append(seconds)
+
+
+def hedge_delay() -> float:
+    """
+    Delay before a hedged second request: the configured percentile of recent
+    latencies, or the floor until enough samples have been seen.
+    """
+    with _latency_lock:
+        samples = sorted(_latencies)
+    if len(samples) < 20:
+        return max(LLM_HEDGE_MIN_DELAY_S, LLM_READ_TIMEOUT / 4)
+    idx = min(len(samples) - 1, int(len(samples) * LLM_HEDGE_PERCENTILE / 100))
+    return max(LLM_HEDGE_MIN_DELAY_S, samples[idx])
+
+
+def _pool() -> ThreadPoolExecutor:
+    # Created lazily per process; executor threads do not survive fork
+    global _hedge_pool, _hedge_pool_pid
+    if _hedge_pool is None or _hedge_pool_pid != os.getpid():
+        _hedge_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-hedge")
+        _hedge_pool_pid = os.getpid()
+    return _hedge_pool
+
+
+def completion_key(model: str, messages: List[Dict[str, str]], max_tokens: int, temperature: float) -> str:
+    """
+    Stable hash of everything that determines a completion.
+    """
+    payload = json.dumps(
+        {"model": model, "messages": messages, "max_tokens": max_tokens, "temperature": temperature},
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _send(data: Dict[str, Any], deadline: float, stream: bool = False) -> requests.Response:
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("LLM deadline exceeded")
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {getenv('GROQ_API_KEY')}"
+    }
+    response = get_session().post(
+        LLM_API_URL, headers=headers, json=data, stream=stream,
+        timeout=(LLM_CONNECT_TIMEOUT, min(LLM_READ_TIMEOUT, remaining)),
+    )
+    if response.status_code in _RETRYABLE_STATUS:
+        retry_after = response.headers.get("Retry-After")
+        raise _RetryableStatus(
+            response.status_code,
+            float(retry_after) if retry_after and retry_after.replace(".", "", 1).isdigit() else None,
+        )
+    response.raise_for_status()
+    return response
+
+
+def _post(data: Dict[str, Any], deadline: float) -> Dict[str, Any]:
+    t0 = time.monotonic()
+    body = _send(data, deadline).json()
+    _record_latency(time.monotonic() - t0)
+    return body
+
+
+def _post_stream(data: Dict[str, Any], deadline: float) -> requests.Response:
+    # Streams are never hedged: the reply is already being shown to the user
+    return _send(dict(data, stream=True), deadline, stream=True)
+
+
+def _post_hedged(data: Dict[str, Any], deadline: float) -> Dict[str, Any]:
+    if not LLM_HEDGE:
+        return _post(data, deadline)
+
+    pool = _pool()
+    primary = pool.submit(_post, data, deadline)
+    try:
+        return primary.result(timeout=hedge_delay())
+    except FuturesTimeout:
+        pass
+
+    # Primary is slow: race a second copy and take whichever answers first.
+    # The loser keeps running until its own timeout; its reply is discarded.
+    pending = {primary, pool.submit(_post, data, deadline)}
+    error = None
+    while pending:
+        done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()),
+                             return_when=FIRST_COMPLETED)
+        if not done:
+            raise TimeoutError("LLM deadline exceeded")
+        for fut in done:
+            if fut.exception() is None:
+                return fut.result()
+            error = error or fut.exception()
+    raise error
+
+
+def _request(data: Dict[str, Any], send: Callable = _post_hedged) -> Any:
+    deadline = time.monotonic() + LLM_DEADLINE_S
+    last_error = None
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        try:
+            return send(data, deadline)
+        except _RetryableStatus as e:
+            last_error, retry_after = e, e.retry_after
+        except (requests.ConnectionError, requests.Timeout, TimeoutError) as e:
+            last_error, retry_after = e, None
+
+        if attempt == LLM_MAX_RETRIES:
+            break
+        # Full jitter: sleep a random time up to the exponential backoff cap
+        sleep = random.uniform(0, min(LLM_BACKOFF_MAX_S, LLM_BACKOFF_BASE_S * 2 ** attempt))
+        if retry_after is not None:
+            sleep = max(sleep, retry_after)
+        if time.monotonic() + sleep >= deadline:
+            break
+        log.warning("LLM request failed, retrying", extra={"fields": {
+            "attempt": attempt + 1, "error": str(last_error), "sleep_s": round(sleep, 3),
+        }})
+        time.sleep(sleep)
+    raise LLMUnavailable(f"LLM request failed: {last_error}") from last_error
+
+
+# Calls made in the current request, when a caller is collecting them
+_calls: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("llm_calls", default=None)
+
+
+def route(name: Optional[str]) -> Dict[str, Any]:
+    """
+    Model, max_tokens and temperature for a route (an intent name or
+    "classification"), falling back to the "default" route.
+    """
+    return LLM_ROUTES.get(name or "default", LLM_ROUTES["default"])
+
+
+def _resolve(name, model, max_tokens, temperature):
+    settings = route(name)
+    return (
+        name or "default",
+        model or settings["model"],
+        max_tokens if max_tokens is not None else settings["max_tokens"],
+        temperature if temperature is not None else settings["temperature"],
+    )
+
+
+@contextmanager
+def record_calls():
+    """
+    Collect a summary of every LLM call made inside the block (route, model,
+    max_tokens, seconds, where the reply came from and, for answered calls,
+    prompt / prefix-cached / completion tokens) into the yielded list.
+    """
+    calls: List[Dict[str, Any]] = []
+    token = _calls.set(calls)
+    try:
+        yield calls
+    finally:
+        _calls.reset(token)
+
+
+def _report(route_name: str, model: str, max_tokens: int, t0: float, source: str,
+            usage: Optional[dict] = None) -> None:
+    seconds = time.perf_counter() - t0
+    if source == "llm":
+        LLM_ROUTE_SECONDS.labels(route_name, model).observe(seconds)
+    calls = _calls.get()
+    if calls is not None:
+        call = {
+            "route": route_name, "model": model, "max_tokens": max_tokens,
+            "seconds": round(seconds, 4), "source": source,
+        }
+        if usage:
+            tokens = usage_counts(usage)
+            call.update(prompt_tokens=tokens["prompt"], cached_tokens=tokens["cached_prompt"],
+                        completion_tokens=tokens["completion"])
+        calls.append(call)
+
+
+def _is_client_error(error: BaseException) -> bool:
+    response = getattr(error, "response", None)
+    return isinstance(error, requests.HTTPError) and response is not None and 400 <= response.status_code < 500
+
+
+def _fallback(key: str, fallback: Optional[str], reason: str) -> str:
+    log.warning("LLM unavailable, serving fallback", extra={"fields": {"reason": reason}})
+    if _completion_cache is not None:
+        cached = _completion_cache.get(key)
+        if cached is not None:
+            return cached
+    if fallback is not None:
+        return fallback
+    raise LLMUnavailable(reason)
+
+
+def chat_completion(
+    messages: List[Dict[str, str]],
+    route: Optional[str] = None,
+    model: Optional[str] = None,
+    max_tokens: Optional[int] = None,
+    temperature: Optional[float] = None,
+    use_cache: bool = True,
+    fallback: Optional[str] = None
+) -> str:
+    """
+    Send a chat-completions request and return the reply text.
+
+    Model, max_tokens and temperature come from the LLM_ROUTES entry for
+    `route` (see initialize/config.py) unless given explicitly.
+
+    When the completion cache is enabled (LLM_CACHE=1), identical requests are
+    answered from disk. Pass use_cache=False to force a fresh sample; the new
+    reply still replaces the cached one.
+
+    If the upstream fails (or the circuit breaker is open) the cached reply
+    for the same request is returned when there is one, then `fallback`;
+    otherwise LLMUnavailable is raised.
+    """
+    route_name, model, max_tokens, temperature = _resolve(route, model, max_tokens, temperature)
+    t0 = time.perf_counter()
+    key = completion_key(model, messages, max_tokens, temperature)
+    if _completion_cache is not None and use_cache:
+        cached = _completion_cache.get(key)
+        record_cache("llm", cached is not None)
+        if cached is not None:
+            _report(route_name, model, max_tokens, t0, "cache")
+            return cached
+
+    if not breaker.allow():
+        _report(route_name, model, max_tokens, t0, "fallback")
+        return _fallback(key, fallback, "LLM circuit breaker is open")
+
+    data = {
+        "model": model,
+        "messages": messages,
+        "max_tokens": max_tokens,
+        "temperature": temperature
+    }
+    try:
+        with stage_timer("llm"):
+            body = _request(data)
+        content = body["choices"][0]["message"]["content"].strip()
+    except LLMUnavailable as e:
+        breaker.record_failure()
+        _report(route_name, model, max_tokens, t0, "fallback")
+        return _fallback(key, fallback, str(e))
+    except Exception as e:
+        if _is_client_error(e):
+            # Non-retryable client errors (4xx) say nothing about upstream health
+            breaker.release()
+        else:
+            # Malformed replies and anything unexpected count against the upstream
+            breaker.record_failure()
+        raise
+    breaker.record_success()
+    record_tokens(body.get("usage"))
+    _report(route_name, model, max_tokens, t0, "llm", body.get("usage"))
+
+    if _completion_cache is not None:
+        _completion_cache.set(key, content)
+    return content
+
+
+def _iter_sse(response: requests.Response) -> Iterator[Dict[str, Any]]:
+    # text/event-stream is UTF-8 by spec; without a charset in the header
+    # requests would decode it as ISO-8859-1
+    response.encoding = "utf-8"
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue
+        payload = line[len("data:"):].strip()
+        if payload == "[DONE]":
+            return
+        yield json.loads(payload)
+    raise requests.ConnectionError("LLM stream ended before [DONE]")
+
+
+def stream_chat_completion(
+    messages: List[Dict[str, str]],
+    route: Optional[str] = None,
+    model: Optional[str] = None,
+    max_tokens: Optional[int] = None,
+    temperature: Optional[float] = None,
+    use_cache: bool = True,
+    fallback: Optional[str] = None
+) -> Iterator[str]:
+    """
+    Streaming variant of `chat_completion`: yields the reply in pieces as the
+    provider produces them. Retries, the deadline and the circuit breaker
+    apply until the stream has opened; cached and fallback replies are
+    yielded as a single piece. If the stream breaks after some text was
+    yielded, no fallback follows; the call is reported with source "partial"
+    (see record_calls) so callers can tell the reply is incomplete.
+    """
+    route_name, model, max_tokens, temperature = _resolve(route, model, max_tokens, temperature)
+    t0 = time.perf_counter()
+    key = completion_key(model, messages, max_tokens, temperature)
+    if _completion_cache is not None and use_cache:
+        cached = _completion_cache.get(key)
+        record_cache("llm", cached is not None)
+        if cached is not None:
+            _report(route_name, model, max_tokens, t0, "cache")
+            yield cached
+            return
+
+    if not breaker.allow():
+        _report(route_name, model, max_tokens, t0, "fallback")
+        yield _fallback(key, fallback, "LLM circuit breaker is open")
+        return
+
+    data = {
+        "model": model,
+        "messages": messages,
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "stream_options": {"include_usage": True},
+    }
+    parts = []
+    usage = None
+    with stage_timer("llm"):
+        try:
+            response = _request(data, send=_post_stream)
+            for event in _iter_sse(response):
+                # Usage comes in the last chunk (Groq nests it under x_groq)
+                event_usage = event.get("usage") or (event.get("x_groq") or {}).get("usage")
+                if event_usage:
+                    usage = event_usage
+                    record_tokens(event_usage)
+                choices = event.get("choices") or [{}]
+                piece = (choices[0].get("delta") or {}).get("content")
+                if piece:
+                    parts.append(piece)
+                    yield piece
+        except Exception as e:
+            if _is_client_error(e):
+                breaker.release()
+                raise
+            breaker.record_failure()
+            if not isinstance(e, (LLMUnavailable, requests.RequestException)):
+                raise
+            if parts:
+                log.warning("LLM stream broke off, reply is incomplete", extra={"fields": {"error": str(e)}})
+                _report(route_name, model, max_tokens, t0, "partial")
+                return
+            _report(route_name, model, max_tokens, t0, "fallback")
+            yield _fallback(key, fallback, str(e))
+            return
+    breaker.record_success()
+    _report(route_name, model, max_tokens, t0, "llm", usage)
+
+    if _completion_cache is not None:
+        _completion_cache.set(key, "".join(parts).strip())
+
+
+def cache_stats() -> Optional[Dict[str, Any]]:
+    """
+    Completion-cache statistics, or None when the cache is disabled.
+    """
+    return _completion_cache.stats() if _completion_cache is not None else None
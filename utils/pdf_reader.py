@@ -99,53 +99,355 @@
 #         filtered = [d for d in docs if detect(d) == context.language]
 #         return filtered[:top_k]
 
+import os
+import re
+import mmap
+import json
+import tempfile
+import threading
 import pdfplumber
 import faiss
 import numpy as np
 from sentence_transformers import SentenceTransformer
 from langdetect import detect
-from initialize.config import PDF_PATHS
+from initialize.config import PDF_PATHS, INDEX_DIR, DEDUP_CHUNKS, DEDUP_EMBED_CHECK
+from utils.dedup import find_duplicates
 from utils.context import ConversationContext
+from utils.deck import CARD_ALIASES
+from initialize.metrics import stage_timer
+from initialize.log import get_logger
+
+log = get_logger(__name__)
+
+# Read flat indexes through mmap when the installed faiss supports it, so
+# workers that load the index separately still share one page-cache copy.
+_MMAP_FLAG = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+
+
+class ChunkStore:
+    """
+    Read-only, list-like view over paragraphs stored in one mmap'd UTF-8 blob.
+
+    A plain list of str gets copied page by page into every forked worker as
+    soon as refcounts are touched; slicing an mmap keeps the text in shared
+    page cache instead.
+    """
+    def __init__(self, blob_path: str, offsets_path: str):
+        self._file = open(blob_path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._blob = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ) if size else b""
+        self._offsets = np.load(offsets_path, mmap_mode="r")
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        if i < 0:
+            i += len(self)
+        start, end = int(self._offsets[i]), int(self._offsets[i + 1])
+        return self._blob[start:end].decode("utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @staticmethod
+    def write(paragraphs, blob_path: str, offsets_path: str) -> None:
+        offsets = [0]
+        with open(blob_path, "wb") as f:
+            for p in paragraphs:
+                data = p.encode("utf-8")
+                f.write(data)
+                offsets.append(offsets[-1] + len(data))
+        np.save(offsets_path, np.array(offsets, dtype=np.int64))
+
+
+def _card_patterns() -> dict:
+    """
+    One regex per card matching its name or any alias. Multi-word names match
+    case-insensitively; one-word majors ("Strength", "Death") only when
+    capitalised, so ordinary uses of the word are not counted as mentions.
+    """
+    patterns = {}
+    for card, aliases in CARD_ALIASES.items():
+        multi = [re.escape(a) for a in aliases if " " in a]
+        single = [re.escape(a) for a in aliases if " " not in a]
+        parts = []
+        if multi:
+            parts.append(f"(?i:{'|'.join(multi)})")
+        if single:
+            parts.append("|".join(single))
+        patterns[card] = re.compile(rf"\b(?:{'|'.join(parts)})\b")
+    return patterns
+
+
+# Lower-cased card name or alias -> canonical FULL_DECK name
+_CARD_LOOKUP = {alias.lower(): card for card, aliases in CARD_ALIASES.items() for alias in aliases}
+
 
 class TarotPDFEmbedder:
     def __init__(self, model_name="all-MiniLM-L6-v2"):
         self.model = SentenceTransformer(model_name)
+        self.model.eval()
         self.index = None
         self.paragraphs = []
+        # Where each chunk came from: [{"pdf", "page"}, ...], one list per
+        # chunk (more than one entry when near-duplicates were merged into it)
+        self.provenance = []
+        self.dedup_report = None
+        # Card name -> ids of the chunks that mention it
+        self.card_index = {}
+        # Detected language code per chunk, and language -> chunk ids
+        self.languages = []
+        self._lang_ids = {}
+        # (card, language) -> (IDSelectorBatch, size), built on first use by
+        # whichever request thread needs it
+        self._selectors = {}
+        self._selectors_lock = threading.Lock()
 
     def extract_paragraphs(self):
         paragraphs = []
+        provenance = []
         for path in PDF_PATHS:
             with pdfplumber.open(path) as pdf:
-                for page in pdf.pages:
+                for page_no, page in enumerate(pdf.pages, start=1):
                     text = page.extract_text()
                     if text:
                         chunks = [p.strip() for p in text.split('\n\n') if len(p.strip()) > 40]
                         paragraphs.extend(chunks)
+                        provenance.extend([{"pdf": path, "page": page_no}] for _ in chunks)
         self.paragraphs = paragraphs
+        self.provenance = provenance
         return paragraphs
 
+    def dedup_paragraphs(self, embeddings: np.ndarray = None) -> list:
+        """
+        Collapse near-duplicate chunks (see utils/dedup.py), keeping one chunk
+        per cluster with the provenance of every copy. Returns the indices of
+        the kept chunks into the pre-dedup list, so callers can slice
+        embeddings computed before the call.
+        """
+        texts = self.paragraphs
+        if len(self.provenance) != len(texts):
+            self.provenance = [[] for _ in texts]
+        result = find_duplicates(texts, embeddings=embeddings)
+        self.dedup_report = result.report(texts)
+        self.paragraphs = [texts[i] for i in result.keep]
+        self.provenance = [
+            [source for m in result.members[i] for source in self.provenance[m]] for i in result.keep
+        ]
+        log.info("near-duplicate chunks removed", extra={"fields": {
+            k: self.dedup_report[k] for k in ("chunks_before", "chunks_after", "reduction", "clusters")
+        }})
+        return result.keep
+
+    def build_card_index(self) -> dict:
+        """
+        Inverted index from each card to the chunks that mention it by name or
+        alias, used to restrict card lookups to relevant chunks.
+        """
+        patterns = _card_patterns()
+        card_index = {card: [] for card in patterns}
+        for i, text in enumerate(self.paragraphs):
+            for card, pattern in patterns.items():
+                if pattern.search(text):
+                    card_index[card].append(i)
+        self.card_index = card_index
+        self._selectors = {}
+        covered = sum(1 for ids in card_index.values() if ids)
+        log.info("card index built", extra={"fields": {"covered": covered, "cards": len(card_index)}})
+        return card_index
+
+    def detect_languages(self) -> list:
+        """
+        Detect each chunk's language once, at build time, so language-filtered
+        retrieval needs no per-request detection.
+        """
+        languages = []
+        for text in self.paragraphs:
+            try:
+                languages.append(detect(text))
+            except Exception:
+                languages.append("unknown")
+        self._set_languages(languages)
+        return languages
+
+    def _set_languages(self, languages: list) -> None:
+        self.languages = languages
+        codes = np.array(languages)
+        self._lang_ids = {
+            lang: np.flatnonzero(codes == lang).astype(np.int64) for lang in set(languages)
+        }
+        self._selectors = {}
+
     def build_vector_store(self):
-        print("🔄 Building FAISS index...")
+        log.info("building FAISS index")
         self.extract_paragraphs()
-        embeddings = self.model.encode(self.paragraphs, show_progress_bar=True)
+        if DEDUP_CHUNKS and DEDUP_EMBED_CHECK:
+            embeddings = self.model.encode(self.paragraphs, show_progress_bar=True)
+            embeddings = embeddings[self.dedup_paragraphs(embeddings)]
+        else:
+            if DEDUP_CHUNKS:
+                self.dedup_paragraphs()
+            embeddings = self.model.encode(self.paragraphs, show_progress_bar=True)
         dimension = embeddings.shape[1]
         self.index = faiss.IndexFlatL2(dimension)
         self.index.add(np.array(embeddings).astype('float32'))
-        print(f"✅ Indexed {len(self.paragraphs)} chunks from {len(PDF_PATHS)} PDFs.")
+        self.build_card_index()
+        self.detect_languages()
+        log.info("FAISS index built", extra={"fields": {"chunks": len(self.paragraphs), "pdfs": len(PDF_PATHS)}})
+
+    def save_index(self, index_dir: str = INDEX_DIR) -> None:
+        """
+        Persist the FAISS index and paragraph text so later processes can
+        load them with `load_index` instead of re-reading the PDFs.
+        """
+        os.makedirs(index_dir, exist_ok=True)
+        faiss.write_index(self.index, os.path.join(index_dir, "index.faiss"))
+        ChunkStore.write(
+            self.paragraphs,
+            os.path.join(index_dir, "paragraphs.bin"),
+            os.path.join(index_dir, "offsets.npy"),
+        )
+        with open(os.path.join(index_dir, "card_index.json"), "w", encoding="utf-8") as f:
+            json.dump(self.card_index, f)
+        with open(os.path.join(index_dir, "languages.json"), "w", encoding="utf-8") as f:
+            json.dump(self.languages, f)
+        with open(os.path.join(index_dir, "provenance.json"), "w", encoding="utf-8") as f:
+            json.dump(self.provenance, f)
+        with open(os.path.join(index_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"chunks": len(self.paragraphs), "pdfs": PDF_PATHS, "dedup": self.dedup_report}, f)
+        log.info("FAISS index saved", extra={"fields": {"index_dir": index_dir}})
+
+    def load_index(self, index_dir: str = INDEX_DIR) -> bool:
+        """
+        Load a saved index. Returns False when nothing has been saved yet.
+        """
+        index_path = os.path.join(index_dir, "index.faiss")
+        if not os.path.exists(index_path):
+            return False
+        try:
+            self.index = faiss.read_index(index_path, _MMAP_FLAG)
+        except RuntimeError:
+            self.index = faiss.read_index(index_path)
+        self.paragraphs = ChunkStore(
+            os.path.join(index_dir, "paragraphs.bin"),
+            os.path.join(index_dir, "offsets.npy"),
+        )
+        card_index_path = os.path.join(index_dir, "card_index.json")
+        if os.path.exists(card_index_path):
+            with open(card_index_path, encoding="utf-8") as f:
+                self.card_index = json.load(f)
+        else:
+            self.build_card_index()
+        provenance_path = os.path.join(index_dir, "provenance.json")
+        if os.path.exists(provenance_path):
+            with open(provenance_path, encoding="utf-8") as f:
+                self.provenance = json.load(f)
+        languages_path = os.path.join(index_dir, "languages.json")
+        if os.path.exists(languages_path):
+            with open(languages_path, encoding="utf-8") as f:
+                self._set_languages(json.load(f))
+        else:
+            # Index saved before languages.json existed: detect once and keep
+            # the result so later loads (and other workers) skip detection
+            self._save_languages(languages_path, self.detect_languages())
+        self._selectors = {}
+        return True
+
+    @staticmethod
+    def _save_languages(path: str, languages: list) -> None:
+        try:
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(languages, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            log.warning("could not save chunk languages", extra={"fields": {"path": path, "error": str(e)}})
+
+    def _selector(self, query: str, language: str = None):
+        """
+        (selector, subset size) restricting a search to the chunks relevant to
+        `query` and `language`, or None for an unrestricted search.
+
+        Card-name queries search the chunks that mention the card; if none of
+        those are in `language`, the card restriction is dropped rather than
+        returning nothing. The subset is empty when no chunk at all is in
+        `language`.
+        """
+        card = _CARD_LOOKUP.get(query.strip().lower())
+        card_ids = self.card_index.get(card) if card else None
+        lang_ids = self._lang_ids.get(language, np.empty(0, dtype=np.int64)) if language else None
+
+        key = (card if card_ids else None, language)
+        if key == (None, None):
+            return None
+        selector = self._selectors.get(key)
+        if selector is not None:
+            return selector
+        with self._selectors_lock:
+            if key not in self._selectors:
+                if card_ids and lang_ids is not None:
+                    ids = np.intersect1d(np.array(card_ids, dtype=np.int64), lang_ids)
+                    if not len(ids):
+                        ids = lang_ids
+                elif card_ids:
+                    ids = np.array(card_ids, dtype=np.int64)
+                else:
+                    ids = lang_ids
+                self._selectors[key] = (faiss.IDSelectorBatch(ids), len(ids))
+            return self._selectors[key]
+
+    def _search(self,
+                queries: list[str],
+                embeddings: np.ndarray,
+                top_k: int,
+                language: str = None) -> list[list[int]]:
+        """
+        FAISS search for each query. The card/language restriction from
+        `_selector` is applied inside the search, so a filtered query still
+        gets `top_k` hits whenever the subset has that many chunks.
+        """
+        results = [None] * len(queries)
+        unrestricted = []
+        for row, query in enumerate(queries):
+            restricted = self._selector(query, language)
+            if restricted is None:
+                unrestricted.append(row)
+                continue
+            selector, size = restricted
+            if not size:
+                results[row] = []
+                continue
+            params = faiss.SearchParameters(sel=selector)
+            D, I = self.index.search(embeddings[row:row + 1], min(top_k, size), params=params)
+            results[row] = [int(i) for i in I[0] if i >= 0]
+        if unrestricted:
+            D, I = self.index.search(embeddings[unrestricted], top_k)
+            for row, ids in zip(unrestricted, I):
+                results[row] = [int(i) for i in ids if i >= 0]
+        return results
 
     def retrieve(self,
                  query: str,
                  context: ConversationContext = None,
                  top_k: int = 3) -> list[str]:
 
-        query_embedding = self.model.encode([query]).astype('float32')
-        D, I = self.index.search(query_embedding, top_k)
-        docs = [self.paragraphs[i] for i in I[0]]
-
-        if not context:
-            return docs
-
-        filtered = [d for d in docs if detect(d) == context.language]
-        return filtered[:top_k]
+        with stage_timer("embedding"):
+            query_embedding = self.model.encode([query]).astype('float32')
+        language = context.language if context else None
+        with stage_timer("faiss_search"):
+            ids = self._search([query], query_embedding, top_k, language)[0]
+        return [self.paragraphs[i] for i in ids]
 
+    def retrieve_batch(self, queries: list[str], top_k: int = 3) -> list[list[str]]:
+        """
+        Encode several queries in one forward pass and search them together
+        (card-name queries each search their own chunk subset). Returns one
+        list of paragraphs per query.
+        """
+        with stage_timer("embedding"):
+            query_embeddings = self.model.encode(queries).astype('float32')
+        with stage_timer("faiss_search"):
+            ids = self._search(queries, query_embeddings, top_k)
+        return [[self.paragraphs[i] for i in row] for row in ids]
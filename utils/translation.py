@@ -0,0 +1,202 @@
+# translation.py
+#
+# Language detection and translation shared by the reading pipeline.
+# Translators are picked with TRANSLATOR in initialize/config.py:
+#   - "google": Google Translate through deep_translator (network round trip)
+#   - "marian": offline Helsinki-NLP opus-mt models on CPU, one per language
+#               pair, loaded on first use and kept for the process lifetime
+
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from langdetect import detect
+from deep_translator import GoogleTranslator
+from initialize.config import (
+    TRANSLATOR, TRANSLATION_BATCH_SIZE, TRANSLATION_MODEL_TEMPLATE,
+    TRANSLATION_NUM_BEAMS, TRANSLATION_OFFLINE_LANGS,
+)
+from initialize.log import get_logger
+from initialize.metrics import stage_timer
+
+log = get_logger(__name__)
+
+# Sentence ends, except the period of a list number ("1. Past: ...")
+_SENTENCE_END = re.compile(r"(?<=[.!?।])(?<!\b\d\.)(?<!\b\d\d\.)\s+")
+
+
+class GoogleTranslate:
+    """
+    Remote Google Translate. The whole text goes out in one request.
+    """
+    name = "google"
+    sentence_batching = False
+
+    def __init__(self):
+        # GoogleTranslator keeps the text of the call in progress on the
+        # instance, so each thread gets its own clients
+        self._local = threading.local()
+
+    def supports(self, source: str, target: str) -> bool:
+        return True
+
+    def _client(self, source: str, target: str) -> GoogleTranslator:
+        clients: Dict[Tuple[str, str], GoogleTranslator] = getattr(self._local, "clients", None)
+        if clients is None:
+            clients = self._local.clients = {}
+        client = clients.get((source, target))
+        if client is None:
+            client = clients[(source, target)] = GoogleTranslator(source=source, target=target)
+        return client
+
+    def translate_batch(self, texts: List[str], source: str, target: str) -> List[str]:
+        # Google detects the source itself; 'auto' also avoids rejecting
+        # langdetect codes that Google spells differently (e.g. 'zh-cn')
+        source = 'en' if source == 'en' else 'auto'
+        client = self._client(source, target)
+        return [client.translate(text) for text in texts]
+
+
+class MarianTranslator:
+    """
+    Offline neural MT with Marian (opus-mt) models through transformers.
+    Covers English to and from TRANSLATION_OFFLINE_LANGS. Sentences are
+    translated in batches of `batch_size`, sorted by length so each batch
+    pads as little as possible.
+    """
+    name = "marian"
+    sentence_batching = True
+
+    def __init__(self,
+                 languages=TRANSLATION_OFFLINE_LANGS,
+                 model_template: str = TRANSLATION_MODEL_TEMPLATE,
+                 batch_size: int = TRANSLATION_BATCH_SIZE,
+                 num_beams: int = TRANSLATION_NUM_BEAMS):
+        self.languages = set(languages)
+        self.model_template = model_template
+        self.batch_size = batch_size
+        self.num_beams = num_beams
+        self._models: Dict[Tuple[str, str], tuple] = {}
+        self._failed = set()
+        self._lock = threading.Lock()
+
+    def supports(self, source: str, target: str) -> bool:
+        pair = (source, target)
+        if pair in self._failed:
+            return False
+        return (source == 'en' and target in self.languages) or (target == 'en' and source in self.languages)
+
+    def load(self, source: str, target: str) -> tuple:
+        """
+        Return (tokenizer, model, lock) for the pair, loading it on first use.
+        Raises ImportError/OSError if transformers or the model is missing;
+        the pair is then reported as unsupported from here on.
+        """
+        pair = (source, target)
+        entry = self._models.get(pair)
+        if entry is not None:
+            return entry
+        with self._lock:
+            if pair not in self._models:
+                try:
+                    from transformers import MarianMTModel, MarianTokenizer
+
+                    name = self.model_template.format(src=source, tgt=target)
+                    tokenizer = MarianTokenizer.from_pretrained(name)
+                    model = MarianMTModel.from_pretrained(name).eval()
+                except Exception:
+                    self._failed.add(pair)
+                    raise
+                # generate() already uses every core, so one call per model at a time
+                self._models[pair] = (tokenizer, model, threading.Lock())
+            return self._models[pair]
+
+    def translate_batch(self, texts: List[str], source: str, target: str) -> List[str]:
+        tokenizer, model, lock = self.load(source, target)
+        import torch
+
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        out: List[Optional[str]] = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            idx = order[start:start + self.batch_size]
+            inputs = tokenizer([texts[i] for i in idx], return_tensors="pt", padding=True, truncation=True)
+            with lock, torch.inference_mode():
+                generated = model.generate(**inputs, num_beams=self.num_beams)
+            for i, text in zip(idx, tokenizer.batch_decode(generated, skip_special_tokens=True)):
+                out[i] = text
+        return out
+
+
+TRANSLATORS = {
+    "google": GoogleTranslate,
+    "marian": MarianTranslator,
+}
+
+if TRANSLATOR not in TRANSLATORS:
+    raise ValueError(f"Unknown TRANSLATOR: {TRANSLATOR!r} (expected one of {sorted(TRANSLATORS)})")
+
+_translators: Dict[str, object] = {}
+_translators_lock = threading.Lock()
+
+
+def get_translator(name: Optional[str] = None):
+    """
+    Return the shared translator instance for `name` (TRANSLATOR by default).
+    Instances are created once per process so loaded models are reused.
+    """
+    name = name or TRANSLATOR
+    translator = _translators.get(name)
+    if translator is None:
+        with _translators_lock:
+            translator = _translators.setdefault(name, TRANSLATORS[name]())
+    return translator
+
+
+def split_text(text: str) -> List[List[str]]:
+    """
+    Split text into lines of sentences. Blank lines stay as empty lists so
+    paragraph breaks survive translation.
+    """
+    return [[s for s in _SENTENCE_END.split(line.strip()) if s] for line in text.split("\n")]
+
+
+def translate_text(text: str, source: str, target: str, translator=None) -> str:
+    """
+    Translate `text` from `source` to `target`. Translators that work per
+    sentence get the text's distinct sentences in one batched call; pairs the
+    translator cannot handle (or whose model fails to load) go to Google.
+    """
+    translator = translator or get_translator()
+    if not translator.supports(source, target):
+        translator = get_translator("google")
+    if not translator.sentence_batching:
+        return translator.translate_batch([text], source, target)[0]
+
+    lines = split_text(text)
+    sentences = list(dict.fromkeys(s for line in lines for s in line))
+    if not sentences:
+        return text
+    try:
+        translated = dict(zip(sentences, translator.translate_batch(sentences, source, target)))
+    except (ImportError, OSError) as e:
+        log.warning("Translator unavailable, falling back to Google",
+                    extra={"fields": {"translator": translator.name, "pair": f"{source}-{target}",
+                                      "error": str(e)}})
+        return translate_text(text, source, target, get_translator("google"))
+    return "\n".join(" ".join(translated[s] for s in line) for line in lines)
+
+
+def detect_and_translate(input_text: str, target_language='en'):
+    with stage_timer("lang_detect"):
+        detected_language = detect(input_text)
+    if detected_language != target_language:
+        with stage_timer("translation"):
+            return translate_text(input_text, detected_language, target_language), detected_language
+    return input_text, detected_language
+
+
+def translate_back(result_text: str, target_language: str):
+    if target_language == 'en':
+        return result_text
+    with stage_timer("back_translation"):
+        return translate_text(result_text, 'en', target_language)
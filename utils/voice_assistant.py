@@ -1,38 +1,536 @@
 import speech_recognition as sr
 from gtts import gTTS
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import hashlib
+import io
+import math
 import os
+import queue
+import re
+import shutil
+import struct
+import subprocess
+import tempfile
+import threading
 import time
+import wave
+from initialize.log import get_logger
+from initialize.config import (
+    TTS_CACHE_DIR, TTS_CACHE_MAX_FILES, TTS_ENGINE, TTS_MAX_CHUNK_CHARS, TTS_PLAYER, TTS_WORKERS,
+    VOICE_CALIBRATE_S, VOICE_PHRASE_LIMIT_S, VOICE_RECOGNIZER, VOICE_RECOGNIZER_WORKERS
+)
  
+log = get_logger(__name__)
+
 # Initialize the recognizer
 recognizer = sr.Recognizer()
 
+
+@dataclass
+class Utterance:
+    audio: sr.AudioData
+    source: str            # "microphone" or the fixture path
+    captured_at: float
+
+
+class MicrophoneSource:
+    """
+    Live microphone input. The ambient-noise calibration runs once when the
+    source is opened; the resulting energy threshold is then kept fixed for
+    every later utterance instead of being re-measured each turn.
+    """
+    name = "microphone"
+
+    def __init__(self, rec: sr.Recognizer = recognizer,
+                 calibrate_s: float = VOICE_CALIBRATE_S,
+                 phrase_limit_s: float = VOICE_PHRASE_LIMIT_S):
+        self.recognizer = rec
+        self.calibrate_s = calibrate_s
+        self.phrase_limit_s = phrase_limit_s
+        self._mic = None
+        self._stream = None
+
+    def open(self) -> None:
+        self._mic = sr.Microphone()
+        self._stream = self._mic.__enter__()
+        self.recognizer.adjust_for_ambient_noise(self._stream, duration=self.calibrate_s)
+        self.recognizer.dynamic_energy_threshold = False
+
+    def close(self) -> None:
+        if self._mic is not None:
+            self._mic.__exit__(None, None, None)
+            self._mic = self._stream = None
+
+    def capture(self, timeout: float = 1.0) -> Optional[Utterance]:
+        """
+        Wait up to `timeout` for speech to start; None if nobody spoke.
+        """
+        try:
+            audio = self.recognizer.listen(self._stream, timeout=timeout,
+                                           phrase_time_limit=self.phrase_limit_s)
+        except sr.WaitTimeoutError:
+            return None
+        return Utterance(audio, self.name, time.time())
+
+
+class WavFileSource:
+    """
+    Replays recorded WAV files as utterances, one per file, so voice input
+    can be exercised without a microphone. With `realtime`, each capture
+    takes as long as the clip, like speaking it would. `capture` raises
+    EOFError once every file has been played.
+    """
+    name = "wav"
+
+    def __init__(self, paths: Iterable[str], rec: Optional[sr.Recognizer] = None, realtime: bool = False):
+        self.paths = list(paths)
+        self.recognizer = rec or sr.Recognizer()
+        self.realtime = realtime
+        self._next = 0
+
+    def open(self) -> None:
+        self._next = 0
+
+    def close(self) -> None:
+        pass
+
+    def capture(self, timeout: float = 1.0) -> Optional[Utterance]:
+        if self._next >= len(self.paths):
+            raise EOFError
+        path = self.paths[self._next]
+        self._next += 1
+        with sr.AudioFile(path) as f:
+            audio = self.recognizer.record(f)
+        if self.realtime:
+            time.sleep(len(audio.frame_data) / (audio.sample_rate * audio.sample_width))
+        return Utterance(audio, path, time.time())
+
+
+class GoogleRecognizer:
+    name = "google"
+
+    def __init__(self, rec: sr.Recognizer = recognizer, language: str = "en-US"):
+        self.recognizer = rec
+        self.language = language
+
+    def recognize(self, utterance: Utterance) -> str:
+        return self.recognizer.recognize_google(utterance.audio, language=self.language)
+
+
+class SphinxRecognizer:
+    """
+    Offline CMU Sphinx recognition (requires pocketsphinx).
+    """
+    name = "sphinx"
+
+    def __init__(self, rec: sr.Recognizer = recognizer):
+        self.recognizer = rec
+
+    def recognize(self, utterance: Utterance) -> str:
+        return self.recognizer.recognize_sphinx(utterance.audio)
+
+
+class TranscriptRecognizer:
+    """
+    Test stand-in for WAV fixtures: returns the text of the `.txt` file next
+    to the fixture (e.g. `question1.wav` -> `question1.txt`), optionally
+    sleeping to mimic a remote recognizer's latency.
+    """
+    name = "transcript"
+
+    def __init__(self, latency_s: float = 0.0):
+        self.latency_s = latency_s
+
+    def recognize(self, utterance: Utterance) -> str:
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        try:
+            with open(os.path.splitext(utterance.source)[0] + ".txt", encoding="utf-8") as f:
+                text = f.read().strip()
+        except OSError:
+            text = ""
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+RECOGNIZERS = {
+    "google": GoogleRecognizer,
+    "sphinx": SphinxRecognizer,
+    "transcript": TranscriptRecognizer,
+}
+
+
+def get_recognizer(name: str = VOICE_RECOGNIZER):
+    return RECOGNIZERS[name]()
+
+
+class VoiceListener:
+    """
+    Background voice input. A capture thread records utterances from the
+    source into a queue while a small pool transcribes them, so the next
+    question can be captured while the previous one is still being
+    recognised (or answered). `get` returns transcripts in capture order.
+    """
+
+    _END = object()
+
+    def __init__(self, source=None, recognizer_backend=None,
+                 workers: int = VOICE_RECOGNIZER_WORKERS):
+        self.source = source or MicrophoneSource()
+        self.backend = recognizer_backend or get_recognizer()
+        self.workers = workers
+        self._pool = None
+        self._results: "queue.Queue[Any]" = queue.Queue()
+        self._running = threading.Event()
+        self._thread = None
+
+    def start(self) -> "VoiceListener":
+        if self._thread is None or not self._thread.is_alive():
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="voice-rec")
+            self.source.open()
+            self._running.set()
+            self._thread = threading.Thread(target=self._capture_loop, name="voice-capture", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stop capturing. A capture in progress can run for the whole phrase
+        limit, so wait that long (plus the listen timeout and a margin) for it
+        to end; the capture thread closes the source itself on exit, so it is
+        never closed under a running capture. Transcriptions already submitted
+        still finish and can be collected with `get`.
+        """
+        self._running.clear()
+        if self._thread is not None:
+            limit = getattr(self.source, "phrase_limit_s", VOICE_PHRASE_LIMIT_S)
+            self._thread.join(timeout=limit + 2.0)
+            if self._thread.is_alive():
+                log.warning("voice capture still running after stop; it ends with the current phrase",
+                            extra={"fields": {"phrase_limit_s": limit}})
+            self._thread = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    def _capture_loop(self) -> None:
+        pool = self._pool
+        try:
+            while self._running.is_set():
+                try:
+                    utterance = self.source.capture()
+                except EOFError:
+                    break
+                if utterance is None:
+                    continue
+                try:
+                    self._results.put((utterance.captured_at, pool.submit(self._recognize, utterance)))
+                except RuntimeError:   # stop() already shut the pool down
+                    break
+        finally:
+            self.source.close()
+            self._results.put(self._END)
+
+    def _recognize(self, utterance: Utterance) -> Optional[str]:
+        try:
+            return self.backend.recognize(utterance)
+        except sr.UnknownValueError:
+            log.info("speech not understood", extra={"fields": {"recognizer": self.backend.name}})
+        except sr.RequestError as e:
+            log.warning("speech recognition service unavailable",
+                        extra={"fields": {"recognizer": self.backend.name, "error": str(e)}})
+        return None
+
+    def get(self, timeout: Optional[float] = None, since: Optional[float] = None) -> Optional[str]:
+        """
+        Next transcript (None if it could not be recognised). Utterances
+        captured before `since` (a time.time() value), e.g. while the last
+        reading was being spoken, are discarded. Raises queue.Empty on timeout
+        and EOFError once the source is exhausted.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            item = self._results.get(timeout=remaining)
+            if item is self._END:
+                self._results.put(self._END)
+                raise EOFError
+            captured_at, future = item
+            if since is None or captured_at >= since:
+                return future.result()
+
+
+_listener = None
+
+
 def listen_for_question():
     """
     Listens for a question from the user and converts speech to text.
+    The microphone listener is started on first use and keeps capturing in
+    the background between questions; speech from before this call (e.g.
+    during the previous answer) is ignored.
+    """
+    global _listener
+    if _listener is None:
+        _listener = VoiceListener().start()
+    asked_at = time.time()
+    print("🎤 Listening for your question... Speak now!")
+    try:
+        question = _listener.get(since=asked_at)
+    except EOFError:
+        _listener = None
+        return None
+    if question:
+        print(f"🎧 You said: {question}")
+    else:
+        print("Sorry, I couldn't understand that. Can you please repeat?")
+    return question
+
+
+def stop_listening() -> None:
+    """
+    Stop the background microphone listener, if one was started.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+class GTTSEngine:
+    """
+    Google text-to-speech (needs network access). Produces MP3.
+    """
+    name = "gtts"
+    suffix = ".mp3"
+    player = ["mpg321", "-q"]   # Make sure mpg321 is installed
+
+    def synthesize(self, text: str, lang: str) -> bytes:
+        buf = io.BytesIO()
+        gTTS(text=text, lang=lang).write_to_fp(buf)
+        return buf.getvalue()
+
+
+class ToneEngine:
     """
-    with sr.Microphone() as source:
-        print("🎤 Listening for your question... Speak now!")
-        recognizer.adjust_for_ambient_noise(source)  # Adjust to ambient noise
-        audio = recognizer.listen(source=source)
+    Offline stand-in: renders a short sine tone per chunk (length follows the
+    text) as WAV, optionally sleeping to mimic a remote engine's latency
+    (a fixed round trip plus a per-character cost).
+    Lets the pipeline be exercised without network access.
+    """
+    name = "tone"
+    suffix = ".wav"
+    player = ["aplay", "-q"]
+
+    def __init__(self, seconds_per_char: float = 0.02, latency_s: float = 0.0,
+                 latency_per_char: float = 0.0, rate: int = 8000):
+        self.seconds_per_char = seconds_per_char
+        self.latency_s = latency_s
+        self.latency_per_char = latency_per_char
+        self.rate = rate
+
+    def synthesize(self, text: str, lang: str) -> bytes:
+        delay = self.latency_s + self.latency_per_char * len(text)
+        if delay:
+            time.sleep(delay)
+        frames = int(self.rate * self.seconds_per_char * max(len(text), 1))
+        pitch = 220 + int(hashlib.md5(text.encode("utf-8")).hexdigest()[:2], 16)
+        samples = b"".join(
+            struct.pack("<h", int(8000 * math.sin(2 * math.pi * pitch * i / self.rate)))
+            for i in range(frames)
+        )
+        buf = io.BytesIO()
+        with wave.open(buf, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(self.rate)
+            w.writeframes(samples)
+        return buf.getvalue()
+
+
+TTS_ENGINES = {
+    "gtts": GTTSEngine,
+    "tone": ToneEngine,
+}
+
+_engine = None
+_tts_pool = None
+_tts_pool_pid = None
+
 
+def get_engine(name: Optional[str] = None):
+    """
+    Return the configured TTS engine (TTS_ENGINE unless `name` is given).
+    """
+    global _engine
+    if name is not None:
+        return TTS_ENGINES[name]()
+    if _engine is None:
+        _engine = TTS_ENGINES[TTS_ENGINE]()
+    return _engine
+
+
+def _pool() -> ThreadPoolExecutor:
+    # Executor threads do not survive a fork, so build one per process
+    global _tts_pool, _tts_pool_pid
+    if _tts_pool is None or _tts_pool_pid != os.getpid():
+        _tts_pool = ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="tts")
+        _tts_pool_pid = os.getpid()
+    return _tts_pool
+
+
+def split_sentences(text: str, max_chars: int = TTS_MAX_CHUNK_CHARS) -> List[str]:
+    """
+    Split a reply into speakable chunks: one per sentence, with sentences
+    longer than max_chars broken at commas or spaces.
+    """
+    text = re.sub(r"[*#_`]+", " ", text)
+    chunks = []
+    for sentence in re.split(r"(?<=[.!?।])\s+|\n+", text):
+        sentence = " ".join(sentence.split())
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(", ", 0, max_chars)
+            if cut <= 0:
+                cut = sentence.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            chunks.append(sentence[:cut + 1].strip())
+            sentence = sentence[cut + 1:].strip()
+        if re.search(r"\w", sentence):
+            chunks.append(sentence)
+    return chunks
+
+
+def _cache_path(engine, text: str, lang: str) -> Optional[str]:
+    if not TTS_CACHE_DIR:
+        return None
+    key = hashlib.sha256(f"{engine.name}\0{lang}\0{text}".encode("utf-8")).hexdigest()
+    return os.path.join(TTS_CACHE_DIR, key + engine.suffix)
+
+
+def _claim(cached: str, path: str) -> bool:
+    """
+    Give this call its own name for a cached file: a hard link (or a copy
+    where links are not supported) inside the call's workdir, so another
+    process pruning the cache cannot remove it before it has been played.
+    False if the file is already gone.
+    """
+    try:
+        os.link(cached, path)
+    except FileNotFoundError:
+        return False
+    except OSError:
         try:
-            question = recognizer.recognize_google(audio)
-            print(f"🎧 You said: {question}")
-            return question
-        except sr.UnknownValueError:
-            print("Sorry, I couldn't understand that. Can you please repeat?")
-            return None
-        except sr.RequestError:
-            print("Could not connect to the service. Please try again later.")
-            return None
+            shutil.copyfile(cached, path)
+        except FileNotFoundError:
+            return False
+    return True
+
 
-def speak_response(response):
+def _synthesize_chunk(engine, text: str, lang: str, workdir: str, index: int):
+    """
+    Return (path, cache_hit) for one chunk; the path is always inside the
+    call's own workdir. Cached audio is linked there (files are
+    content-addressed and never rewritten); new audio is written to a unique
+    temp name and renamed into the cache, then linked the same way.
+    """
+    path = os.path.join(workdir, f"{index:03d}{engine.suffix}")
+    cached = _cache_path(engine, text, lang)
+    if cached and _claim(cached, path):
+        try:
+            os.utime(cached)
+        except OSError:
+            pass
+        return path, True
+
+    audio = engine.synthesize(text, lang)
+    if cached:
+        os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=TTS_CACHE_DIR, suffix=".part")
+        with os.fdopen(fd, "wb") as f:
+            f.write(audio)
+        os.replace(tmp, cached)
+        if _claim(cached, path):
+            return path, False
+
+    with open(path, "wb") as f:
+        f.write(audio)
+    return path, False
+
+
+def _prune_cache() -> None:
+    try:
+        files = [os.path.join(TTS_CACHE_DIR, f) for f in os.listdir(TTS_CACHE_DIR)
+                 if not f.endswith(".part")]
+    except FileNotFoundError:
+        return
+    if len(files) <= TTS_CACHE_MAX_FILES:
+        return
+    files.sort(key=lambda f: os.path.getmtime(f))
+    for f in files[:len(files) - TTS_CACHE_MAX_FILES]:
+        try:
+            os.remove(f)
+        except OSError:
+            pass
+
+
+def play_audio(path: str, engine=None) -> None:
+    """
+    Play an audio file with the engine's player (or TTS_PLAYER), blocking
+    until it finishes.
+    """
+    engine = engine or get_engine()
+    cmd = TTS_PLAYER.split() if TTS_PLAYER else list(engine.player)
+    subprocess.run(cmd + [path], check=False)
+
+
+def speak_response(
+    response: str,
+    lang: str = 'en',
+    engine=None,
+    play: Optional[Callable[[str], None]] = None
+) -> Dict[str, Any]:
     """
     Converts text response to speech and plays it.
+
+    The reply is split into sentences that are synthesised in a worker pool;
+    playback of the first sentence starts as soon as it is ready while the
+    rest are still being generated. Returns chunk, cache-hit and timing counts.
     """
-    tts = gTTS(text=response, lang='en')
-    tts.save("response.mp3")
-    os.system("mpg321 response.mp3")  # Plays the audio using mpg321 (Make sure mpg321 is installed)
+    engine = engine or get_engine()
+    play = play or (lambda path: play_audio(path, engine))
+    chunks = split_sentences(response)
+    stats = {"chunks": len(chunks), "cache_hits": 0, "failed": 0,
+             "first_audio_s": None, "total_s": 0.0}
+    if not chunks:
+        return stats
+
+    start = time.perf_counter()
+    workdir = tempfile.mkdtemp(prefix="tts-")
+    try:
+        pool = _pool()
+        futures = [pool.submit(_synthesize_chunk, engine, chunk, lang, workdir, i)
+                   for i, chunk in enumerate(chunks)]
+        for n, future in enumerate(futures):
+            try:
+                path, hit = future.result()
+            except Exception:
+                log.warning("speech synthesis failed", exc_info=True,
+                            extra={"fields": {"engine": engine.name, "chunk": n}})
+                stats["failed"] += 1
+                continue
+            stats["cache_hits"] += hit
+            if stats["first_audio_s"] is None:
+                stats["first_audio_s"] = time.perf_counter() - start
+            play(path)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        if TTS_CACHE_DIR:
+            _prune_cache()
+    stats["total_s"] = time.perf_counter() - start
+    return stats
 
 
 # def voice_input_output_flow():